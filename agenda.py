@@ -0,0 +1,197 @@
+"""
+This module provides the "DueIndex" class, a sorted index of the unfinished
+tasks due next across all of a user's lists. Each list keeps the sorted due
+timestamps of its unfinished tasks in its summary, so the index only loads
+the lists holding one of the tasks asked for, and is then kept up to date
+from the changes "Data" reports. Finding the tasks due next never scans
+every list.
+
+Imports:
+- bisect: For keeping the index sorted and counting overdue tasks.
+- heapq: For merging the due timestamps of every list's summary.
+- itertools: For taking the first due timestamps of the merge.
+- threading: For guarding the index against the background writer.
+- time: For finding overdue tasks.
+
+Classes:
+- DueIndex: Unfinished tasks across every list, ordered by due date.
+
+Methods:
+- __init__(self, user_data): Initializes the index and follows the data.
+- upcoming(self, count: int): Returns the tasks due next, overdue ones first.
+- count_overdue(self): Returns how many unfinished tasks are overdue.
+- close(self): Stops following the data.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import bisect
+import heapq
+import itertools
+import threading
+import time
+
+
+class DueIndex:
+    """
+    Keeps (due, list_name, task_id) entries of the unfinished tasks of the
+    lists loaded so far in due order, where due is the task's due timestamp.
+    A list is only loaded once its summary shows it holds one of the tasks
+    due next. Each change costs a binary search, and reading the next tasks
+    only touches the entries returned.
+    """
+
+    def __init__(self, user_data):
+        """
+        Initializes the index for a user's data and follows its changes.
+        """
+        self.user_data = user_data
+        self._entries = []
+        self._keys = {}
+        self._lists = {}
+        self._lock = threading.RLock()
+
+        user_data.add_listener(self._on_change)
+
+    def _summary(self, list_data: dict) -> dict:
+        """
+        Returns the summary of a list, loading its tasks if it is missing.
+        """
+        summary = list_data.get('summary')
+        if summary is None or 'recurring' not in summary:
+            # Loading the tasks checks and rebuilds the summary
+            list_data['tasks']
+            summary = list_data['summary']
+        return summary
+
+    def _ensure_loaded(self, lists: dict, count: int):
+        """
+        Loads every list holding one of the count tasks due first. The
+        count-th due timestamp is found by merging the entries already
+        loaded with the summaries of the other lists, so only the lists
+        with a task due up to it are read. Must be called with the data
+        and the index locked.
+        """
+        waiting = {
+            list_name: self._summary(list_data)['pending']
+            for list_name, list_data in list(lists.items())
+            if list_name not in self._lists
+        }
+        dues = heapq.merge(
+            (entry[0] for entry in self._entries), *waiting.values()
+        )
+        first = list(itertools.islice(dues, count))
+        if len(first) < count:
+            last = float('inf')
+        elif first:
+            last = first[-1]
+        else:
+            return
+
+        for list_name, pending in waiting.items():
+            if pending and pending[0] <= last:
+                self._add_list(list_name, lists[list_name])
+
+    def _on_change(self, operations):
+        """
+        Applies the operations reported by the data to the loaded lists.
+        A replaced list, or a reload of the whole data, is dropped from the
+        index until it is next needed, so the change itself reads no tasks.
+        """
+        with self._lock:
+            if operations is None:
+                self._entries, self._keys, self._lists = [], {}, {}
+                return
+
+            for kind, list_name, *args in operations:
+                if kind in ('set_list', 'delete_list'):
+                    self._remove_list(list_name)
+                elif list_name not in self._lists:
+                    continue
+                elif kind == 'set_task':
+                    self._remove(list_name, args[0])
+                    self._add(list_name, *args)
+                elif kind == 'delete_task':
+                    self._remove(list_name, args[0])
+
+    def _add(self, list_name: str, task_id: str, task_data: dict):
+        """
+        Inserts a task unless it is completed or has no due date.
+        """
+        if task_data['completed'] or task_data.get('due') is None:
+            return
+        entry = (task_data['due'], list_name, task_id)
+        bisect.insort(self._entries, entry)
+        self._keys[(list_name, task_id)] = entry
+        self._lists[list_name].add(task_id)
+
+    def _remove(self, list_name: str, task_id: str):
+        """
+        Removes a task if it is in the index.
+        """
+        entry = self._keys.pop((list_name, task_id), None)
+        if entry is None:
+            return
+        del self._entries[bisect.bisect_left(self._entries, entry)]
+        self._lists.get(list_name, set()).discard(task_id)
+
+    def _add_list(self, list_name: str, list_data: dict):
+        """
+        Loads a list and inserts every unfinished task of it.
+        """
+        # Loading a list may commit an upgrade, which is reported back
+        list_data['tasks']
+        self._lists[list_name] = set()
+        for task_id, task_data in list_data['tasks'].items():
+            self._add(list_name, task_id, task_data)
+
+    def _remove_list(self, list_name: str):
+        """
+        Removes every task of a list.
+        """
+        for task_id in list(self._lists.pop(list_name, ())):
+            self._remove(list_name, task_id)
+
+    def upcoming(self, count: int) -> list:
+        """
+        Returns the (due, list_name, task_id, task_data) of the next count
+        unfinished tasks by due date, starting with the overdue ones.
+        The data is locked while the lists are loaded, so a change made on
+        another thread meanwhile is not missed.
+        """
+        with self.user_data.locked() as data:
+            lists = data['lists']
+            with self._lock:
+                self._ensure_loaded(lists, count)
+                entries = self._entries[:count]
+
+        upcoming = []
+        for due, list_name, task_id in entries:
+            task_data = (
+                lists[list_name]['tasks'].get(task_id)
+                if list_name in lists else None
+            )
+            if task_data is not None:
+                upcoming.append((due, list_name, task_id, task_data))
+        return upcoming
+
+    def count_overdue(self) -> int:
+        """
+        Returns how many unfinished tasks are past their due date, counted
+        from the summary of every list without reading any tasks.
+        """
+        now = time.time()
+        with self.user_data.locked() as data:
+            return sum(
+                bisect.bisect_right(self._summary(list_data)['pending'], now)
+                for list_data in data['lists'].values()
+            )
+
+    def close(self):
+        """
+        Stops following the data.
+        """
+        self.user_data.remove_listener(self._on_change)
@@ -10,47 +10,22 @@ License: MIT
 
 import customtkinter
 import constants
-import re as Regex
 import utility as util
+import recurrence
+import assets
 import pywinstyles
 import threading
+import bisect
+import itertools
 
 from tkinter import font    
-from collections import Counter
 from datetime import datetime
-from data import Data
-from timer import Timer
+from session import Session
 from tkcalendar import Calendar
-from PIL import Image
 from loading import Loading
+from virtuallist import VirtualList
 from queue import Queue
-
-
-# Private functions
-def is_valid(input: str):
-    """
-    Uses regex library to validate input does not contain any of the.
-    """
-    return Regex.compile(r"^[^<>/{}[\]~`]*$").match(input)
-    
-
-def check_name_length(name: str):
-    """
-    Returns boolean depending on if name fits within requirements.
-    """
-    return (len(name) > constants.App["NameMinimumLength"] 
-        and len(name) < constants.App["NameMaximumLength"])
-
-
-def check_desc_length(desc: str):
-    """
-    Returns boolean depending on if desc fits within requirements.
-    """
-    return len(desc) < constants.App["DescriptionMaximumLength"]
-
-
-# Variables
-due_date_timers = {}
+from utility import is_valid, check_name_length, check_desc_length
 
 
 # Constants
@@ -71,24 +46,30 @@ COLOUR_STATE_INFOS = [
 ]
 
 
+def get_due_state(due: float) -> int:
+    """
+    Returns the index of the state colour for an unfinished task
+    due at the given timestamp.
+    """
+    time_diff = due - datetime.now().timestamp()
+
+    if time_diff > 86400:
+        return 0
+    elif 3600 < time_diff <= 86400:
+        return 1
+    elif 0 < time_diff <= 3600:
+        return 2
+    return 3
+
+
 class Task(customtkinter.CTkFrame):
     """
     A class representing a task within a to-do list
     """
     PRIORITY_LEVELS = [str(level+1) for level in range(5)]
 
-    DELETE_ICON = customtkinter.CTkImage(
-        size=(18,17),
-        light_image=Image.open('images/trash.png'), 
-        dark_image=Image.open('images/trash.png'))
-    
-    CALENDAR_ICON = customtkinter.CTkImage(
-        light_image=Image.open('images/calendar.png'), 
-        dark_image=Image.open('images/calendar.png'))
-    
-    LOADING_ICON = customtkinter.CTkImage(
-        light_image=Image.open("images/loading.png"), 
-        dark_image=Image.open("images/loading.png"))
+    # Heights of the rows of the task view, including the spacing around them
+    ROW_HEIGHTS = {'header': 26, 'task': 120}
 
     def __init__(self, master, data, main, list, list_name: str):
         """
@@ -108,15 +89,12 @@ class Task(customtkinter.CTkFrame):
         Returns:
             tuple: A tuple containing user data, task data, and task ID.
         """
-        user_data = self.user_data.get()
-        list_data = user_data['lists'][self.list_name]
-        
-        if not list_data:
+        result = self.user_data.find_task(self.list_name, task_name)
+        if not result:
             return
-        
-        for task_id, task_data in list_data['tasks'].items():
-            if task_data.get('name') == task_name:
-                return user_data, task_data, task_id
+
+        task_id, task_data = result
+        return self.user_data.get(), task_data, task_id
 
     def get_task_state(self, task_name: str) -> int:
         """
@@ -125,24 +103,7 @@ class Task(customtkinter.CTkFrame):
         data, task_data, *_ = self.get_task_data(task_name)
         if task_data['completed']:
             return len(STATE_COLOURS)-1
-        due_date = task_data['due_date']
-
-        due_datetime_str = f"{due_date['date']} {due_date['time']}"
-        due_datetime = datetime.strptime(due_datetime_str, "%d/%m/%Y %I:%M %p")
-
-        current_datetime = datetime.now()
-        time_diff = (due_datetime - current_datetime).total_seconds()
-
-        state = None
-        if time_diff > 86400:
-            state = 1
-        elif 3600 < time_diff <= 86400: 
-            state = 2
-        elif 0 < time_diff <= 3600:
-            state = 3
-        else:
-            state = 4
-        return state-1
+        return get_due_state(task_data['due'])
     
     def get_completed_tasks(self) -> dict:
         """
@@ -158,9 +119,11 @@ class Task(customtkinter.CTkFrame):
         
         return completed_tasks
 
-    def load_tasks_frame(self):
+    def load_tasks_frame(self, keep_position: bool = False, changed: tuple = None):
         """
         Loads and displays the frame containing all tasks in the list.
+        The task rows are shown by the list's shared task view, which only
+        applies the change to a single (task_id, task_data) if given.
         """
         data = self.user_data.get()
         list_data = data['lists'][self.list_name]
@@ -186,6 +149,7 @@ class Task(customtkinter.CTkFrame):
         ).pack(pady=30)
 
         def back_clicked():
+            self.list.hide_task_view()
             self.list.reload_list_frame(self.tasks_frame)
 
         customtkinter.CTkButton(
@@ -217,14 +181,9 @@ class Task(customtkinter.CTkFrame):
         ).place(relx=0.5, rely=0.92, anchor=customtkinter.CENTER)
 
         if list_data['tasks']:
-            self.tasks_container = customtkinter.CTkScrollableFrame(
-                self.tasks_frame, 
-                width=300, 
-                height=350,
-                scrollbar_button_color="#2d2c2c", 
-                fg_color="transparent"
-            )
-            self.load_saved_tasks(list_data)
+            self.tasks_container = self.list.get_task_view()
+            self.tasks_container.update_row = self.update_row
+            self.load_saved_tasks(list_data, keep_position, changed)
         else:
             customtkinter.CTkLabel(
                 self.tasks_frame, 
@@ -236,6 +195,7 @@ class Task(customtkinter.CTkFrame):
         """
         Lodas the frame for modifying or creating a task.
         """
+        self.list.hide_task_view()
         self.tasks_frame.destroy()
         self.main.adjust_window_geometry()
 
@@ -260,6 +220,7 @@ class Task(customtkinter.CTkFrame):
         _, task_data, task_id = result
 
         due_date = task_data and task_data['due_date']
+        rule = task_data and task_data.get('recurrence')
         task_description = task_data and task_data['description']
         priority_level = task_data and task_data['priority']
         task_date, task_time = (
@@ -400,11 +361,56 @@ class Task(customtkinter.CTkFrame):
             text="", 
             corner_radius=0,
             width=20, 
-            image=self.CALENDAR_ICON,
+            image=assets.get(
+                'calendar', scaling=self.modify_task_frame._get_widget_scaling()
+            ),
             command=self.load_calendar
         )
         self.calendar.place(relx=0.475, rely=0.6, anchor=customtkinter.CENTER)
 
+        customtkinter.CTkLabel(
+            self.modify_task_frame, 
+            width=50, 
+            height=20, 
+            fg_color="transparent", 
+            bg_color="transparent", 
+            text="Repeat", 
+            text_color="white", 
+            justify=customtkinter.LEFT
+        ).place(relx=0.6, rely=0.5)
+
+        # A rule matching no preset is offered as it is, so it is kept
+        repeat_preset, self.task_custom_preset = recurrence.preset_of(rule)
+        repeat_values = list(recurrence.PRESETS)
+        if repeat_preset == recurrence.CUSTOM:
+            repeat_values.append(recurrence.CUSTOM)
+
+        self.task_repeat = customtkinter.CTkOptionMenu(
+            self.modify_task_frame,
+            values=repeat_values,
+            variable=customtkinter.StringVar(value=repeat_preset),
+            corner_radius=0,
+            width=110,
+            height=35,
+            fg_color="#D9D9D9",
+            text_color="black"
+        )
+        self.task_repeat.place(relx=0.71, rely=0.6, anchor=customtkinter.CENTER)
+
+        self.task_repeat_interval = customtkinter.StringVar(
+            value=str(rule['interval']) if rule else "1"
+        )
+        customtkinter.CTkEntry(
+            self.modify_task_frame, 
+            width=40, 
+            height=35, 
+            fg_color="#D9D9D9", 
+            text_color="black", 
+            textvariable=self.task_repeat_interval, 
+            corner_radius=0,
+            justify=customtkinter.CENTER
+        ).place(relx=0.88, rely=0.6, anchor=customtkinter.CENTER)
+
         customtkinter.CTkLabel(
             self.modify_task_frame,
             text="Please enter the time in following format:\n" +
@@ -485,205 +491,244 @@ class Task(customtkinter.CTkFrame):
             anchor=customtkinter.CENTER
         )
 
-    def create_task_template(self, task_data: dict):
+    def update_row(self, kind: str, row, payload):
         """
-        Creates and displays a task item in the UI.
+        Shows an item of the task view in a row widget of its kind.
         """
-        task_name = task_data['name']
-        completed_check = customtkinter.IntVar(value=task_data['completed'])
-        task_state = self.get_task_state(task_name)
+        if kind == 'header':
+            row.show(payload)
+        else:
+            row.show(self, *payload)
 
-        # Callback for handling task completion status change
-        def task_completed():
-            data, task_data, *other = self.get_task_data(task_name)
-            task_data['completed'] = completed_check.get() == 1
-            self.user_data.update(data)
-            self.reload_tasks_frame(self.tasks_frame)
+    def task_completed_activated(self, task_name: str, completed: bool):
+        """
+        Marks a task as completed or not. Completing a recurring task
+        moves it to its next occurrence instead.
+        """
+        _, task_data, task_id = self.get_task_data(task_name)
+        if completed and task_data.get('recurrence'):
+            task_data = recurrence.roll(
+                task_data, datetime.now().timestamp(), completed=True
+            )
+        else:
+            task_data = dict(task_data, completed=completed)
+        self.user_data.set_task(self.list_name, task_id, task_data)
+        self.show_task_change(task_id, task_data)
 
-        # Task item container with rounded corners and padding
-        task_item = customtkinter.CTkFrame(
-            self.tasks_container,
-            width=400,
-            height=100,
-            fg_color=STATE_COLOURS[task_state],
-            corner_radius=15,
-            border_color="gray",
-            border_width=2
-        )
+    def task_delete_activated(self, task_name: str):
+        *_, task_id = self.get_task_data(task_name)
+        self.user_data.delete_task(self.list_name, task_id)
 
-        self.hidden_widgets.append([task_item, 8])
-        task_item.pack_propagate(False)
-        task_item.pack(pady=10)
+        self.show_task_change(task_id)
 
-        customtkinter.CTkLabel(
-            task_item,
-            text=task_name,
-            font=self.main.get_font(family="Roboto", size=18, bold=True)
-        ).place(relx=0.05, rely=0.2, anchor="w")
+    def get_section_header(self, task_data: dict) -> str:
+        """
+        Returns the header of the section of the task view a task is in.
+        """
+        if task_data['completed'] is True:
+            return 'COMPLETED'
+        return f'LEVEL {int(task_data["priority"])}'
 
-        customtkinter.CTkLabel(
-            task_item,
-            text=util.split_string(task_data['description'], 25),
-            font=self.main.get_font(family="Roboto", size=14),
-            wraplength=280,
-            justify=customtkinter.LEFT
-        ).place(relx=0.05, rely=0.45, anchor="w")
+    def get_section_order(self, header: str) -> float:
+        """
+        Returns the position of a section in the task view, the priority
+        levels in order and then the completed tasks.
+        """
+        if header == 'COMPLETED':
+            return float('inf')
+        return int(header.split()[1])
 
-        date_obj = datetime.strptime(task_data['due_date']['date'], "%d/%m/%Y")
-        customtkinter.CTkLabel(
-            task_item,
-            text=date_obj.strftime("%b %d"),
-            font=self.main.get_font(family="Roboto", size=14, bold=True),
-            text_color="#D3D3D3"
-        ).place(relx=0.53, rely=0.19, anchor="center")
+    def index_task_items(self, items: list):
+        """
+        Notes the sections of the task view's items. Each section keeps its
+        tasks' ids mapped to increasing numbers in the order they are shown,
+        so a task's index is found from the sizes of the sections before it
+        and a binary search within its own.
+        """
+        self.sections = {}
+        self.task_sections = {}
+        self.section_counter = itertools.count()
+        for kind, payload in items:
+            if kind == 'header':
+                header = payload
+                self.sections[header] = ({}, [])
+            else:
+                self.add_to_section(header, payload[0])
 
-        def edit_clicked():
-            self.load_task_modify_menu(task_name=task_name)
+    def add_to_section(self, header: str, task_id: str) -> int:
+        """
+        Adds a task to the end of a section, returning its index in it.
+        """
+        ids, numbers = self.sections[header]
+        ids[task_id] = next(self.section_counter)
+        numbers.append(ids[task_id])
+        self.task_sections[task_id] = header
+        return len(numbers) - 1
 
-        customtkinter.CTkButton(
-            task_item, 
-            text="EDIT", 
-            fg_color="#00BFFF",
-            hover_color="#1E90FF", 
-            text_color="white",
-            corner_radius=5, 
-            width=60, 
-            height=25,
-            command=edit_clicked
-        ).place(relx=0.75, rely=0.2, anchor="center")
+    def get_section_start(self, header: str) -> int:
+        """
+        Returns the index of a section's header in the task view, which is
+        where the section would be inserted if it is not shown.
+        """
+        order = self.get_section_order(header)
+        return sum(
+            1 + len(numbers) for other, (_, numbers) in self.sections.items()
+            if self.get_section_order(other) < order
+        )
 
-        def delete_clicked():
-            self.task_delete_activated(task_name)
+    def apply_task_change(self, task_id: str, task_data: dict = None):
+        """
+        Applies the change to a single task to the task view. Its row is
+        updated in place if it stays in its section. Otherwise it is removed,
+        along with the header of a section left empty, and added to the end
+        of its new section, as a new task would be. A deleted task is given
+        without data. The task is found through the sections, so this costs
+        the same however many tasks the list has.
+        """
+        view = self.tasks_container
+        header = task_data and self.get_section_header(task_data)
+
+        current = self.task_sections.get(task_id)
+        if current is not None:
+            ids, numbers = self.sections[current]
+            start = self.get_section_start(current)
+            position = bisect.bisect_left(numbers, ids[task_id])
+            if current == header:
+                view.replace(
+                    start + 1 + position, ('task', (task_id, task_data))
+                )
+                return
 
-        customtkinter.CTkButton(
-            task_item, text="", image=self.DELETE_ICON,
-            fg_color="#FF5C5C", text_color="#CCCCCC", hover_color="#CC4949",
-            corner_radius=5,  width=15, height=20,
-            command=delete_clicked
-        ).place(relx=0.92, rely=0.2, anchor="center")
+            view.remove(start + 1 + position)
+            del numbers[position]
+            del ids[task_id]
+            del self.task_sections[task_id]
+            if not numbers:
+                view.remove(start)
+                del self.sections[current]
 
-        customtkinter.CTkCheckBox(
-            task_item, text="",
-            fg_color="gray", hover_color="green", corner_radius=5,
-            width=10, variable=completed_check, command=task_completed
-        ).place(relx=0.88, rely=0.75, anchor="w")
+        if task_data is None:
+            return
+
+        start = self.get_section_start(header)
+        if header not in self.sections:
+            self.sections[header] = ({}, [])
+            view.insert(start, ('header', header))
+        position = self.add_to_section(header, task_id)
+        view.insert(start + 1 + position, ('task', (task_id, task_data)))
 
-    def cleanup_task_timer(self, task_id: str):
+    def show_task_change(self, task_id: str, task_data: dict = None):
         """
-        Cleans up any timers or background processes within tasks.
+        Shows the change to a single task in the displayed tasks frame,
+        reloading the frame only if the task view does not hold this list
+        or the list is left with no tasks.
         """
-        timer = due_date_timers[task_id]
-        if timer:
-            timer.clean()
-
-    def task_delete_activated(self, task_name: str):
-        data, *_, task_id = self.get_task_data(task_name)
-        list_data = data['lists'][self.list_name]
-
-        list_data['tasks'].pop(task_id, None)
-        self.user_data.update(data)
+        if self.list.task_view_owner is not self:
+            self.reload_tasks_frame(self.tasks_frame)
+            return
 
-        self.reload_tasks_frame(self.tasks_frame)
-        self.cleanup_task_timer(task_id)
+        self.apply_task_change(task_id, task_data)
+        if not self.tasks_container.items:
+            self.reload_tasks_frame(self.tasks_frame)
 
-    def load_saved_tasks(self, list_data):
+    def get_task_items(self) -> list:
         """
-        Loads and displays all saved tasks from the list data.
+        Returns the items of the task view: a header for each priority
+        level followed by its unfinished tasks, then the completed tasks.
+        Each item is a (kind, payload) pair, tasks carrying (task_id, task_data).
         """
-        prioritised_dict = {}
-
-        for task_name, task_data in list_data['tasks'].items():
+        levels = {}
+        for task_id, task_data in self.user_data.get_tasks_by_priority(
+            self.list_name
+        ):
             if task_data['completed'] is True:
                 continue
 
             priority = int(task_data['priority'])
-            prioritised_dict.setdefault(priority, {})[task_name] = task_data
+            levels.setdefault(priority, []).append(('task', (task_id, task_data)))
 
-        self.hidden_widgets = []
+        items = []
+        for level, tasks in sorted(levels.items()):
+            items.append(('header', f'LEVEL {level}'))
+            items.extend(tasks)
 
-        loading_label = customtkinter.CTkLabel(
-            self.tasks_frame, text='',
-            width=100, height=100,
-            bg_color="transparent", fg_color="transparent",
-            image=self.LOADING_ICON
-        )
-        loading_label.place(relx=0.5, rely=0.5, anchor=customtkinter.CENTER)
-        pywinstyles.set_opacity(loading_label, color="#383736")
+        completed_tasks = self.get_completed_tasks()
+        if completed_tasks:
+            items.append(('header', 'COMPLETED'))
+            items.extend(('task', task) for task in completed_tasks.items())
+        return items
+
+    def load_saved_tasks(self, list_data, keep_position: bool = False,
+                         changed: tuple = None):
+        """
+        Loads and displays all saved tasks from the list data. Only the
+        rows in view are shown, by rows the task view already holds. If the
+        view already holds this list, only the changed task is updated.
+        Otherwise the first screenful is shown straight away while the rest
+        stream in, with a loading animation if that takes a while.
+        """
+        self.place_task_view()
+        if changed and self.list.task_view_owner is self:
+            self.apply_task_change(*changed)
+            return
 
-        loading = Loading(loading_label)
-        loading.daemon = True
-        loading.start()
+        main_frame = self.list.main_frame
+        tasks_frame = self.tasks_frame
+        loading = []
 
-        for level, data in sorted(prioritised_dict.items()):
-            if not data:
-                continue
+        def show_loading():
+            if not tasks_frame.winfo_exists():
+                return
 
-            header = customtkinter.CTkLabel(
-                self.tasks_container, width=400, height=20,
-                text=f'LEVEL {level}',
-                font=self.main.get_font(size=15, bold=True)
+            # The label is above the task view, so cannot be in the tasks frame
+            loading_label = customtkinter.CTkLabel(
+                main_frame, text='',
+                width=100, height=100,
+                bg_color="transparent", fg_color="transparent"
             )
-            header.pack()
-
-            separator = customtkinter.CTkFrame(
-                self.tasks_container, width=400, height=2,
-                fg_color="white"
+            loading_label.place(
+                in_=tasks_frame, relx=0.5, rely=0.5, anchor=customtkinter.CENTER
             )
-            separator.pack(pady=2)
+            loading_label.lift()
+            pywinstyles.set_opacity(loading_label, color="#383736")
 
-            for task_name, task_data in data.items():
-                self.create_task_template(task_data)
-
-        self.load_completed_tasks()
-
-        def load_widgets():
-            self.tasks_container.place(
-                relx=0.5, 
-                rely=0.5, 
-                anchor=customtkinter.CENTER
-            )
+            animation = Loading(loading_label)
+            animation.start()
+            loading.append(animation)
 
-            for widget in self.hidden_widgets:
-                if isinstance(widget, list):
-                    widget[0].pack(pady=widget[1])
-                else:
-                    widget.pack()
+        loading_job = main_frame.after(constants.App['LoadingDelay'], show_loading)
 
-            loading.end_loading()
+        def loaded():
+            main_frame.after_cancel(loading_job)
+            for animation in loading:
+                animation.end_loading()
 
-        threading.Timer(0.1 * len(list_data['tasks']), load_widgets).start()
+        items = self.get_task_items()
+        self.index_task_items(items)
+        self.tasks_container.set_items(items, keep_position, done=loaded)
+        self.list.task_view_owner = self
 
-    def load_completed_tasks(self):
+    def place_task_view(self):
         """
-        Loads and displays all completed tasks from the list data.
+        Places the task view over the tasks frame.
         """
-        completed_tasks = self.get_completed_tasks()
-
-        if not completed_tasks:
-            return
-
-        header = customtkinter.CTkLabel(
-            self.tasks_container, width=400, height=20,
-            text='COMPLETED', 
-            font=self.main.get_font(size=15, bold=True)
-        )
-        header.pack()
-
-        separator = customtkinter.CTkFrame(
-            self.tasks_container, width=400, height=2,
-            fg_color="white"
+        self.tasks_container.place(
+            in_=self.tasks_frame,
+            relx=0.5, 
+            rely=0.5, 
+            anchor=customtkinter.CENTER
         )
-        separator.pack(pady=2)
+        self.tasks_container.lift()
 
-        for task_data in completed_tasks.values():
-            self.create_task_template(task_data)
-        
-    def reload_tasks_frame(self, current_displaying_frame):
+    def reload_tasks_frame(self, current_displaying_frame, changed: tuple = None):
         """
-        Reloads the tasks frame, usually after modifying a task.
+        Reloads the tasks frame, usually after modifying a task. The
+        scroll position of the task view is kept, and only the modified
+        (task_id, task_data) is updated in it if given.
         """
+        self.list.hide_task_view()
         current_displaying_frame.destroy()
-        self.load_tasks_frame()
+        self.load_tasks_frame(keep_position=True, changed=changed)
         
     def display_task_status(
         self,
@@ -754,55 +799,203 @@ class Task(customtkinter.CTkFrame):
         list_data = data['lists'][self.list_name]
         has_data = bool(unique_id)
 
-        if not unique_id:
-            unique_id = util.generate_unique_id()
-            timer = Timer(
-                date=self.task_date.cget('text'),
-                time=self.time.get(),
-                name=task_name,
-                fn=self.main.task_due_notification
+        existing = self.user_data.find_task(self.list_name, task_name)
+        if existing and existing[0] != unique_id:
+            self.display_task_status(
+                "App_InvalidName",
+                type="task",
+                msg=task_name,
+                rely=0.8
             )
-            timer.start()
-            due_date_timers[unique_id] = timer
+            return
 
-            if any(
-                sub_dic.get('name').lower() == task_name.lower()
-                for sub_dic in list_data['tasks'].values()
-            ):
-                self.display_task_status(
-                    "App_InvalidName",
-                    type="task",
-                    msg=task_name,
-                    rely=0.8
-                )
-                return
-        else:
-            timer = due_date_timers[unique_id]
-            if not timer:
-                return
-            
-            due_date = self.task_date.cget('text')
-            due_time = self.time.get()
-            timer.update_due_date(due_date, due_time)
+        # The due date is parsed once here and stored as a timestamp
+        due = util.due_timestamp({
+            'date': self.task_date.cget('text'),
+            'time': self.time.get()
+        })
 
-        completed_state = (
-            has_data and list_data['tasks'][unique_id]['completed']
+        repeat = self.task_repeat.get()
+        preset = (
+            self.task_custom_preset if repeat == recurrence.CUSTOM
+            else recurrence.PRESETS[repeat]
         )
+        rule = None
+        if preset:
+            interval = self.task_repeat_interval.get().strip()
+            if not interval.isdigit() or int(interval) < 1:
+                self.display_task_status("App_InvalidRepeat", rely=0.8)
+                return
+            rule = recurrence.make_rule(preset[0], due, int(interval), preset[1])
+
+        if not unique_id:
+            unique_id = util.generate_unique_id()
 
-        list_data['tasks'][unique_id] = {
-            'completed': completed_state or False,
+        previous = list_data['tasks'][unique_id] if has_data else {}
+        task_data = {
+            'completed': previous.get('completed', False),
             'name': task_name,
             'description': task_description,
             'priority': task_priority,
-            'due_date': {
-                'date': self.task_date.cget('text'),
-                'time': self.time.get()
-            },
             'date_created': datetime.now()
         }
+        if rule:
+            # Only the current and next occurrences are stored
+            task_data['recurrence'] = rule
+            for key in ('completions', 'last_completed'):
+                if key in previous:
+                    task_data[key] = previous[key]
+
+        task_data = recurrence.schedule(task_data, due)
+        self.user_data.set_task(self.list_name, unique_id, task_data)
+        self.reload_tasks_frame(self.modify_task_frame, (unique_id, task_data))
+
+class SectionHeader(customtkinter.CTkFrame):
+    """
+    A reusable header row of the task view, such as a priority level.
+    """
+
+    def __init__(self, master, main):
+        """
+        Initialises the header with its label and separator.
+        """
+        super().__init__(master=master, height=24, fg_color="transparent")
+        self.pack_propagate(False)
+
+        self.label = customtkinter.CTkLabel(
+            self, width=400, height=20, text="",
+            font=main.get_font(size=15, bold=True)
+        )
+        self.label.pack()
+
+        customtkinter.CTkFrame(
+            self, width=400, height=2,
+            fg_color="white"
+        ).pack(pady=2)
+
+    def show(self, text: str):
+        """
+        Shows the header text.
+        """
+        self.label.configure(text=text)
+
+
+class TaskRow(customtkinter.CTkFrame):
+    """
+    A reusable row of the task view, showing whichever task it is given.
+    Its buttons act on the task it currently shows.
+    """
+
+    def __init__(self, master, main):
+        """
+        Initialises the row widgets without a task.
+        """
+        super().__init__(
+            master=master,
+            width=400,
+            height=100,
+            corner_radius=15,
+            border_color="gray",
+            border_width=2
+        )
+        self.pack_propagate(False)
+        self.view = None
+        self.task_name = None
+        self.completed_check = customtkinter.IntVar(value=0)
+
+        self.name_label = customtkinter.CTkLabel(
+            self,
+            text="",
+            font=main.get_font(family="Roboto", size=18, bold=True)
+        )
+        self.name_label.place(relx=0.05, rely=0.2, anchor="w")
+
+        self.description_label = customtkinter.CTkLabel(
+            self,
+            text="",
+            font=main.get_font(family="Roboto", size=14),
+            wraplength=280,
+            justify=customtkinter.LEFT
+        )
+        self.description_label.place(relx=0.05, rely=0.45, anchor="w")
+
+        self.due_label = customtkinter.CTkLabel(
+            self,
+            text="",
+            font=main.get_font(family="Roboto", size=14, bold=True),
+            text_color="#D3D3D3"
+        )
+        self.due_label.place(relx=0.53, rely=0.19, anchor="center")
+
+        customtkinter.CTkButton(
+            self, 
+            text="EDIT", 
+            fg_color="#00BFFF",
+            hover_color="#1E90FF", 
+            text_color="white",
+            corner_radius=5, 
+            width=60, 
+            height=25,
+            command=self.edit_clicked
+        ).place(relx=0.75, rely=0.2, anchor="center")
+
+        customtkinter.CTkButton(
+            self, text="",
+            image=assets.get('trash', (18, 17), self._get_widget_scaling()),
+            fg_color="#FF5C5C", text_color="#CCCCCC", hover_color="#CC4949",
+            corner_radius=5,  width=15, height=20,
+            command=self.delete_clicked
+        ).place(relx=0.92, rely=0.2, anchor="center")
+
+        customtkinter.CTkCheckBox(
+            self, text="",
+            fg_color="gray", hover_color="green", corner_radius=5,
+            width=10, variable=self.completed_check,
+            command=self.completed_clicked
+        ).place(relx=0.88, rely=0.75, anchor="w")
+
+    def show(self, view, task_id: str, task_data: dict):
+        """
+        Shows a task of a task view in the row.
+        """
+        self.view = view
+        self.task_name = task_data['name']
+
+        task_state = (
+            len(STATE_COLOURS)-1 if task_data['completed']
+            else get_due_state(task_data['due'])
+        )
+        due_label = util.format_due_label(task_data['due'])
 
-        self.user_data.update(data)
-        self.reload_tasks_frame(self.modify_task_frame)
+        self.configure(fg_color=STATE_COLOURS[task_state])
+        self.name_label.configure(text=self.task_name)
+        self.description_label.configure(
+            text=util.split_string(task_data['description'], 25)
+        )
+        self.due_label.configure(
+            text=f'{due_label} \u21bb' if task_data.get('recurrence') else due_label
+        )
+        self.completed_check.set(int(bool(task_data['completed'])))
+
+    def edit_clicked(self):
+        """
+        Opens the task in the edit menu.
+        """
+        self.view.load_task_modify_menu(task_name=self.task_name)
+
+    def delete_clicked(self):
+        """
+        Deletes the task.
+        """
+        self.view.task_delete_activated(self.task_name)
+
+    def completed_clicked(self):
+        """
+        Saves the state of the completed checkbox.
+        """
+        self.view.task_completed_activated(
+            self.task_name, self.completed_check.get() == 1
+        )
 
 class List(customtkinter.CTkFrame):
     """
@@ -811,30 +1004,60 @@ class List(customtkinter.CTkFrame):
 
     def __init__(self, master, data: dict, main, username: str):
         """
-        Initialises the list frame and sets up timers for tasks based 
-        on due daes.
+        Initialises the list frame and arms the reminders of tasks due
+        soon, reporting any missed while the app was closed.
         """
         super().__init__(master=master)
         self.master = master
         self.user_data = data
         self.username = username
         self.main = main
+        self.due_index = main.session.due_index
+        self.search_index = main.session.search_index
+        self.search_job = None
+        self.task_view = None
+        self.task_view_owner = None
 
-        data = self.user_data.get()
-        for list_data in data['lists'].values():
-            for task_id, task_data in list_data['tasks'].items():
-                due_date = task_data['due_date']
-                timer = Timer(
-                    date=due_date['date'], 
-                    time=due_date['time'],
-                    name=task_data['name'], 
-                    fn=self.main.task_due_notification
-                )
-                timer.start()
-                due_date_timers[task_id] = timer
+        missed = main.session.start_reminders(self.main.task_due_notification)
+        if missed:
+            self.main.missed_reminders_notification(missed)
 
         self.load_list_menu()
 
+    def get_task_view(self) -> VirtualList:
+        """
+        Returns the view showing the tasks of a list. It is created once and
+        kept, hidden, across reloads and lists, so its row widgets are
+        reconfigured rather than created again.
+        """
+        if self.task_view is None or not self.task_view.winfo_exists():
+            self.task_view_owner = None
+            self.task_view = VirtualList(
+                self.main_frame,
+                create_row=self.create_task_row,
+                update_row=None,
+                heights=Task.ROW_HEIGHTS,
+                base_kind='task',
+                width=300,
+                height=350
+            )
+        return self.task_view
+
+    def hide_task_view(self):
+        """
+        Hides the task view, keeping its rows for the next list shown.
+        """
+        if self.task_view is not None and self.task_view.winfo_exists():
+            self.task_view.place_forget()
+
+    def create_task_row(self, kind: str, parent):
+        """
+        Creates a row widget of the task view for a kind of item.
+        """
+        if kind == 'header':
+            return SectionHeader(parent, self.main)
+        return TaskRow(parent, self.main)
+
     def load_list_menu(self):
         """
         Initialises and displays the main list menu frame.
@@ -892,19 +1115,55 @@ class List(customtkinter.CTkFrame):
                 weight="bold"
             ), 
             command=self.load_create_list_menu
-        ).place(relx=0.5, rely=0.9, anchor=customtkinter.CENTER)
+        ).place(relx=0.28, rely=0.9, anchor=customtkinter.CENTER)
+
+        customtkinter.CTkButton(
+            self.lists_frame,
+            text="AGENDA",
+            width=200,
+            height=35,
+            font=customtkinter.CTkFont(
+                family="Arial", 
+                size=15, 
+                weight="bold"
+            ), 
+            command=self.load_agenda_frame
+        ).place(relx=0.72, rely=0.9, anchor=customtkinter.CENTER)
 
         if data['lists']:
+            self.search_entry = customtkinter.CTkEntry(
+                self.lists_frame, 
+                placeholder_text="SEARCH TASKS", 
+                corner_radius=0,
+                width=400, 
+                height=28,
+                border_width=0, 
+                fg_color="#D9D9D9", 
+                placeholder_text_color="gray", 
+                text_color="black",
+                font=self.main.get_font(size=15)
+            )
+            self.search_entry.place(
+                relx=0.5, 
+                rely=0.07, 
+                anchor=customtkinter.CENTER
+            )
+            self.search_entry.bind(
+                "<FocusIn>", 
+                lambda event: self.search_index.prepare()
+            )
+            self.search_entry.bind("<KeyRelease>", self.search_changed)
+
             self.lists_container = customtkinter.CTkScrollableFrame(
                 self.lists_frame, 
                 width=400, 
-                height=290,
+                height=260,
                 scrollbar_button_color="#2d2c2c", 
                 fg_color="transparent"
             )
             self.lists_container.place(
                 relx=0.5, 
-                rely=0.45, 
+                rely=0.48, 
                 anchor=customtkinter.CENTER
             )
             self.load_saved_lists(data)
@@ -915,6 +1174,112 @@ class List(customtkinter.CTkFrame):
                 font=self.main.get_font()
             ).place(relx=0.5, rely=0.45, anchor=customtkinter.CENTER)
             
+    def search_changed(self, event=None):
+        """
+        Waits for typing in the search box to pause before searching.
+        """
+        if self.search_job:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(
+            constants.App['SearchDelay'], 
+            self.load_search_results
+        )
+
+    def load_search_results(self):
+        """
+        Replaces the saved lists with the tasks matching the search box,
+        grouped by list. An empty search shows the saved lists again.
+        """
+        self.search_job = None
+        if not self.lists_container.winfo_exists():
+            return
+
+        for widget in self.lists_container.winfo_children():
+            widget.destroy()
+
+        query = self.search_entry.get()
+        if not query.strip():
+            self.load_saved_lists(self.user_data.get())
+            return
+
+        results = self.search_index.search(query, constants.App['SearchLimit'])
+        if not results:
+            customtkinter.CTkLabel(
+                self.lists_container, 
+                text="No tasks found",
+                font=self.main.get_font()
+            ).pack(pady=20)
+            return
+
+        grouped = {}
+        for list_name, _, task_data in results:
+            grouped.setdefault(list_name, []).append(task_data)
+
+        lists = self.user_data.get()['lists']
+        for list_name, tasks in grouped.items():
+            list_header = customtkinter.CTkFrame(
+                self.lists_container, 
+                width=400, 
+                height=35, 
+                fg_color="#5c5b5a"
+            )
+            list_header.pack(pady=(8, 2))
+            list_header.pack_propagate(False)
+
+            customtkinter.CTkLabel(
+                list_header, 
+                text=lists[list_name]['name'],
+                font=self.main.get_font(family="Roboto", size=17, bold=True)
+            ).place(relx=0.02, rely=0.5, anchor="w")
+
+            def tasks_clicked(list_name=list_name):
+                Task(
+                    master=self.master,
+                    data=self.user_data, 
+                    main=self.main,
+                    list=self, 
+                    list_name=list_name
+                ).load_tasks_frame()
+
+            customtkinter.CTkButton(
+                list_header, 
+                text="TASKS", 
+                width=70, 
+                height=20, 
+                corner_radius=0,
+                fg_color="#ECB528", 
+                hover_color="#C8940F", 
+                text_color="white", 
+                command=tasks_clicked,
+                font=self.main.get_font(size=12, bold=True)
+            ).place(relx=0.97, rely=0.5, anchor="e")
+
+            for task_data in sorted(tasks, key=lambda task: task['name'].casefold()):
+                task_item = customtkinter.CTkFrame(
+                    self.lists_container, 
+                    width=380, 
+                    height=30, 
+                    fg_color=STATE_COLOURS[
+                        task_data['completed'] and len(STATE_COLOURS)-1
+                        or get_due_state(task_data['due'])
+                    ]
+                )
+                task_item.pack(pady=2)
+                task_item.pack_propagate(False)
+
+                customtkinter.CTkLabel(
+                    task_item, 
+                    text=task_data['name'],
+                    font=self.main.get_font(family="Roboto", size=15)
+                ).place(relx=0.03, rely=0.5, anchor="w")
+
+                customtkinter.CTkLabel(
+                    task_item, 
+                    text=util.format_due_label(task_data['due']),
+                    font=self.main.get_font(family="Roboto", size=13, bold=True),
+                    text_color="#D3D3D3"
+                ).place(relx=0.97, rely=0.5, anchor="e")
+
     def reload_list_frame(self, current_displaying_frame):
         """
         Reloads the current list frame.
@@ -992,6 +1357,111 @@ class List(customtkinter.CTkFrame):
             command=complete_clicked
         ).place(relx=0.5, rely=0.9, anchor=customtkinter.CENTER)
 
+    def load_agenda_frame(self):
+        """
+        Displays the unfinished tasks due next across every list,
+        starting with the overdue ones.
+        """
+        self.lists_frame.destroy()
+        self.welcome_label.destroy()
+
+        self.main.adjust_window_geometry()
+
+        self.agenda_frame = customtkinter.CTkFrame(
+            self.main_frame, 
+            width=500, 
+            height=400, 
+            fg_color="#383736"
+        )
+        self.agenda_frame.place(
+            relx=0.5, 
+            rely=0.5, 
+            anchor=customtkinter.CENTER
+        )
+        self.agenda_frame.pack_propagate(False)
+
+        customtkinter.CTkLabel(
+            self.agenda_frame, 
+            text="AGENDA",
+            font=self.main.get_font(size=25)
+        ).pack(pady=10)
+
+        def close_clicked():
+            self.reload_list_frame(self.agenda_frame)
+
+        customtkinter.CTkButton(
+            self.agenda_frame,
+            text="X", 
+            width=35, 
+            corner_radius=0,
+            font=self.main.get_font(size=22, bold=True),
+            fg_color="red", 
+            hover_color="dark red",
+            command=close_clicked
+        ).place(relx=0.99, rely=0.05, anchor='e')
+
+        self.main.seperator(self.agenda_frame)
+
+        upcoming = self.due_index.upcoming(constants.App['AgendaLength'])
+        if not upcoming:
+            customtkinter.CTkLabel(
+                self.agenda_frame, 
+                text="You have no unfinished tasks",
+                font=self.main.get_font()
+            ).place(relx=0.5, rely=0.5, anchor=customtkinter.CENTER)
+            return
+
+        overdue_count = self.due_index.count_overdue()
+        customtkinter.CTkLabel(
+            self.agenda_frame, 
+            text=(
+                overdue_count > 0
+                and f'{overdue_count} overdue tasks'
+                or 'No overdue tasks'
+            ),
+            font=self.main.get_font(size=16)
+        ).place(relx=0.5, rely=0.95, anchor=customtkinter.CENTER)
+
+        agenda_container = customtkinter.CTkScrollableFrame(
+            self.agenda_frame, 
+            width=400, 
+            height=270,
+            scrollbar_button_color="#2d2c2c", 
+            fg_color="transparent"
+        )
+        agenda_container.place(relx=0.5, rely=0.55, anchor=customtkinter.CENTER)
+
+        lists = self.user_data.get()['lists']
+        for due, list_name, _, task_data in upcoming:
+            agenda_item = customtkinter.CTkFrame(
+                agenda_container, 
+                width=400, 
+                height=60, 
+                fg_color=STATE_COLOURS[get_due_state(due)],
+                corner_radius=15
+            )
+            agenda_item.pack(pady=5)
+            agenda_item.pack_propagate(False)
+
+            customtkinter.CTkLabel(
+                agenda_item, 
+                text=task_data['name'],
+                font=self.main.get_font(family="Roboto", size=17, bold=True)
+            ).place(relx=0.05, rely=0.3, anchor="w")
+
+            customtkinter.CTkLabel(
+                agenda_item, 
+                text=lists[list_name]['name'],
+                font=self.main.get_font(family="Roboto", size=14)
+            ).place(relx=0.05, rely=0.72, anchor="w")
+
+            customtkinter.CTkLabel(
+                agenda_item, 
+                text=util.due_datetime(due).strftime("%b %d %I:%M %p"),
+                font=self.main.get_font(family="Roboto", size=14, bold=True),
+                text_color="#D3D3D3"
+            ).place(relx=0.95, rely=0.5, anchor="e")
+
     def display_list_status(self, 
         status_error: str, 
         msg: str = None,
@@ -1035,35 +1505,19 @@ class List(customtkinter.CTkFrame):
             )
             return
         
-        data['lists'][list_name.lower()] = {
+        self.user_data.set_list(list_name.lower(), {
             'name': list_name,
             'tasks': {},
             'date_created': datetime.now()
-        }
-        self.user_data.update(data)
+        })
         self.reload_list_frame(self.create_list_frame)
 
-    def get_unfinished_tasks_count(self, tasks) -> int:
-        """
-        Returns the count of unfinished tasks from the given task dictionary.
-        """
-        return Counter(
-            task_data['completed'] for task_data in tasks.values()
-        )[False]
-    
     def load_saved_lists(self, data):
         """
-        Loads and displays saved lists from the user data
+        Loads and displays saved lists from the user data. Each list is drawn
+        from its summary alone, so no list's tasks are read.
         """
         for list_name, list_data in data['lists'].items():
-            task = Task(
-                master=self.master,
-                data=self.user_data, 
-                main=self.main,
-                list=self, 
-                list_name=list_name
-            )
-
             list_item = customtkinter.CTkFrame(
                 self.lists_container, 
                 width=400, 
@@ -1079,15 +1533,13 @@ class List(customtkinter.CTkFrame):
                 font=self.main.get_font(family="Roboto", size=17, bold=True)
             ).place(relx=0.02, rely=0.15, anchor="w")
 
-            unfinished_tasks_count = (
-                list_data['tasks'] 
-                and self.get_unfinished_tasks_count(list_data['tasks'])
-            )
+            summary = self.user_data.get_list_summary(list_name)
+            unfinished_tasks_count = summary['unfinished']
 
             customtkinter.CTkLabel(
                 list_item, 
                 text=(
-                    isinstance(unfinished_tasks_count, dict) 
+                    summary['total'] == 0
                     and "You have no tasks" 
                     or (unfinished_tasks_count > 0 
                         and f'{unfinished_tasks_count} unfinished tasks' 
@@ -1097,6 +1549,31 @@ class List(customtkinter.CTkFrame):
                 font=self.main.get_font(size=16)
             ).place(relx=0.02, rely=0.85, anchor="w")
 
+            if summary['overdue'] > 0:
+                customtkinter.CTkLabel(
+                    list_item, 
+                    text=f'{summary["overdue"]} overdue', 
+                    font=self.main.get_font(size=14, bold=True),
+                    text_color="#FF5C5C"
+                ).place(relx=0.02, rely=0.5, anchor="w")
+
+            if summary['next_due'] is not None:
+                customtkinter.CTkLabel(
+                    list_item, 
+                    text=f'Next due {util.format_due_label(summary["next_due"])}', 
+                    font=self.main.get_font(size=14),
+                    text_color="#D3D3D3"
+                ).place(relx=0.97, rely=0.85, anchor="e")
+
+            def tasks_clicked(list_name=list_name):
+                Task(
+                    master=self.master,
+                    data=self.user_data, 
+                    main=self.main,
+                    list=self, 
+                    list_name=list_name
+                ).load_tasks_frame()
+
             customtkinter.CTkButton(
                 list_item, 
                 text="TASKS", 
@@ -1106,11 +1583,11 @@ class List(customtkinter.CTkFrame):
                 fg_color="#ECB528", 
                 hover_color="#C8940F", 
                 text_color="white", 
-                command=task.load_tasks_frame,
+                command=tasks_clicked,
                 font=self.main.get_font(size=12, bold=True)
             ).place(relx=0.78, rely=0.15,anchor="e")
 
-            def delete_clicked():
+            def delete_clicked(list_name=list_name):
                 self.list_delete_activated(list_name)
 
             customtkinter.CTkButton( 
@@ -1128,12 +1605,10 @@ class List(customtkinter.CTkFrame):
 
     def list_delete_activated(self, list_name: str):
         """
-        Handles the deletion of a list.
+        Handles the deletion of a list. Its reminders and index entries are
+        dropped as the deletion is reported.
         """
-        data = self.user_data.get()
-        data['lists'].pop(list_name, None)
-
-        self.user_data.update(data)
+        self.user_data.delete_list(list_name)
         self.reload_list_frame(self.lists_frame)
 
 class Notification(customtkinter.CTk):
@@ -1221,7 +1696,8 @@ class App:
         # Runtime events
         self.notification_ready = threading.Event()
 
-        self.user_data = Data(username)
+        self.session = Session(username)
+        self.user_data = self.session.user_data
         self.load_fonts()
         self.list = List(
             master=self.main.root, 
@@ -1231,8 +1707,11 @@ class App:
         )
         
         self.notification = Notification(self.main.root)
+        self.session.add_cleanup(self.notification.destroy)
         self.notification_ready.set()
 
+        self.main.root.protocol("WM_DELETE_WINDOW", self.close_window)
+
         customtkinter.CTkButton(
             self.main.root,
             text="FAQs",
@@ -1398,8 +1877,27 @@ class App:
         """
         # Importing login when logout is called to prevent circular imports
         from login import Login
-        self.main.remove_current_state()
-        Login(self.main)
+
+        # Stops every timer and thread of the user and writes any
+        # changes still queued by the background writer. The login screen
+        # is shown even if that fails, so the user is never left stuck
+        try:
+            self.session.close()
+        finally:
+            self.main.root.protocol("WM_DELETE_WINDOW", self.main.root.destroy)
+
+            self.main.remove_current_state()
+            Login(self.main)
+
+    def close_window(self):
+        """
+        Saves any pending changes before closing the main window. The
+        window is closed even if saving fails.
+        """
+        try:
+            self.session.close()
+        finally:
+            self.main.root.destroy()
         
     def task_due_notification(self, task_name: str):
         """
@@ -1412,7 +1910,23 @@ class App:
             self.notification_ready.wait()
             self.notification.show_notification(f'"{task_name}" is due')
         
-        threading.Thread(target=notification_async, daemon=True).start()
+        self.session.spawn(notification_async)
+
+    def missed_reminders_notification(self, missed: list):
+        """
+        Displays one notification for every reminder which became due
+        while the app was closed.
+        """
+        if len(missed) == 1:
+            message = f'"{missed[0][2]}" became due while you were away'
+        else:
+            message = f'{len(missed)} tasks became due while you were away'
+
+        def notification_async():
+            self.notification_ready.wait()
+            self.notification.show_notification(message)
+
+        self.session.spawn(notification_async)
 
     def adjust_window_geometry(self, extended: bool = False):
         """
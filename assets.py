@@ -0,0 +1,99 @@
+"""
+This module provides a registry of the images the app shows. Each image is
+decoded the first time it is needed and kept once for the whole process, and
+a "CTkImage" is made for each size and widget scaling it is shown at, from a
+copy shrunk to that size. Nothing is decoded when the app starts, and the
+images can be decoded in the background while the user logs in.
+
+Imports:
+- threading: For preloading in the background and guarding the caches.
+- customtkinter: For the images shown by widgets.
+- Image (from PIL): For decoding and resizing the images.
+
+Attributes:
+- ASSETS (dict): The path of each image, by name.
+- PRELOAD (tuple): The (name, size) of the images shown as soon as a list
+    is opened.
+
+Functions:
+- get_image(name: str): Returns the decoded image, decoding it the first time.
+- get(name: str, size: tuple, scaling: float): Returns the image for a
+    widget, made the first time it is shown at that size and scaling.
+- preload(scaling: float): Decodes every image and makes the images shown
+    first on a background thread.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import threading
+import customtkinter
+
+from PIL import Image
+
+
+ASSETS = {
+    'trash': 'images/trash.png',
+    'calendar': 'images/calendar.png',
+    'loading': 'images/loading.png',
+}
+
+PRELOAD = (
+    ('trash', (18, 17)),
+    ('calendar', (20, 20)),
+)
+
+_images = {}
+_ctk_images = {}
+_lock = threading.Lock()
+
+
+def get_image(name: str) -> Image.Image:
+    """
+    Returns the decoded image of an asset, decoding it the first time.
+    """
+    with _lock:
+        if name not in _images:
+            with Image.open(ASSETS[name]) as source:
+                _images[name] = source.convert('RGBA')
+        return _images[name]
+
+
+def get(name: str, size: tuple = (20, 20),
+        scaling: float = 1) -> customtkinter.CTkImage:
+    """
+    Returns the image of an asset for widgets showing it at a size and
+    scaling. The image is shrunk to the size on screen once, so widgets
+    never resize the full image and share a single copy of it.
+    """
+    key = (name, tuple(size), scaling)
+    with _lock:
+        image = _ctk_images.get(key)
+    if image is not None:
+        return image
+
+    pixels = (round(size[0] * scaling), round(size[1] * scaling))
+    resized = get_image(name).resize(pixels, Image.LANCZOS)
+    image = customtkinter.CTkImage(
+        light_image=resized, dark_image=resized, size=size
+    )
+    with _lock:
+        return _ctk_images.setdefault(key, image)
+
+
+def preload(scaling: float = 1) -> threading.Thread:
+    """
+    Decodes every image and makes the images shown first on a daemon
+    thread, so opening a list does not wait for them. Returns the thread.
+    """
+    def load():
+        for name in ASSETS:
+            get_image(name)
+        for name, size in PRELOAD:
+            get(name, size, scaling)
+
+    thread = threading.Thread(target=load, name='assets-preload', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,344 @@
+"""
+This module provides the "BackupManager" class, which keeps rotating
+compressed snapshots of a user's data. Each list is stored once as a
+compressed object named by the hash of its contents, and a snapshot only
+records which objects it is made of, so consecutive snapshots share every
+list that did not change and backups grow with the changes made, not with
+the size of the data.
+
+Backups are taken on a background thread from the data as it is stored on
+disk, at most once per interval, so the UI never waits on compression.
+
+Run as a script to list or restore a user's snapshots:
+    python backup.py list <username>
+    python backup.py restore <username> <snapshot>
+
+Imports:
+- hashlib: For naming objects by the hash of their contents.
+- lzma: For the lzma compression.
+- os: For file and directory operations.
+- pickle: For serializing lists and snapshots.
+- sys: For the command line arguments.
+- threading: For taking backups in the background.
+- time: For the interval between backups.
+- zlib: For the zlib compression.
+- constants: Contains the backup settings.
+- model: For loading every list before a backup.
+- datetime: For naming and dating snapshots.
+- write_atomic: For writing backup files without leaving them half written.
+- FileLock: For keeping instances from pruning each other's snapshots.
+
+Classes:
+- BackupManager: Takes, rotates, lists and restores a user's snapshots.
+
+Attributes:
+- BACKUP_FOLDER (str): Directory holding every user's backups.
+- COMPRESSIONS (dict): Compression functions by name, with their marker.
+
+Methods:
+- __init__(self, username: str, open_storage, file_lock): Initializes the
+    backups of a user, read through a fresh storage engine.
+- request(self): Starts a backup in the background if the interval passed.
+- backup(self): Takes a snapshot of the stored data and rotates old ones.
+- snapshots(self): Returns the names of every snapshot, oldest first.
+- describe(self, name: str): Returns the details of a snapshot.
+- load(self, name: str): Rebuilds the user data held by a snapshot.
+- restore(self, name: str, user_data): Replaces the user's data with a
+    snapshot, backing up the current data first.
+- close(self): Waits for a running backup to finish.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import hashlib
+import lzma
+import os
+import pickle
+import sys
+import threading
+import time
+import zlib
+import constants
+import model
+
+from datetime import datetime
+
+from locking import FileLock
+from storage import write_atomic
+
+
+BACKUP_FOLDER = os.path.join('Userdata', 'Backups')
+
+COMPRESSIONS = {
+    'zlib': (b'Z', zlib.compress, zlib.decompress),
+    'lzma': (b'X', lzma.compress, lzma.decompress),
+}
+
+
+def _compress(payload: bytes, name: str) -> bytes:
+    """
+    Compresses a payload, prefixed with the marker of its compression.
+    """
+    marker, compress, _ = COMPRESSIONS[name]
+    return marker + compress(payload)
+
+
+def _decompress(payload: bytes) -> bytes:
+    """
+    Decompresses a payload written with any of the compressions.
+    """
+    for marker, _, decompress in COMPRESSIONS.values():
+        if payload[:1] == marker:
+            return decompress(payload[1:])
+    raise ValueError('Unknown backup compression')
+
+
+class BackupManager:
+    """
+    Takes rotating snapshots of a user's data. A snapshot is a small
+    manifest naming the content hash of each list, and the lists themselves
+    are shared between every snapshot that contains them unchanged.
+    """
+
+    # Constants
+    SNAPSHOT_SUFFIX = '.snap'
+
+    def __init__(self, username: str, open_storage=None, file_lock=None):
+        """
+        Initializes the backups of a user. Backups read the stored data
+        through a fresh engine from open_storage under the exclusive file
+        lock, so they never touch the data the app is working with.
+        """
+        self.username = username
+        self.folder = os.path.join(BACKUP_FOLDER, username)
+        self.objects_folder = os.path.join(self.folder, 'objects')
+        self.open_storage = open_storage
+        self.file_lock = file_lock
+        self.interval = constants.Backup['Interval']
+        self.keep = constants.Backup['Keep']
+        self.compression = constants.Backup['Compression']
+
+        self._lock = threading.Lock()
+        self.backup_lock = FileLock(os.path.join(self.folder, 'backups.lock'))
+        self._thread = None
+        self._last_backup = None
+
+    def _get_snapshot_path(self, name: str) -> str:
+        """
+        Constructs the file path of a snapshot.
+        """
+        return os.path.join(self.folder, name + self.SNAPSHOT_SUFFIX)
+
+    def _get_object_path(self, digest: str) -> str:
+        """
+        Constructs the file path of a stored list.
+        """
+        return os.path.join(self.objects_folder, digest)
+
+    def _get_last_backup(self) -> float:
+        """
+        Returns when the newest snapshot was taken, or 0 if there is none.
+        """
+        if self._last_backup is None:
+            names = self.snapshots()
+            self._last_backup = (
+                os.path.getmtime(self._get_snapshot_path(names[-1]))
+                if names else 0
+            )
+        return self._last_backup
+
+    def request(self):
+        """
+        Starts a backup on a background thread if the interval has passed
+        since the last one and none is running. Never blocks on the backup.
+        """
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            if time.time() - self._get_last_backup() < self.interval:
+                return
+            self._last_backup = time.time()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """
+        Takes a backup, reporting rather than raising a failure.
+        """
+        try:
+            self.backup()
+        except Exception as error:
+            print(f'Could not back up {self.username} data: {error}')
+
+    def _read(self) -> dict:
+        """
+        Reads the stored data with every list's tasks loaded. Opening and
+        reading an engine may write, such as creating the database tables,
+        migrating a legacy file or truncating a torn journal record, so the
+        lock is held exclusively throughout.
+        """
+        with self.file_lock.exclusive():
+            storage = self.open_storage()
+            try:
+                data = storage.read()
+                if data is not None:
+                    model.load_all(data)
+                return data
+            finally:
+                storage.close()
+
+    def backup(self) -> str:
+        """
+        Takes a snapshot of the stored data, storing only the lists no
+        earlier snapshot holds, and removes snapshots past the limit.
+        Returns the name of the snapshot, or None if there is no data.
+        """
+        data = self._read()
+        if data is None:
+            return None
+
+        os.makedirs(self.objects_folder, exist_ok=True)
+
+        # Backups of every instance write one at a time, so rotating never
+        # removes the objects of a snapshot another one is still writing
+        with self.backup_lock.exclusive():
+            return self._write_snapshot(data)
+
+    def _write_snapshot(self, data: dict) -> str:
+        """
+        Stores the lists no earlier snapshot holds, writes the snapshot
+        and rotates old ones. The backup lock must be held.
+        """
+
+        lists = {}
+        for list_key, list_data in data['lists'].items():
+            payload = pickle.dumps(dict(list_data), pickle.HIGHEST_PROTOCOL)
+            digest = hashlib.sha256(payload).hexdigest()
+            path = self._get_object_path(digest)
+            if not os.path.exists(path):
+                write_atomic(path, _compress(payload, self.compression))
+            lists[list_key] = digest
+
+        created = datetime.now()
+        name = created.strftime('%Y%m%d-%H%M%S-%f')
+        snapshot = {
+            'created': created,
+            'meta': {key: value for key, value in data.items() if key != 'lists'},
+            'lists': lists
+        }
+        write_atomic(
+            self._get_snapshot_path(name),
+            _compress(pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL),
+                      self.compression)
+        )
+        self._rotate()
+        return name
+
+    def _read_snapshot(self, name: str) -> dict:
+        """
+        Reads the manifest of a snapshot.
+        """
+        with open(self._get_snapshot_path(name), "rb") as file:
+            return pickle.loads(_decompress(file.read()))
+
+    def _rotate(self):
+        """
+        Removes the oldest snapshots past the limit, then every stored list
+        which no remaining snapshot refers to. The snapshot just taken is
+        always kept, even with a limit of 0.
+        """
+        names = self.snapshots()
+        stale = max(len(names) - max(self.keep, 1), 0)
+        for name in names[:stale]:
+            os.remove(self._get_snapshot_path(name))
+
+        referenced = set()
+        for name in names[stale:]:
+            referenced.update(self._read_snapshot(name)['lists'].values())
+
+        for digest in os.listdir(self.objects_folder):
+            if digest not in referenced:
+                os.remove(self._get_object_path(digest))
+
+    def snapshots(self) -> list:
+        """
+        Returns the names of every snapshot, oldest first.
+        """
+        if not os.path.exists(self.folder):
+            return []
+        return sorted(
+            name[:-len(self.SNAPSHOT_SUFFIX)] for name in os.listdir(self.folder)
+            if name.endswith(self.SNAPSHOT_SUFFIX)
+        )
+
+    def describe(self, name: str) -> dict:
+        """
+        Returns when a snapshot was taken and the names of its lists.
+        """
+        snapshot = self._read_snapshot(name)
+        return {'created': snapshot['created'], 'lists': list(snapshot['lists'])}
+
+    def load(self, name: str) -> dict:
+        """
+        Rebuilds the user data held by a snapshot.
+        """
+        with self.backup_lock.shared():
+            snapshot = self._read_snapshot(name)
+            data = dict(snapshot['meta'], lists={})
+            for list_key, digest in snapshot['lists'].items():
+                with open(self._get_object_path(digest), "rb") as file:
+                    data['lists'][list_key] = pickle.loads(
+                        _decompress(file.read())
+                    )
+        return data
+
+    def restore(self, name: str, user_data):
+        """
+        Replaces the user's data with a snapshot. The current data is backed
+        up first so the restore can be undone, after the snapshot is read,
+        as that backup may rotate the snapshot being restored away.
+        """
+        data = self.load(name)
+        user_data.backups.backup()
+        user_data.save(data)
+
+    def close(self):
+        """
+        Waits for a running backup to finish.
+        """
+        if self._thread and self._thread.is_alive():
+            self._thread.join()
+
+
+if __name__ == "__main__":
+    # Importing data here to prevent circular imports
+    from data import Data
+
+    if len(sys.argv) < 3 or sys.argv[1] not in ('list', 'restore'):
+        print('Usage: python backup.py list <username>\n'
+              '       python backup.py restore <username> <snapshot>')
+        sys.exit(1)
+
+    command, username = sys.argv[1], sys.argv[2]
+    backups = BackupManager(username)
+
+    if command == 'list':
+        for name in backups.snapshots():
+            details = backups.describe(name)
+            print(f'{name}  {details["created"]:%d/%m/%Y %I:%M %p}  '
+                  f'{len(details["lists"])} list(s)')
+    else:
+        if len(sys.argv) < 4 or sys.argv[3] not in backups.snapshots():
+            print('No snapshot with that name, see: python backup.py list '
+                  f'{username}')
+            sys.exit(1)
+
+        user_data = Data(username, write_behind=False)
+        try:
+            backups.restore(sys.argv[3], user_data)
+        finally:
+            user_data.close()
+        print(f'Restored {username} data from {sys.argv[3]}')
@@ -0,0 +1,459 @@
+"""
+This module provides the serialization codecs used for user data files. Every
+file is written with a small versioned header naming the codec which wrote it,
+so files written by different codecs can be read back without configuration.
+Files without a header are read as plain pickle.
+
+Run as a script to benchmark every codec against a user's data:
+    python codec.py <username> [rounds]
+
+Imports:
+- json: For the JSON codec.
+- pickle: For the pickle codec and record extras.
+- struct: For the file header and the binary codec.
+- sys: For the benchmark command line arguments.
+- time: For timing the benchmark.
+- datetime: For encoding dates.
+
+Classes:
+- PickleCodec: Pickle using the highest protocol.
+- JsonCodec: JSON with native datetime handling.
+- BinaryCodec: Compact binary layout for list and task records.
+
+Attributes:
+- MAGIC (bytes): Marker at the start of every file with a header.
+- FORMAT_VERSION (int): Version of the header layout.
+- HEADER (struct.Struct): Header holding the marker, version and codec id.
+- CODECS (dict): Registered codecs by name.
+
+Functions:
+- get_codec(name: str): Returns the codec registered under a name.
+- encode(obj, name: str): Encodes an object with a header for the named codec.
+- decode(payload: bytes): Decodes a payload written by any codec.
+- benchmark(data: dict, rounds: int): Measures every codec against the data.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import json
+import pickle
+import struct
+import sys
+import time
+
+from datetime import datetime, timedelta
+
+
+MAGIC = b'TDLD'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBB')
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+DUE_DATE_FORMAT = "%d/%m/%Y %I:%M %p"
+
+
+class PickleCodec:
+    """
+    Encodes data with pickle using the highest available protocol.
+    """
+
+    # Constants
+    CODEC_ID = 1
+
+    def encode(self, obj) -> bytes:
+        """
+        Encodes an object as pickle bytes.
+        """
+        return pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, payload: bytes):
+        """
+        Decodes pickle bytes.
+        """
+        return pickle.loads(payload)
+
+
+class JsonCodec:
+    """
+    Encodes data as compact JSON. Datetimes are written as tagged
+    ISO 8601 strings and restored as datetime objects.
+    """
+
+    # Constants
+    CODEC_ID = 2
+    DATETIME_TAG = '$datetime'
+
+    def _default(self, value):
+        """
+        Encodes values JSON does not support natively.
+        """
+        if isinstance(value, datetime):
+            return {self.DATETIME_TAG: value.isoformat()}
+        raise TypeError(f'Cannot encode {type(value).__name__} as JSON')
+
+    def _object_hook(self, obj: dict):
+        """
+        Restores tagged datetimes while decoding.
+        """
+        if len(obj) == 1 and self.DATETIME_TAG in obj:
+            return datetime.fromisoformat(obj[self.DATETIME_TAG])
+        return obj
+
+    def encode(self, obj) -> bytes:
+        """
+        Encodes an object as UTF-8 JSON.
+        """
+        return json.dumps(
+            obj,
+            default=self._default,
+            separators=(',', ':'),
+            ensure_ascii=False
+        ).encode('utf-8')
+
+    def decode(self, payload: bytes):
+        """
+        Decodes UTF-8 JSON.
+        """
+        return json.loads(payload, object_hook=self._object_hook)
+
+
+class BinaryCodec:
+    """
+    Encodes the user data with a compact binary layout. The fields every
+    list and task carries are packed with struct, while any other fields
+    are kept as a pickled extras blob so no data is ever dropped.
+
+    Task layout: flags, priority, name, description, due minutes, due
+    timestamp, creation time in microseconds and extras, where the flags
+    say which of the optional fields are present.
+    """
+
+    # Constants
+    CODEC_ID = 3
+
+    COMPLETED = 1
+    HAS_DUE = 2
+    HAS_CREATED = 4
+    HAS_EXTRAS = 8
+    HAS_DUE_AT = 16
+
+    COUNT = struct.Struct('<I')
+    TASK = struct.Struct('<BB')
+    INTEGER = struct.Struct('<q')
+    FLOAT = struct.Struct('<d')
+
+    def encode(self, obj) -> bytes:
+        """
+        Encodes the user data with the binary layout.
+        """
+        chunks = []
+        lists = obj['lists']
+
+        self._pack_extras(
+            chunks, {key: value for key, value in obj.items() if key != 'lists'})
+        chunks.append(self.COUNT.pack(len(lists)))
+
+        for list_key, list_data in lists.items():
+            self._pack_string(chunks, list_key)
+            self._pack_list(chunks, list_data)
+        return b''.join(chunks)
+
+    def decode(self, payload: bytes):
+        """
+        Decodes user data written with the binary layout.
+        """
+        view = memoryview(payload)
+        data, offset = self._unpack_extras(view, 0)
+        (list_count,) = self.COUNT.unpack_from(view, offset)
+        offset += self.COUNT.size
+
+        data['lists'] = {}
+        for _ in range(list_count):
+            list_key, offset = self._unpack_string(view, offset)
+            data['lists'][list_key], offset = self._unpack_list(view, offset)
+        return data
+
+    def _pack_list(self, chunks: list, list_data: dict):
+        """
+        Packs a list record followed by its tasks.
+        """
+        tasks = list_data['tasks']
+        extras = {
+            key: value for key, value in list_data.items()
+            if key not in ('name', 'tasks')
+        }
+        self._pack_string(chunks, list_data['name'])
+        self._pack_extras(chunks, extras)
+        chunks.append(self.COUNT.pack(len(tasks)))
+
+        for task_id, task_data in tasks.items():
+            self._pack_string(chunks, task_id)
+            self._pack_task(chunks, task_data)
+
+    def _unpack_list(self, view: memoryview, offset: int) -> tuple:
+        """
+        Unpacks a list record and its tasks.
+        """
+        name, offset = self._unpack_string(view, offset)
+        list_data, offset = self._unpack_extras(view, offset)
+        (task_count,) = self.COUNT.unpack_from(view, offset)
+        offset += self.COUNT.size
+
+        list_data['name'] = name
+        list_data['tasks'] = {}
+        for _ in range(task_count):
+            task_id, offset = self._unpack_string(view, offset)
+            list_data['tasks'][task_id], offset = self._unpack_task(view, offset)
+        return list_data, offset
+
+    def _pack_task(self, chunks: list, task_data: dict):
+        """
+        Packs a task record. Fields which do not fit the layout exactly
+        are left in the extras so they round trip unchanged.
+        """
+        extras = dict(task_data)
+        flags = 0
+
+        completed = extras.pop('completed', False)
+        if not isinstance(completed, bool):
+            extras['completed'] = completed
+        elif completed:
+            flags |= self.COMPLETED
+
+        priority = extras.get('priority')
+        if (
+            isinstance(priority, str) and priority.isdigit()
+            and str(int(priority)) == priority and 0 < int(priority) < 256
+        ):
+            del extras['priority']
+            priority = int(priority)
+        else:
+            priority = 0
+
+        name = extras.pop('name')
+        description = extras.pop('description', '')
+
+        due_minutes = self._due_minutes(extras.get('due_date'))
+        if due_minutes is not None:
+            del extras['due_date']
+            flags |= self.HAS_DUE
+
+        due = extras.get('due')
+        if isinstance(due, float):
+            del extras['due']
+            flags |= self.HAS_DUE_AT
+
+        created = extras.get('date_created')
+        if isinstance(created, datetime) and created.tzinfo is None:
+            del extras['date_created']
+            flags |= self.HAS_CREATED
+
+        if extras:
+            flags |= self.HAS_EXTRAS
+
+        chunks.append(self.TASK.pack(flags, priority))
+        self._pack_string(chunks, name)
+        self._pack_string(chunks, description)
+        if flags & self.HAS_DUE:
+            chunks.append(self.INTEGER.pack(due_minutes))
+        if flags & self.HAS_DUE_AT:
+            chunks.append(self.FLOAT.pack(due))
+        if flags & self.HAS_CREATED:
+            chunks.append(self.INTEGER.pack((created - EPOCH) // MICROSECOND))
+        if flags & self.HAS_EXTRAS:
+            self._pack_extras(chunks, extras)
+
+    def _unpack_task(self, view: memoryview, offset: int) -> tuple:
+        """
+        Unpacks a task record.
+        """
+        flags, priority = self.TASK.unpack_from(view, offset)
+        offset += self.TASK.size
+        name, offset = self._unpack_string(view, offset)
+        description, offset = self._unpack_string(view, offset)
+
+        task_data = {
+            'completed': bool(flags & self.COMPLETED),
+            'name': name,
+            'description': description
+        }
+        if priority:
+            task_data['priority'] = str(priority)
+
+        if flags & self.HAS_DUE:
+            (due_minutes,) = self.INTEGER.unpack_from(view, offset)
+            offset += self.INTEGER.size
+            due = EPOCH + timedelta(minutes=due_minutes)
+            task_data['due_date'] = {
+                'date': due.strftime("%d/%m/%Y"),
+                'time': due.strftime("%I:%M %p")
+            }
+
+        if flags & self.HAS_DUE_AT:
+            (task_data['due'],) = self.FLOAT.unpack_from(view, offset)
+            offset += self.FLOAT.size
+
+        if flags & self.HAS_CREATED:
+            (created,) = self.INTEGER.unpack_from(view, offset)
+            offset += self.INTEGER.size
+            task_data['date_created'] = EPOCH + created * MICROSECOND
+
+        if flags & self.HAS_EXTRAS:
+            extras, offset = self._unpack_extras(view, offset)
+            task_data.update(extras)
+        return task_data, offset
+
+    def _due_minutes(self, due_date):
+        """
+        Returns the due date as minutes since the epoch, or None if it
+        would not be formatted back to exactly the same strings.
+        """
+        if not isinstance(due_date, dict) or set(due_date) != {'date', 'time'}:
+            return None
+        try:
+            due = datetime.strptime(
+                f"{due_date['date']} {due_date['time']}", DUE_DATE_FORMAT)
+        except (TypeError, ValueError):
+            return None
+        if due.strftime(DUE_DATE_FORMAT) != f"{due_date['date']} {due_date['time']}":
+            return None
+        return (due - EPOCH) // timedelta(minutes=1)
+
+    def _pack_string(self, chunks: list, string: str):
+        """
+        Packs a length prefixed UTF-8 string.
+        """
+        encoded = string.encode('utf-8')
+        chunks.append(self.COUNT.pack(len(encoded)))
+        chunks.append(encoded)
+
+    def _unpack_string(self, view: memoryview, offset: int) -> tuple:
+        """
+        Unpacks a length prefixed UTF-8 string.
+        """
+        (length,) = self.COUNT.unpack_from(view, offset)
+        offset += self.COUNT.size
+        return str(view[offset:offset + length], 'utf-8'), offset + length
+
+    def _pack_extras(self, chunks: list, extras: dict):
+        """
+        Packs a dictionary of extra fields as a length prefixed pickle.
+        """
+        encoded = pickle.dumps(extras, pickle.HIGHEST_PROTOCOL) if extras else b''
+        chunks.append(self.COUNT.pack(len(encoded)))
+        chunks.append(encoded)
+
+    def _unpack_extras(self, view: memoryview, offset: int) -> tuple:
+        """
+        Unpacks a dictionary of extra fields.
+        """
+        (length,) = self.COUNT.unpack_from(view, offset)
+        offset += self.COUNT.size
+        if not length:
+            return {}, offset
+        return pickle.loads(view[offset:offset + length]), offset + length
+
+
+CODECS = {
+    'pickle': PickleCodec(),
+    'json': JsonCodec(),
+    'binary': BinaryCodec()
+}
+
+CODECS_BY_ID = {codec.CODEC_ID: codec for codec in CODECS.values()}
+
+
+def get_codec(name: str):
+    """
+    Returns the codec registered under a name.
+    """
+    if name not in CODECS:
+        raise ValueError(f'No codec named {name}')
+    return CODECS[name]
+
+
+def encode(obj, name: str) -> bytes:
+    """
+    Encodes an object with a header naming the codec which wrote it.
+    """
+    codec = get_codec(name)
+    return HEADER.pack(MAGIC, FORMAT_VERSION, codec.CODEC_ID) + codec.encode(obj)
+
+
+def decode(payload: bytes):
+    """
+    Decodes a payload written by any codec. Payloads without a header
+    are legacy files and are read as plain pickle.
+    """
+    if not payload.startswith(MAGIC):
+        return pickle.loads(payload)
+
+    _, version, codec_id = HEADER.unpack_from(payload)
+    if version > FORMAT_VERSION:
+        raise ValueError(f'Unsupported data format version {version}')
+    if codec_id not in CODECS_BY_ID:
+        raise ValueError(f'Unknown codec id {codec_id}')
+    return CODECS_BY_ID[codec_id].decode(payload[HEADER.size:])
+
+
+def benchmark(data: dict, rounds: int = 5) -> list:
+    """
+    Measures the best encode and decode time and the encoded size of
+    every codec against the data. Codecs which cannot encode the data
+    are reported with the error instead.
+    """
+    results = []
+    for name in CODECS:
+        try:
+            encode_times = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                payload = encode(data, name)
+                encode_times.append(time.perf_counter() - start)
+
+            decode_times = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                decoded = decode(payload)
+                decode_times.append(time.perf_counter() - start)
+        except (TypeError, ValueError) as error:
+            results.append({'codec': name, 'error': str(error)})
+            continue
+
+        results.append({
+            'codec': name,
+            'encode_ms': min(encode_times) * 1000,
+            'decode_ms': min(decode_times) * 1000,
+            'size': len(payload),
+            'round_trip': decoded == data
+        })
+    return results
+
+
+if __name__ == "__main__":
+    import model
+    from data import Data
+
+    if len(sys.argv) < 2:
+        sys.exit('Usage: python codec.py <username> [rounds]')
+
+    user_data = Data(sys.argv[1], write_behind=False).load()
+    if user_data is None:
+        sys.exit(f'No data found for {sys.argv[1]}')
+    model.load_all(user_data)
+
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f'{"codec":<8}{"encode ms":>12}{"decode ms":>12}'
+          f'{"bytes":>12}{"round trip":>12}')
+
+    for result in benchmark(user_data, rounds):
+        if 'error' in result:
+            print(f'{result["codec"]:<8} failed: {result["error"]}')
+            continue
+        print(f'{result["codec"]:<8}{result["encode_ms"]:>12.3f}'
+              f'{result["decode_ms"]:>12.3f}{result["size"]:>12}'
+              f'{str(result["round_trip"]):>12}')
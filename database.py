@@ -0,0 +1,275 @@
+"""
+This module provides the "SqliteStorage" class, a storage engine for "Data"
+which keeps a user's lists and tasks as rows in a local SQLite file. Tasks are
+indexed by list, lowercased name, due datetime, priority and completed flag so
+common queries become index lookups instead of a scan of every task.
+
+Imports:
+- os: For file operations during migration.
+- pickle: For storing the full list and task records alongside their columns.
+- sqlite3: For the SQLite database.
+- threading: For serializing access to the shared connection.
+- utility: For parsing task due dates.
+- ensure_name_index: For rebuilding each list's name index on read.
+- ensure_summary: For rebuilding each list's summary on read.
+- PickleStorage: For reading legacy pickle files during migration.
+
+Classes:
+- SqliteStorage: Persists user data as rows in a SQLite database.
+
+Attributes:
+- SCHEMA (str): Tables and indexes created in every database.
+
+Methods:
+- __init__(self, path: str, legacy_path: str = None): Opens the database and
+                                                      migrates a legacy file.
+- stamp(self): Returns a stamp that changes whenever the database changes.
+- read(self): Rebuilds the user data from the database.
+- write(self, obj): Replaces every row with the provided data.
+- prepare(self, data, operations): Captures the operations to apply.
+- persist(self, operations): Applies the operations as SQL statements.
+- commit(self, data, operations): Prepares and persists the operations.
+- tasks_by_priority(self, list_name: str): Returns a list's tasks by priority.
+- close(self): Closes the database connection.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import utility as util
+
+from model import ensure_name_index, ensure_summary
+from storage import PickleStorage, file_stamp
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lists (
+    list_key TEXT PRIMARY KEY,
+    record BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    list_key TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    due TEXT,
+    priority INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    record BLOB NOT NULL,
+    PRIMARY KEY (list_key, task_id)
+);
+
+CREATE INDEX IF NOT EXISTS tasks_by_list ON tasks (list_key);
+CREATE INDEX IF NOT EXISTS tasks_by_name ON tasks (list_key, name_lower);
+-- The next due tasks come from the agenda's index, not from this table
+DROP INDEX IF EXISTS tasks_by_due;
+CREATE INDEX IF NOT EXISTS tasks_by_priority ON tasks (list_key, priority);
+CREATE INDEX IF NOT EXISTS tasks_by_completed ON tasks (list_key, completed);
+"""
+
+
+class SqliteStorage:
+    """
+    Stores user data in a SQLite database, one row per list and per task.
+    The complete record of each row is pickled next to the indexed columns
+    so the data read back is identical to what was written.
+    """
+
+    def __init__(self, path: str, legacy_path: str = None):
+        """
+        Opens the database, creating the schema if needed. An existing
+        pickle file is migrated once and then renamed out of the way.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        is_new = not os.path.exists(path)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+
+        if is_new and legacy_path and os.path.exists(legacy_path):
+            self._migrate(legacy_path)
+
+    def _migrate(self, legacy_path: str):
+        """
+        Imports a legacy pickle file and renames it so it is only migrated once.
+        """
+        legacy_data = PickleStorage(legacy_path).read()
+        if legacy_data is not None:
+            self.write(legacy_data)
+        os.replace(legacy_path, legacy_path + '.migrated')
+
+    def stamp(self):
+        """
+        Returns a stamp that changes whenever the database changes.
+        """
+        return file_stamp(self.path)
+
+    def read(self):
+        """
+        Rebuilds the user data from the database. Returns None if the
+        database holds no data yet.
+        """
+        with self._lock:
+            meta = self.connection.execute(
+                "SELECT record FROM lists WHERE list_key = ''"
+            ).fetchone()
+            if meta is None:
+                return None
+
+            data = pickle.loads(meta[0])
+            data['lists'] = {}
+            for list_key, record in self.connection.execute(
+                "SELECT list_key, record FROM lists WHERE list_key != ''"
+            ):
+                data['lists'][list_key] = dict(pickle.loads(record), tasks={})
+
+            for list_key, task_id, record in self.connection.execute(
+                "SELECT list_key, task_id, record FROM tasks"
+            ):
+                if list_key in data['lists']:
+                    data['lists'][list_key]['tasks'][task_id] = (
+                        pickle.loads(record)
+                    )
+
+            # Name indexes and summaries are derived from the task rows
+            for list_data in data['lists'].values():
+                ensure_name_index(list_data)
+                ensure_summary(list_data)
+            return data
+
+    def write(self, obj):
+        """
+        Replaces every row with the provided data in one transaction.
+        """
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM tasks")
+            self.connection.execute("DELETE FROM lists")
+
+            meta = {key: value for key, value in obj.items() if key != 'lists'}
+            self._put_list('', meta)
+            for list_key, list_data in obj['lists'].items():
+                self._put_list(list_key, list_data)
+
+    def prepare(self, data, operations: list) -> list:
+        """
+        Captures the operations to apply. Task records are never mutated in
+        place, so the operations themselves are a stable snapshot.
+        """
+        return list(operations)
+
+    def commit(self, data, operations: list):
+        """
+        Prepares and persists the operations.
+        """
+        self.persist(self.prepare(data, operations))
+
+    def persist(self, operations: list):
+        """
+        Applies the operations as SQL statements in one transaction.
+        """
+        with self._lock, self.connection:
+            for operation in operations:
+                kind, list_name, *args = operation
+
+                if kind == 'set_meta':
+                    self._set_meta(list_name, args[0])
+                elif kind == 'set_list':
+                    self._delete_list(list_name)
+                    self._put_list(list_name, args[0])
+                elif kind == 'delete_list':
+                    self._delete_list(list_name)
+                elif kind == 'set_task':
+                    self._put_task(list_name, *args)
+                elif kind == 'delete_task':
+                    self.connection.execute(
+                        "DELETE FROM tasks WHERE list_key = ? AND task_id = ?",
+                        (list_name, args[0])
+                    )
+
+    def tasks_by_priority(self, list_name: str) -> list:
+        """
+        Returns (task_id, task_data) pairs of a list ordered by priority.
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT task_id, record FROM tasks WHERE list_key = ? "
+                "ORDER BY priority",
+                (list_name,)
+            ).fetchall()
+        return [(task_id, pickle.loads(record)) for task_id, record in rows]
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        with self._lock:
+            self.connection.close()
+
+    def _put_list(self, list_key: str, list_data: dict):
+        """
+        Inserts a list row followed by a row for each of its tasks.
+        """
+        record = {
+            key: value for key, value in list_data.items()
+            if key not in ('tasks', 'name_index', 'summary')
+        }
+        self.connection.execute(
+            "INSERT OR REPLACE INTO lists (list_key, record) VALUES (?, ?)",
+            (list_key, pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+        )
+        for task_id, task_data in list_data.get('tasks', {}).items():
+            self._put_task(list_key, task_id, task_data)
+
+    def _put_task(self, list_key: str, task_id: str, task_data: dict):
+        """
+        Inserts or replaces a task row, deriving the indexed columns.
+        """
+        due = task_data.get('due')
+        if due is None and task_data.get('due_date'):
+            # Tasks saved before due timestamps existed, during migration
+            due = util.due_timestamp(task_data['due_date'])
+        if due is not None:
+            due = util.due_datetime(due).strftime("%Y-%m-%d %H:%M")
+        self.connection.execute(
+            "INSERT OR REPLACE INTO tasks (list_key, task_id, name_lower, due, "
+            "priority, completed, record) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                list_key,
+                task_id,
+                task_data['name'].lower(),
+                due,
+                int(task_data['priority']),
+                int(bool(task_data['completed'])),
+                pickle.dumps(task_data, pickle.HIGHEST_PROTOCOL)
+            )
+        )
+
+    def _set_meta(self, key: str, value):
+        """
+        Sets a top-level value in the meta row stored under the empty list key.
+        """
+        row = self.connection.execute(
+            "SELECT record FROM lists WHERE list_key = ''"
+        ).fetchone()
+        meta = pickle.loads(row[0]) if row else {}
+        meta[key] = value
+        self.connection.execute(
+            "INSERT OR REPLACE INTO lists (list_key, record) VALUES ('', ?)",
+            (pickle.dumps(meta, pickle.HIGHEST_PROTOCOL),)
+        )
+
+    def _delete_list(self, list_key: str):
+        """
+        Deletes a list row and all of its task rows.
+        """
+        self.connection.execute(
+            "DELETE FROM tasks WHERE list_key = ?", (list_key,))
+        self.connection.execute(
+            "DELETE FROM lists WHERE list_key = ?", (list_key,))
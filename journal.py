@@ -0,0 +1,242 @@
+"""
+This module provides the "JournalStorage" class, an opt-in storage engine for
+"Data" which appends each mutation as a small record to a journal next to the
+snapshot instead of rewriting the whole file on every change.
+
+Imports:
+- os: For file and directory operations.
+- pickle: For serializing journal records.
+- struct: For packing the record headers.
+- threading: For running compaction in the background.
+- zlib: For the crc32 checksum of each record.
+- contextlib: For compacting without a cross-process lock.
+
+Classes:
+- JournalStorage: Persists user data as a snapshot plus an append-only journal.
+
+Attributes:
+- RECORD_HEADER (struct.Struct): Header holding the length and crc32 of a record.
+
+Methods:
+- __init__(self, path: str, compact_size: int, codec_name: str = 'pickle',
+           file_lock=None): Initializes the storage.
+- stamp(self): Returns a stamp covering the snapshot and both journals.
+- read(self): Loads the snapshot and replays the journals on top of it.
+- write(self, obj): Rewrites the snapshot and discards the journals.
+- prepare(self, data, operations): Encodes the operations as journal records.
+- persist(self, prepared): Appends the records to the journal.
+- close(self): Waits for a running compaction to finish.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import os
+import pickle
+import struct
+import threading
+import zlib
+
+from contextlib import nullcontext
+
+from model import template, apply_operation
+from storage import PickleStorage, file_stamp, write_atomic
+
+
+RECORD_HEADER = struct.Struct('<II')
+
+
+class JournalStorage(PickleStorage):
+    """
+    Stores user data as a snapshot plus an append-only journal of
+    operations. Each commit costs one small append and an fsync, and the
+    journal is folded back into the snapshot on a background thread once
+    it grows past the compaction size.
+
+    Compaction first renames the live journal aside, so new commits keep
+    appending to a fresh journal while the snapshot is rebuilt. Replaying
+    operations is idempotent, which keeps every crash point recoverable.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compact_size: int,
+        codec_name: str = 'pickle',
+        file_lock=None
+    ):
+        """
+        Initializes the storage for a snapshot file and its journal. The
+        file lock, if given, keeps other processes from reading or
+        appending while the journals are swapped during compaction.
+        """
+        super().__init__(path, codec_name)
+        self.file_lock = file_lock
+        self.journal_path = os.path.splitext(path)[0] + '.journal'
+        self.rotated_path = self.journal_path + '.old'
+        self.compact_size = compact_size
+        self._lock = threading.Lock()
+        self._compactor = None
+
+    def stamp(self):
+        """
+        Returns a stamp covering the snapshot and both journals.
+        """
+        return (
+            file_stamp(self.path),
+            file_stamp(self.rotated_path),
+            file_stamp(self.journal_path)
+        )
+
+    def read(self):
+        """
+        Loads the snapshot and replays the rotated and live journals on top
+        of it. Returns None if neither a snapshot nor a journal exists.
+        """
+        with self._lock:
+            data = super().read()
+            journals = [self.rotated_path, self.journal_path]
+
+            if data is None and not any(map(os.path.exists, journals)):
+                return None
+
+            data = data if data is not None else template()
+            for path in journals:
+                for operation in self._replay(path):
+                    apply_operation(data, operation)
+            return data
+
+    def write(self, obj):
+        """
+        Rewrites the snapshot and discards both journals.
+        """
+        self._wait_for_compaction()
+        with self._lock:
+            self._write_snapshot(obj)
+            for path in (self.rotated_path, self.journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def prepare(self, data, operations: list):
+        """
+        Encodes the operations as journal records.
+        """
+        return b''.join(self._encode(operation) for operation in operations)
+
+    def persist(self, records: bytes):
+        """
+        Appends the records to the journal and fsyncs it. Starts a
+        background compaction once the journal exceeds the compaction size.
+        """
+        with self._lock:
+            with open(self.journal_path, "ab") as file:
+                file.write(records)
+                file.flush()
+                os.fsync(file.fileno())
+                journal_size = file.tell()
+
+        if journal_size >= self.compact_size:
+            self._start_compaction()
+
+    def close(self):
+        """
+        Waits for a running compaction to finish.
+        """
+        self._wait_for_compaction()
+
+    def _encode(self, operation: tuple) -> bytes:
+        """
+        Encodes an operation as a length and checksum prefixed record.
+        """
+        payload = pickle.dumps(operation, pickle.HIGHEST_PROTOCOL)
+        return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+    def _replay(self, path: str) -> list:
+        """
+        Decodes all complete records from a journal. A torn or corrupt
+        record left by a crash ends the journal and is truncated away.
+        """
+        try:
+            with open(path, "rb") as file:
+                buffer = file.read()
+        except FileNotFoundError:
+            return []
+
+        operations = []
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(buffer):
+            length, checksum = RECORD_HEADER.unpack_from(buffer, offset)
+            start = offset + RECORD_HEADER.size
+            payload = buffer[start:start + length]
+
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+
+            operations.append(pickle.loads(payload))
+            offset = start + length
+
+        if offset < len(buffer):
+            with open(path, "r+b") as file:
+                file.truncate(offset)
+        return operations
+
+    def _write_snapshot(self, obj):
+        """
+        Writes the snapshot to a temporary file and renames it into place.
+        """
+        write_atomic(self.path, PickleStorage.prepare(self, obj, []))
+
+    def _start_compaction(self):
+        """
+        Starts the compaction thread unless one is already running.
+        """
+        if self._compactor and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self._compact, daemon=True)
+        self._compactor.start()
+
+    def _wait_for_compaction(self):
+        """
+        Blocks until a running compaction has finished.
+        """
+        if self._compactor and self._compactor.is_alive():
+            self._compactor.join()
+
+    def _compact(self):
+        """
+        Folds the journal into the snapshot. The live journal is renamed
+        aside first so commits are never blocked by the rebuild. The rebuilt
+        snapshot only replaces the one it was built from, so a snapshot
+        written by another instance in the meantime, such as a restore,
+        is never overwritten with stale data.
+        """
+        with self._exclusive(), self._lock:
+            if not os.path.exists(self.rotated_path):
+                if not os.path.exists(self.journal_path):
+                    return
+                os.replace(self.journal_path, self.rotated_path)
+            snapshot_stamp = file_stamp(self.path)
+
+        data = PickleStorage.read(self)
+        data = data if data is not None else template()
+        for operation in self._replay(self.rotated_path):
+            apply_operation(data, operation)
+
+        with self._exclusive(), self._lock:
+            # Another instance may have rewritten the snapshot, or finished
+            # the same compaction first, in which case this rebuild is stale
+            if (
+                file_stamp(self.path) != snapshot_stamp
+                or not os.path.exists(self.rotated_path)
+            ):
+                return
+            self._write_snapshot(data)
+            os.remove(self.rotated_path)
+
+    def _exclusive(self):
+        """
+        Returns the cross-process lock held while the journals are swapped.
+        """
+        return self.file_lock.exclusive() if self.file_lock else nullcontext()
@@ -1,27 +1,36 @@
 """
 This module provides the "Loading" class to handle a loading animation using
-a rotating image. The animation runs in a separate thread to avoid blocking the
-main GUI thread.
+a rotating image. The rotations are rendered once, at the size they are shown,
+and kept for every animation of that size. The animation is driven by the Tk
+event loop, so it only ever touches its label from the main GUI thread and
+does no image work while it runs.
 
 Imports:
-- Image (from PIL): For image processing and manipulation.
+- Image (from PIL): For rendering the rotations of the image.
 - customtkinter: For custom Tkinter widgets.
-- tkinter: For Tkinter base functionalities.
-- threading: For creating and managing threads.
-- time: For handling time-related operations.
+- assets: For the decoded loading image.
+- threading: For guarding the rendered frames.
+- time: For keeping the rotation speed independent of the frame rate.
 
 Classes:
-- Loading: A thread-based class that manages a rotating loading animation.
+- Loading: Manages a rotating loading animation on a label.
 
 Attributes:
-- SPEED (int): Rotation speed of the loading animation.
+- FRAMES (int): Number of rotations rendered for a full turn.
+- FPS (int): Default frame rate of the animation.
+- DEGREES_PER_SECOND (int): Rotation speed of the loading animation.
+
+Functions:
+- get_frames(size: tuple, scaling: float): Returns the rendered rotations
+    for a size, rendering them the first time.
 
 Methods:
-- __init__(self, label): Initializes the Loading animation with a label.
-- rotate_image(self, image, angle: int): Rotates the provided image by the given angle.
-- update_image(self, angle: int): Updates the label with the rotated image.
+- __init__(self, label, size: tuple, fps: int): Initializes the Loading
+    animation with a label.
+- start(self): Starts the loading animation.
+- update_image(self): Shows the next frame of the animation.
+- stop(self): Stops the loading animation, leaving the label.
 - end_loading(self): Stops the loading animation and destroys the label.
-- run(self): Runs the animation loop in a separate thread.
 
 Author: Blake Stevenson
 Date: 2024-09-06
@@ -33,72 +42,96 @@ from PIL import Image
 import customtkinter
 import threading
 import time
+import assets
 
 
-light_image = Image.open("images/loading.png")
-dark_image = Image.open("images/loading.png")
+FRAMES = 36
+FPS = 30
+DEGREES_PER_SECOND = 300
 
-my_image = customtkinter.CTkImage(
-    light_image=light_image,
-    dark_image=dark_image,
-    size=(50, 50)
-)
+_frames = {}
+_frames_lock = threading.Lock()
 
 
-class Loading(threading.Thread):
+def get_frames(size: tuple, scaling: float = 1) -> list:
+    """
+    Returns the images of a full turn of the loading image at a size,
+    rendering them the first time. The image is shrunk to the size shown
+    on screen before it is rotated, so each rotation is as cheap as it can
+    be and the images are never resized while the animation runs.
+    """
+    key = (tuple(size), scaling)
+    with _frames_lock:
+        if key not in _frames:
+            pixels = (round(size[0] * scaling), round(size[1] * scaling))
+            image = assets.get_image('loading').resize(pixels, Image.LANCZOS)
+
+            frames = []
+            for frame in range(FRAMES):
+                rotated = image.rotate(
+                    frame * 360 / FRAMES, resample=Image.BICUBIC
+                )
+                frames.append(customtkinter.CTkImage(
+                    light_image=rotated,
+                    dark_image=rotated,
+                    size=size
+                ))
+            _frames[key] = frames
+        return _frames[key]
+
+
+class Loading:
     """
     Handles the animation of a rotating image displayed in a Tkinter label.
-    Runs the animation in a separate thread to keep the GUI responsive.
+    Each frame is scheduled on the label with after() and shows the
+    rendered rotation for the time passed, so a lower frame rate turns the
+    image just as fast.
     """
 
-    # Constants
-    SPEED = 3
-
-    def __init__(self, label):
+    def __init__(self, label, size: tuple = (100, 100), fps: int = FPS):
         """
         Initializes the Loading animation with a label.
         """
-        super().__init__()
         self.label = label
-        self.is_active = True
+        self.delay = max(int(1000 / fps), 1)
+        self.frames = get_frames(size, label._get_widget_scaling())
+        self.job = None
+        self.started = None
 
-    def rotate_image(self, image, angle: int):
+    def start(self):
         """
-        Rotates the provided image by the given angle.
+        Starts the loading animation.
         """
-        rotated_image = image.rotate(angle, expand=True)
-        return customtkinter.CTkImage(
-            light_image=rotated_image,
-            dark_image=rotated_image,
-            size=(100, 100)
-        )
-    
-    def update_image(self, angle: int):
+        if self.job is None:
+            self.started = time.monotonic()
+            self.update_image()
+
+    def update_image(self):
         """
-        Updates the label with the rotated image.
+        Shows the rotation for the time passed and schedules the next frame.
         """
-        if not self.is_active:
+        self.job = None
+        if not self.label.winfo_exists():
             return
-        rotated_image = self.rotate_image(light_image, angle)
-        self.label.configure(image=rotated_image)
-        self.label.image = rotated_image
 
-    def end_loading(self):
+        turned = (time.monotonic() - self.started) * DEGREES_PER_SECOND
+        frame = int(turned * FRAMES / 360) % FRAMES
+        self.label.configure(image=self.frames[frame])
+        self.job = self.label.after(self.delay, self.update_image)
+
+    def stop(self):
         """
-        Stops the loading animation and destroys the label.
+        Stops the loading animation, leaving the label as it is.
         """
-        self.is_active = False
-        self.label.destroy()
+        if self.job is not None:
+            self.label.after_cancel(self.job)
+            self.job = None
 
-    def run(self):
+    def end_loading(self):
         """
-        Runs the animation loop in a separate thread.
-        Rotates the image and updates the label at regular intervals.
+        Stops the loading animation and destroys the label, unless it was
+        destroyed along with its parent.
         """
-        angle = 0
-        while self.is_active:
-            self.update_image(angle)
-            angle += 10
-            if angle >= 360:
-                angle = 0
-            time.sleep(0.1 / self.SPEED)
+        self.stop()
+        if self.label.winfo_exists():
+            self.label.destroy()
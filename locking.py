@@ -0,0 +1,157 @@
+"""
+This module provides the "FileLock" class, an advisory lock shared by every
+process that opens the same user's data. Readers hold it shared and writers
+hold it exclusively, so a data file is never read while it is being replaced.
+The lock file also stores a version counter which every write increments,
+letting an instance tell whether another one changed the data since it last
+loaded it.
+
+Platforms without shared locks (Windows) take an exclusive lock for readers too.
+
+Imports:
+- os: For opening, reading and writing the lock file.
+- threading: For making the lock re-entrant within a process.
+- contextlib: For the lock context managers.
+- fcntl / msvcrt: For the platform's file locking.
+
+Classes:
+- FileLock: A re-entrant advisory lock file holding a version counter.
+
+Methods:
+- __init__(self, path: str): Initializes the lock for a lock file.
+- shared(self): Holds the lock for reading.
+- exclusive(self): Holds the lock for writing.
+- read_version(self): Returns the version stored in the lock file.
+- bump_version(self): Increments the stored version and returns it.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import os
+import threading
+
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+# Windows locks byte ranges and refuses reads of locked bytes, so the lock
+# is taken on a byte far past the version text.
+LOCK_OFFSET = 1 << 30
+
+
+class FileLock:
+    """
+    An advisory lock on a file next to the user's data. Within a process the
+    lock is re-entrant per thread, and nested acquisitions keep the mode of the
+    outermost one, so a shared lock must never be upgraded by nesting.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes the lock for a lock file, creating it if needed.
+        """
+        self.path = path
+        self._guard = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    @contextmanager
+    def shared(self):
+        """
+        Holds the lock for reading. Other readers may hold it at once.
+        """
+        with self._hold(exclusive=False):
+            yield
+
+    @contextmanager
+    def exclusive(self):
+        """
+        Holds the lock for writing. No other process may hold it at once.
+        """
+        with self._hold(exclusive=True):
+            yield
+
+    @contextmanager
+    def _hold(self, exclusive: bool):
+        """
+        Acquires the file lock on the outermost call of the current thread.
+        """
+        with self._guard:
+            if self._depth == 0:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    self._lock(exclusive)
+                except BaseException:
+                    os.close(self._fd)
+                    self._fd = None
+                    raise
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._unlock()
+                    os.close(self._fd)
+                    self._fd = None
+
+    def _lock(self, exclusive: bool):
+        """
+        Blocks until the platform lock is acquired.
+        """
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            return
+
+        os.lseek(self._fd, LOCK_OFFSET, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after ten seconds, keep waiting
+                continue
+
+    def _unlock(self):
+        """
+        Releases the platform lock.
+        """
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            return
+
+        os.lseek(self._fd, LOCK_OFFSET, os.SEEK_SET)
+        msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+    def read_version(self) -> int:
+        """
+        Returns the version stored in the lock file, or 0 if none was written.
+        """
+        try:
+            with open(self.path, "rb") as file:
+                text = file.read(32)
+        except FileNotFoundError:
+            return 0
+        try:
+            return int(text.strip() or 0)
+        except ValueError:
+            return 0
+
+    def bump_version(self) -> int:
+        """
+        Increments the stored version and returns it. The lock must be held
+        exclusively. The version is written in a single fixed width write so
+        readers without the lock never see it half written.
+        """
+        version = self.read_version() + 1
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.write(self._fd, b'%020d' % version)
+        return version
@@ -7,6 +7,7 @@ Imports:
 - customtkinter: Custom Tkinter widgets for modern GUI.
 - keyring: For securely storing and retrieving user credentials.
 - Constants: Contains constants for display errors.
+- assets: For decoding the app's images while the user logs in.
 - App: Application class to be launched after successful login or account creation.
 
 Classes:
@@ -60,6 +61,7 @@ License: MIT
 import customtkinter
 import keyring
 import constants
+import assets
 
 from app import App
 
@@ -115,6 +117,9 @@ class Login(customtkinter.CTk):
         )
         self.content_frame.place(relx=0.5, rely=0.5, anchor=customtkinter.CENTER)
 
+        # The images are ready by the time the user has logged in
+        assets.preload(self.main_frame._get_widget_scaling())
+
         self.load_login_menu()
 
     def display_status_error(self, status_error: str):
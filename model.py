@@ -0,0 +1,228 @@
+"""
+This module defines the in-memory shape of a user's data and the mutation
+operations applied to it. Operations are small tuples so that storage engines
+can persist a single change instead of the whole data file.
+
+Every list carries a name index mapping the case-folded name of each task to
+its id, kept up to date by the operations, so finding a task by name or
+checking for a duplicate never scans the list. Lists also carry a summary of
+their task counts and the sorted due timestamps of their unfinished tasks, so
+the list overview can show overdue and next due tasks without reading them,
+along with the sorted next occurrences of their unfinished recurring tasks.
+
+Operations:
+- ('set_meta', key, value): Sets a top-level value such as the schema version.
+- ('set_list', list_name, list_data): Creates or replaces a list.
+- ('delete_list', list_name): Removes a list and all of its tasks.
+- ('set_task', list_name, task_id, task_data): Creates or replaces a task.
+- ('delete_task', list_name, task_id): Removes a task from a list.
+
+Functions:
+- template(): Returns a default data template for new users.
+- index_key(name: str): Returns the key a task name is indexed under.
+- build_name_index(tasks: dict): Builds the name index of a list's tasks.
+- ensure_name_index(list_data: dict): Rebuilds a missing or stale name index.
+- apply_operation(data: dict, operation: tuple): Applies an operation
+  to the user data in place.
+- load_all(data: dict): Ensures the tasks of every list are loaded.
+- summarise_tasks(tasks: dict): Builds the summary of a list's tasks.
+- ensure_summary(list_data: dict): Rebuilds a missing or stale summary.
+- describe_summary(summary: dict, now: float): Returns the task counts,
+  overdue count and next due timestamp of a summary.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import bisect
+
+
+def template() -> dict:
+    """
+    Returns a default data template for new users.
+    """
+    return {
+        'lists': {}
+    }
+
+
+def index_key(name: str) -> str:
+    """
+    Returns the key a task name is indexed under, ignoring case.
+    """
+    return name.casefold()
+
+
+def build_name_index(tasks: dict) -> dict:
+    """
+    Builds the index from case-folded task name to task id.
+    """
+    return {
+        index_key(task_data['name']): task_id
+        for task_id, task_data in tasks.items()
+    }
+
+
+def ensure_name_index(list_data: dict) -> bool:
+    """
+    Rebuilds the name index of a list if it is missing or does not match
+    the tasks. Returns True if it was rebuilt.
+    """
+    name_index = build_name_index(list_data['tasks'])
+    if list_data.get('name_index') == name_index:
+        return False
+    list_data['name_index'] = name_index
+    return True
+
+
+def apply_operation(data: dict, operation: tuple):
+    """
+    Applies an operation to the user data in place. Operations that target
+    a list which no longer exists are ignored so replaying is idempotent.
+    """
+    kind, list_name, *args = operation
+    lists = data['lists']
+
+    if kind == 'set_meta':
+        data[list_name] = args[0]
+    elif kind == 'set_list':
+        if 'name_index' not in args[0]:
+            ensure_name_index(args[0])
+        if 'summary' not in args[0]:
+            ensure_summary(args[0])
+        lists[list_name] = args[0]
+    elif kind == 'delete_list':
+        lists.pop(list_name, None)
+    elif kind == 'set_task':
+        task_id, task_data = args
+        if list_name in lists:
+            list_data = lists[list_name]
+            previous = list_data['tasks'].get(task_id)
+            if previous:
+                _unindex(list_data, previous['name'], task_id)
+                _unsummarise(list_data, previous)
+            list_data['tasks'][task_id] = task_data
+            list_data.setdefault('name_index', {})[
+                index_key(task_data['name'])] = task_id
+            _summarise(list_data, task_data)
+    elif kind == 'delete_task':
+        if list_name in lists:
+            list_data = lists[list_name]
+            previous = list_data['tasks'].pop(args[0], None)
+            if previous:
+                _unindex(list_data, previous['name'], args[0])
+                _unsummarise(list_data, previous)
+    else:
+        raise ValueError(f'Unknown operation {kind}')
+
+
+def _unindex(list_data: dict, name: str, task_id: str):
+    """
+    Removes a task name from the index if it still points at the task.
+    """
+    name_index = list_data.get('name_index', {})
+    if name_index.get(index_key(name)) == task_id:
+        del name_index[index_key(name)]
+
+
+def load_all(data: dict) -> dict:
+    """
+    Ensures the tasks of every list are loaded, for consumers that walk
+    the whole data rather than reading lists through their keys.
+    """
+    for list_data in data['lists'].values():
+        list_data['tasks']
+    return data
+
+
+def summarise_tasks(tasks: dict) -> dict:
+    """
+    Builds the summary of a list's tasks: the total and unfinished counts,
+    the sorted due timestamps of the unfinished tasks and the sorted next
+    occurrences of the unfinished recurring tasks.
+    """
+    return {
+        'total': len(tasks),
+        'unfinished': sum(
+            not task_data['completed'] for task_data in tasks.values()
+        ),
+        'pending': sorted(
+            task_data['due'] for task_data in tasks.values()
+            if not task_data['completed'] and task_data.get('due') is not None
+        ),
+        'recurring': sorted(
+            task_data['next_due'] for task_data in tasks.values()
+            if not task_data['completed'] and task_data.get('next_due') is not None
+        )
+    }
+
+
+def ensure_summary(list_data: dict) -> bool:
+    """
+    Rebuilds the summary of a list if it is missing or does not match
+    the tasks. Returns True if it was rebuilt.
+    """
+    summary = summarise_tasks(list_data['tasks'])
+    if list_data.get('summary') == summary:
+        return False
+    list_data['summary'] = summary
+    return True
+
+
+def _summarise(list_data: dict, task_data: dict):
+    """
+    Adds a task to the summary of its list. Lists without a summary
+    are left for ensure_summary to rebuild when they are next loaded.
+    """
+    summary = list_data.get('summary')
+    if summary is None or 'recurring' not in summary:
+        return
+    summary['total'] += 1
+    if not task_data['completed']:
+        summary['unfinished'] += 1
+        if task_data.get('due') is not None:
+            bisect.insort(summary['pending'], task_data['due'])
+        if task_data.get('next_due') is not None:
+            bisect.insort(summary['recurring'], task_data['next_due'])
+
+
+def _unsummarise(list_data: dict, task_data: dict):
+    """
+    Removes a task from the summary of its list.
+    """
+    summary = list_data.get('summary')
+    if summary is None or 'recurring' not in summary:
+        return
+    summary['total'] -= 1
+    if not task_data['completed']:
+        summary['unfinished'] -= 1
+        _discard_sorted(summary['pending'], task_data.get('due'))
+        _discard_sorted(summary['recurring'], task_data.get('next_due'))
+
+
+def _discard_sorted(values: list, value):
+    """
+    Removes one occurrence of a value from a sorted list, if present.
+    """
+    if value is None:
+        return
+    position = bisect.bisect_left(values, value)
+    if position < len(values) and values[position] == value:
+        del values[position]
+
+
+def describe_summary(summary: dict, now: float) -> dict:
+    """
+    Returns the total, unfinished and overdue task counts of a summary and
+    the timestamp of the next unfinished task due after now, or None.
+    """
+    pending = summary['pending']
+    overdue = bisect.bisect_right(pending, now)
+    return {
+        'total': summary['total'],
+        'unfinished': summary['unfinished'],
+        'overdue': overdue,
+        'next_due': pending[overdue] if overdue < len(pending) else None
+    }
@@ -0,0 +1,191 @@
+"""
+This module provides recurrence rules for tasks which repeat, such as daily
+and weekly chores. A recurring task is stored once, holding its rule, the due
+timestamp of its current occurrence and that of the next one. Later
+occurrences are never stored, they are worked out from the rule when the
+task rolls forward, either because it was completed or because its next
+occurrence became due before it was.
+
+Rules:
+- {'frequency': 'daily', 'interval': n}: Every n days.
+- {'frequency': 'weekly', 'interval': n}: Every n weeks on the same weekday.
+- {'frequency': 'weekly', 'interval': n, 'weekdays': [...]}: On the given
+  weekdays (0 is Monday) of every n-th week.
+- {'frequency': 'monthly', 'interval': n, 'day': d}: On day d of every n-th
+  month, or the last day of shorter months.
+
+Imports:
+- calendar: For the number of days in a month.
+- utility: For the date and time strings of a due timestamp.
+- datetime: For stepping through local dates and times.
+
+Attributes:
+- FREQUENCIES (tuple): The frequencies a rule may have.
+- PRESETS (dict): The rules offered when editing a task, by label.
+- CUSTOM (str): The label offered for a rule which matches no preset.
+- WEEKDAY_NAMES (tuple): Short weekday names, Monday first.
+
+Functions:
+- make_rule(frequency: str, due: float, interval: int, weekdays: list):
+  Returns a validated rule anchored at a due timestamp.
+- next_occurrence(rule: dict, due: float): Returns the occurrence after a due.
+- schedule(task_data: dict, due: float): Returns a task set to an occurrence.
+- roll(task_data: dict, now: float, completed: bool): Returns a task moved
+  to its next occurrence.
+- occurrences(task_data: dict): Returns the current and next due timestamps.
+- describe(rule: dict): Returns a short description of a rule.
+- preset_of(rule: dict): Returns the label and preset to edit a rule with.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import calendar
+import utility as util
+
+from datetime import datetime, timedelta
+
+
+FREQUENCIES = ('daily', 'weekly', 'monthly')
+
+PRESETS = {
+    'Never': None,
+    'Daily': ('daily', None),
+    'Weekdays': ('weekly', [0, 1, 2, 3, 4]),
+    'Weekly': ('weekly', None),
+    'Monthly': ('monthly', None),
+}
+
+CUSTOM = 'Custom'
+
+WEEKDAY_NAMES = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def make_rule(frequency: str, due: float, interval: int = 1,
+              weekdays: list = None) -> dict:
+    """
+    Returns a rule repeating every interval days, weeks or months from the
+    due timestamp. Raises ValueError if the rule is not valid.
+    """
+    if frequency not in FREQUENCIES:
+        raise ValueError(f'Unknown frequency {frequency!r}')
+    if int(interval) < 1:
+        raise ValueError('Interval must be at least 1')
+
+    rule = {'frequency': frequency, 'interval': int(interval)}
+    if frequency == 'weekly' and weekdays:
+        if not all(0 <= day <= 6 for day in weekdays):
+            raise ValueError('Weekdays must be between 0 and 6')
+        rule['weekdays'] = sorted(set(weekdays))
+    elif frequency == 'monthly':
+        rule['day'] = datetime.fromtimestamp(due).day
+    return rule
+
+
+def next_occurrence(rule: dict, due: float) -> float:
+    """
+    Returns the due timestamp of the occurrence following the one at due.
+    Steps are taken in local time, so occurrences keep their time of day
+    across daylight saving changes.
+    """
+    current = datetime.fromtimestamp(due)
+    interval = rule['interval']
+    frequency = rule['frequency']
+
+    if frequency == 'daily':
+        return (current + timedelta(days=interval)).timestamp()
+
+    if frequency == 'weekly':
+        weekdays = rule.get('weekdays')
+        if not weekdays:
+            return (current + timedelta(weeks=interval)).timestamp()
+
+        week_start = current.date() - timedelta(days=current.weekday())
+        for offset in range(1, 7 * interval + 8):
+            candidate = current + timedelta(days=offset)
+            weeks = (candidate.date() - week_start).days // 7
+            if weeks % interval == 0 and candidate.weekday() in weekdays:
+                return candidate.timestamp()
+        raise ValueError('Rule has no valid weekdays')
+
+    months = current.year * 12 + current.month - 1 + interval
+    year, month = divmod(months, 12)
+    day = min(rule.get('day', current.day), calendar.monthrange(year, month + 1)[1])
+    return current.replace(year=year, month=month + 1, day=day).timestamp()
+
+
+def schedule(task_data: dict, due: float) -> dict:
+    """
+    Returns a copy of a task set to the occurrence due at the timestamp,
+    with its display strings and the due timestamp of its next occurrence.
+    """
+    task_data = dict(task_data, due=due, due_date=dict(util.format_due_date(due)))
+    rule = task_data.get('recurrence')
+    if rule:
+        task_data['next_due'] = next_occurrence(rule, due)
+    else:
+        task_data.pop('next_due', None)
+    return task_data
+
+
+def roll(task_data: dict, now: float, completed: bool) -> dict:
+    """
+    Returns a copy of a recurring task moved to a later occurrence. A
+    completed task moves to its first occurrence after now, counting the
+    completion. Otherwise the task moves to its latest occurrence which is
+    already due, as happens when the next one arrives before it is done.
+    """
+    rule = task_data['recurrence']
+    due = task_data['next_due']
+    if completed:
+        while due <= now:
+            due = next_occurrence(rule, due)
+    else:
+        following = next_occurrence(rule, due)
+        while following <= now:
+            due, following = following, next_occurrence(rule, following)
+
+    task_data = schedule(dict(task_data, completed=False), due)
+    if completed:
+        task_data['completions'] = task_data.get('completions', 0) + 1
+        task_data['last_completed'] = now
+    return task_data
+
+
+def occurrences(task_data: dict) -> tuple:
+    """
+    Returns the due timestamps of a task's current occurrence and, for a
+    recurring task, its next one.
+    """
+    if task_data.get('recurrence'):
+        return task_data['due'], task_data['next_due']
+    return (task_data['due'],)
+
+
+def describe(rule: dict) -> str:
+    """
+    Returns a short description of a rule, such as "Every 2 weeks on Mon, Thu".
+    """
+    unit = {'daily': 'day', 'weekly': 'week', 'monthly': 'month'}[rule['frequency']]
+    interval = rule['interval']
+    text = f'Every {unit}' if interval == 1 else f'Every {interval} {unit}s'
+    if rule.get('weekdays'):
+        text += ' on ' + ', '.join(WEEKDAY_NAMES[day] for day in rule['weekdays'])
+    return text
+
+
+def preset_of(rule: dict) -> tuple:
+    """
+    Returns the (label, preset) a task's rule is edited with: 'Never' for no
+    rule, the preset matching its frequency and weekdays, or CUSTOM with the
+    rule's own frequency and weekdays, so saving it unchanged keeps the rule.
+    """
+    if not rule:
+        return 'Never', None
+    preset = (rule['frequency'], rule.get('weekdays'))
+    for label, value in PRESETS.items():
+        if value == preset:
+            return label, value
+    return CUSTOM, preset
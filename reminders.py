@@ -0,0 +1,299 @@
+"""
+This module provides the "Reminders" class, which arms the reminders of a
+user's unfinished tasks on a scheduler. Only tasks due within a rolling
+horizon are armed. They are found from the summary of each list, so lists
+with nothing due soon are never loaded, and the horizon is extended in the
+background before it runs out. Logging in therefore takes the same time
+however many tasks an account has collected.
+
+A recurring task has a reminder for its current occurrence and its next one.
+When the next one becomes due before the task is completed, the task rolls
+forward to it.
+
+Reminders which became due while the app was closed are not fired one by
+one. They are collected into a single summary when the reminders start,
+using the time the user was last active, which is kept with the data.
+
+Imports:
+- bisect: For finding due timestamps within a window of a list's summary.
+- threading: For guarding the armed reminders against the background writer.
+- time: For the current time.
+- constants: Contains the reminder horizon.
+- recurrence: For the occurrences of recurring tasks.
+
+Classes:
+- Reminders: Arms the reminders of unfinished tasks due within the horizon.
+
+Methods:
+- __init__(self, user_data, scheduler, fn): Initializes the reminders and
+    follows the data.
+- start(self): Arms the horizon and returns the reminders missed since the
+    user was last active.
+- close(self): Cancels every reminder and records when the user left.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import bisect
+import threading
+import time
+import constants
+import recurrence
+
+
+class Reminders:
+    """
+    Keeps the reminders of every unfinished task due before the horizon
+    armed on a scheduler, following the changes "Data" reports. Tasks due
+    later are armed as the horizon is extended. Each occurrence is scheduled
+    under the key (task_id, index), index 0 being the current occurrence.
+    """
+
+    def __init__(self, user_data, scheduler, fn):
+        """
+        Initializes the reminders of a user's data. fn(name) is called with
+        the name of each task when it becomes due.
+        """
+        self.user_data = user_data
+        self.scheduler = scheduler
+        self.fn = fn
+        self.horizon = constants.App['ReminderHorizon']
+
+        self._armed = {}
+        self._until = None
+        self._extend_key = object()
+        self._lock = threading.RLock()
+
+        user_data.add_listener(self._on_change)
+
+    def _summary(self, list_data: dict) -> dict:
+        """
+        Returns the summary of a list, loading its tasks if it is missing.
+        """
+        summary = list_data.get('summary')
+        if summary is None or 'recurring' not in summary:
+            # Loading the tasks checks and rebuilds the summary
+            list_data['tasks']
+            summary = list_data['summary']
+        return summary
+
+    def _lists_due(self, start: float, end: float,
+                   keys: tuple = ('pending', 'recurring')):
+        """
+        Yields the (list_name, list_data) of every list whose summary holds
+        an occurrence due after start and up to end, looking at the current
+        occurrences ('pending') and the next ones ('recurring').
+        """
+        lists = self.user_data.get()['lists']
+        for list_name, list_data in list(lists.items()):
+            summary = self._summary(list_data)
+            if any(
+                bisect.bisect_right(values, end) > bisect.bisect_right(values, start)
+                for values in map(summary.get, keys)
+            ):
+                yield list_name, list_data
+
+    def _find_due(self, start: float, end: float) -> list:
+        """
+        Returns the (due, list_name, task_id, task_name, index) of every
+        occurrence of an unfinished task due after start and up to end.
+        Only the lists whose summary holds such an occurrence are read.
+        The data is locked while it is read, as this runs on the scheduler
+        thread while the UI changes the tasks.
+        """
+        found = []
+        with self.user_data.locked():
+            for list_name, list_data in self._lists_due(start, end):
+                for task_id, task_data in list_data['tasks'].items():
+                    if task_data['completed']:
+                        continue
+                    dues = recurrence.occurrences(task_data)
+                    for index, due in enumerate(dues):
+                        if start < due <= end:
+                            found.append((
+                                due, list_name, task_id, task_data['name'],
+                                index
+                            ))
+        return found
+
+    def _roll_overdue(self, now: float):
+        """
+        Rolls every unfinished recurring task whose next occurrence became
+        due while the app was closed forward to its latest due occurrence.
+        """
+        with self.user_data.locked():
+            operations = []
+            for list_name, list_data in self._lists_due(
+                float('-inf'), now, keys=('recurring',)
+            ):
+                for task_id, task_data in list_data['tasks'].items():
+                    if (not task_data['completed']
+                            and task_data.get('recurrence')
+                            and task_data['next_due'] <= now):
+                        operations.append((
+                            'set_task', list_name, task_id,
+                            recurrence.roll(task_data, now, completed=False)
+                        ))
+            if operations:
+                self.user_data.commit(operations)
+
+    def start(self) -> list:
+        """
+        Arms every reminder due before the horizon and returns the
+        (due, list_name, task_name) of the reminders which became due since
+        the user was last active, oldest first.
+        """
+        now = time.time()
+        last_active = self.user_data.get().get('last_active')
+
+        missed = []
+        if last_active is not None and last_active < now:
+            missed = sorted(
+                (due, list_name, task_name)
+                for due, list_name, _, task_name, _ in self._find_due(last_active, now)
+            )
+
+        self._roll_overdue(now)
+        self.user_data.set_meta('last_active', now)
+        self._extend(now)
+        return missed
+
+    def _extend(self, start: float = None):
+        """
+        Arms the reminders due between start, or the end of the current
+        horizon, and a full horizon from now. Schedules itself to run again
+        once half of the new horizon has passed.
+        """
+        now = time.time()
+        until = now + self.horizon
+        with self._lock:
+            if start is None:
+                start = self._until if self._until is not None else now
+            # Changes made while the lists are read are armed by _on_change
+            self._until = until
+
+        found = self._find_due(start, until)
+        with self._lock:
+            for due, list_name, task_id, task_name, index in found:
+                self._arm(list_name, task_id, task_name, due, index)
+            self.scheduler.schedule(
+                self._extend_key, now + self.horizon / 2, None,
+                lambda _: self._extend()
+            )
+
+    def _arm(self, list_name: str, task_id: str, task_name: str, due: float,
+             index: int):
+        """
+        Schedules the reminder of an occurrence of a task.
+        """
+        self._armed.setdefault(list_name, set()).add(task_id)
+        self.scheduler.schedule(
+            (task_id, index), due, task_name,
+            lambda name: self._fire(list_name, task_id, name, due, index)
+        )
+
+    def _arm_task(self, list_name: str, task_id: str, task_data: dict):
+        """
+        Schedules the reminders of a changed task's occurrences due between
+        now and the end of the horizon. Occurrences which were already due
+        when the task changed are not reminded again.
+        """
+        self._disarm(list_name, task_id)
+        if task_data['completed']:
+            return
+
+        now = time.time()
+        for index, due in enumerate(recurrence.occurrences(task_data)):
+            if now < due <= self._until:
+                self._arm(list_name, task_id, task_data['name'], due, index)
+
+    def _disarm(self, list_name: str, task_id: str):
+        """
+        Cancels the reminders of a task if they are armed.
+        """
+        self._armed.get(list_name, set()).discard(task_id)
+        self.scheduler.cancel((task_id, 0))
+        self.scheduler.cancel((task_id, 1))
+
+    def _disarm_list(self, list_name: str):
+        """
+        Cancels the reminders of every task of a list.
+        """
+        for task_id in self._armed.pop(list_name, ()):
+            self.scheduler.cancel((task_id, 0))
+            self.scheduler.cancel((task_id, 1))
+
+    def _fire(self, list_name: str, task_id: str, task_name: str, due: float,
+              index: int):
+        """
+        Calls fn for a due occurrence unless the task changed since it was
+        armed, and records the user as active up to it, so it is not
+        reported as missed at the next start. A recurring task whose next
+        occurrence became due rolls forward to it. Runs on the scheduler
+        thread, so the task is checked and written with the data locked.
+        """
+        with self.user_data.locked() as data:
+            list_data = data['lists'].get(list_name)
+            task_data = list_data['tasks'].get(task_id) if list_data else None
+            if task_data is None or task_data['completed']:
+                return
+            dues = recurrence.occurrences(task_data)
+            if index >= len(dues) or dues[index] != due:
+                return
+
+            if index == 1:
+                self.user_data.set_task(
+                    list_name, task_id,
+                    recurrence.roll(task_data, time.time(), completed=False)
+                )
+            if due > data.get('last_active', 0):
+                self.user_data.set_meta('last_active', due)
+
+        self.fn(task_name)
+
+    def _on_change(self, operations):
+        """
+        Arms, moves or cancels the reminders of the tasks the operations
+        changed. A reload of the whole data re-arms the horizon on the
+        scheduler thread, as re-reading every list here could block a write.
+        """
+        with self._lock:
+            if self._until is None:
+                return
+            if operations is None:
+                for list_name in list(self._armed):
+                    self._disarm_list(list_name)
+                self._until = None
+                self.scheduler.schedule(
+                    self._extend_key, time.time(), None,
+                    lambda _: self._extend(time.time())
+                )
+                return
+
+            for kind, list_name, *args in operations:
+                if kind == 'set_list':
+                    self._disarm_list(list_name)
+                    for task_id, task_data in args[0]['tasks'].items():
+                        self._arm_task(list_name, task_id, task_data)
+                elif kind == 'delete_list':
+                    self._disarm_list(list_name)
+                elif kind == 'set_task':
+                    self._arm_task(list_name, *args)
+                elif kind == 'delete_task':
+                    self._disarm(list_name, args[0])
+
+    def close(self):
+        """
+        Stops following the data, cancels every reminder and records when
+        the user was last active.
+        """
+        self.user_data.remove_listener(self._on_change)
+        with self._lock:
+            for list_name in list(self._armed):
+                self._disarm_list(list_name)
+            self.scheduler.cancel(self._extend_key)
+            self._until = None
+        self.user_data.set_meta('last_active', time.time())
@@ -0,0 +1,168 @@
+"""
+This module versions the shape of the user data. Every data file carries the
+schema version it was written with, and so does every list inside it. Older
+data is upgraded by registered migration steps, lazily and one list at a time,
+the first time it is opened.
+
+Run as a script to upgrade every user's data before a release:
+    python schema.py [workers]
+
+Imports:
+- os: For finding the users in the data folder.
+- sys: For the migrator command line arguments.
+- utility: For parsing due dates into timestamps.
+- concurrent.futures: For upgrading users in parallel.
+
+Attributes:
+- SCHEMA_VERSION (int): The version of the data shape this code writes.
+- DATA_MIGRATIONS (dict): Steps upgrading the top-level data, by version.
+- LIST_MIGRATIONS (dict): Steps upgrading a single list, by version.
+
+Functions:
+- migration(version: int, scope: str): Registers a migration step.
+- upgrade_data(data: dict): Applies pending top-level steps.
+- upgrade_list(list_data: dict): Applies pending steps to one list.
+- find_usernames(folder: str): Returns every user with data in a folder.
+- migrate_user(username: str): Upgrades all of a user's lists.
+- migrate_all(workers: int): Upgrades every user in parallel.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import os
+import sys
+import utility as util
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+SCHEMA_VERSION = 2
+
+DATA_MIGRATIONS = {}
+LIST_MIGRATIONS = {}
+
+
+def migration(version: int, scope: str = 'list'):
+    """
+    Registers a step which upgrades data to the given version. List steps
+    receive a single list with its tasks, data steps the top-level data.
+    """
+    registry = LIST_MIGRATIONS if scope == 'list' else DATA_MIGRATIONS
+
+    def register(step):
+        if version in registry:
+            raise ValueError(f'A {scope} migration to {version} already exists')
+        registry[version] = step
+        return step
+    return register
+
+
+def _run_steps(target: dict, registry: dict) -> bool:
+    """
+    Runs the steps between the target's version and the current version.
+    Returns True if the target was upgraded.
+    """
+    version = target.get('version', 0)
+    if version > SCHEMA_VERSION:
+        raise ValueError(
+            f'Data version {version} is newer than supported {SCHEMA_VERSION}')
+    if version == SCHEMA_VERSION:
+        return False
+
+    for step_version in range(version + 1, SCHEMA_VERSION + 1):
+        step = registry.get(step_version)
+        if step:
+            step(target)
+    target['version'] = SCHEMA_VERSION
+    return True
+
+
+def upgrade_data(data: dict) -> bool:
+    """
+    Applies the pending top-level steps. Lists are left to upgrade_list.
+    """
+    return _run_steps(data, DATA_MIGRATIONS)
+
+
+def upgrade_list(list_data: dict) -> bool:
+    """
+    Applies the pending steps to one list and its tasks.
+    """
+    return _run_steps(list_data, LIST_MIGRATIONS)
+
+
+@migration(1)
+def normalise_legacy_tasks(list_data: dict):
+    """
+    Stamps unversioned lists, filling in fields early versions could omit.
+    """
+    for task_data in list_data['tasks'].values():
+        task_data.setdefault('description', '')
+        task_data['priority'] = str(task_data.get('priority') or 1)
+
+
+@migration(2)
+def backfill_due_timestamps(list_data: dict):
+    """
+    Parses the due date strings of every task once into a due timestamp.
+    """
+    for task_data in list_data['tasks'].values():
+        if 'due' not in task_data and task_data.get('due_date'):
+            task_data['due'] = util.due_timestamp(task_data['due_date'])
+
+
+def find_usernames(folder: str) -> list:
+    """
+    Returns every user with data in the folder, whatever engine stored it.
+    """
+    suffixes = (
+        '_data.pkl', '_data.journal', '_data.db', '_data'
+    )
+    usernames = set()
+    for name in os.listdir(folder):
+        for suffix in suffixes:
+            if name.endswith(suffix):
+                usernames.add(name[:-len(suffix)])
+                break
+    return sorted(usernames)
+
+
+def migrate_user(username: str) -> tuple:
+    """
+    Upgrades all of a user's lists and writes them back.
+    Returns the username and the number of writes it took.
+    """
+    # Importing data here to prevent circular imports
+    import model
+    from data import Data
+
+    user_data = Data(username, write_behind=False)
+    try:
+        writes = user_data.stats['writes']
+        model.load_all(user_data.get())
+        return username, user_data.stats['writes'] - writes
+    finally:
+        user_data.close()
+
+
+def migrate_all(workers: int = None) -> list:
+    """
+    Upgrades every user in the data folder in parallel.
+    """
+    # Importing data here to prevent circular imports
+    from data import Data
+
+    if not os.path.exists(Data.DATA_FOLDER):
+        return []
+    usernames = find_usernames(Data.DATA_FOLDER)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(migrate_user, usernames))
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    for username, upgraded in migrate_all(workers):
+        print(f'{username}: {upgraded} write(s)')
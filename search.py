@@ -0,0 +1,244 @@
+"""
+This module provides the "SearchIndex" class, an inverted index over the names
+and descriptions of every task across all of a user's lists. Like the agenda's
+due index it is built the first time it is used and then kept up to date from
+the changes "Data" reports, so a search never scans the tasks.
+
+Every word typed is matched as a prefix, so results appear while typing.
+
+Imports:
+- bisect: For finding the words which start with a prefix.
+- re: For splitting text into words.
+- threading: For guarding the index against the background writer.
+- model: For loading every list when the index is built.
+
+Classes:
+- SearchIndex: Finds tasks across every list by the words they contain.
+
+Attributes:
+- WORD (re.Pattern): Matches a single word.
+
+Functions:
+- tokenize(text: str): Returns the case-folded words of a text.
+
+Methods:
+- __init__(self, user_data): Initializes the index and follows the data.
+- prepare(self): Builds the index on a background thread.
+- search(self, query: str, limit: int): Returns the tasks matching a query.
+- close(self): Stops following the data and waits for a build.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import bisect
+import re
+import threading
+import model
+
+
+WORD = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> set:
+    """
+    Returns the set of case-folded words in a text.
+    """
+    return set(WORD.findall(text.casefold()))
+
+
+class SearchIndex:
+    """
+    Maps every word to the (list_name, task_id) of the tasks containing it.
+    The distinct words are also kept sorted, so the words starting with a
+    prefix are found with a binary search.
+    """
+
+    def __init__(self, user_data):
+        """
+        Initializes the index for a user's data and follows its changes.
+        """
+        self.user_data = user_data
+        self._postings = {}
+        self._words = []
+        self._documents = {}
+        self._lists = {}
+        self._built = False
+        self._lock = threading.RLock()
+        self._thread = None
+
+        user_data.add_listener(self._on_change)
+
+    def _ensure_built(self):
+        """
+        Builds the index from every list the first time it is needed, and
+        returns at once after that. The tasks are copied while the data is
+        locked, as the build may run on a background thread while the UI
+        changes them. Lists are loaded before the index is locked, as
+        loading a list may commit an upgrade which is reported back to the
+        index.
+        """
+        with self._lock:
+            if self._built:
+                return
+
+        with self.user_data.locked() as data:
+            model.load_all(data)
+            lists = {
+                list_name: list(list_data['tasks'].items())
+                for list_name, list_data in data['lists'].items()
+            }
+            # Locked before the data is released, so changes made after
+            # the copy wait for the build instead of being missed
+            self._lock.acquire()
+
+        try:
+            # Another thread may have built the index in the meantime
+            if self._built:
+                return
+
+            self._postings, self._documents, self._lists = {}, {}, {}
+            for list_name, tasks in lists.items():
+                for task_id, task_data in tasks:
+                    self._add(list_name, task_id, task_data, sort=False)
+            self._words = sorted(self._postings)
+            self._built = True
+        finally:
+            self._lock.release()
+
+    def prepare(self):
+        """
+        Builds the index on a background thread, so the first search of a
+        large account does not wait for it.
+        """
+        if self._built or (self._thread and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._ensure_built, daemon=True)
+        self._thread.start()
+
+    def _on_change(self, operations):
+        """
+        Applies the operations reported by the data to the index. A reload
+        of the whole data drops the index until it is next used.
+        """
+        with self._lock:
+            if not self._built:
+                return
+            if operations is None:
+                self._built = False
+                return
+
+            for kind, list_name, *args in operations:
+                if kind == 'set_list':
+                    self._remove_list(list_name)
+                    for task_id, task_data in args[0]['tasks'].items():
+                        self._add(list_name, task_id, task_data)
+                elif kind == 'delete_list':
+                    self._remove_list(list_name)
+                elif kind == 'set_task':
+                    self._remove(list_name, args[0])
+                    self._add(list_name, *args)
+                elif kind == 'delete_task':
+                    self._remove(list_name, args[0])
+
+    def _add(self, list_name: str, task_id: str, task_data: dict, sort=True):
+        """
+        Adds the words of a task's name and description to the index.
+        """
+        key = (list_name, task_id)
+        words = tokenize(f"{task_data['name']} {task_data.get('description', '')}")
+        self._documents[key] = words
+        self._lists.setdefault(list_name, set()).add(task_id)
+
+        for word in words:
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = set()
+                if sort:
+                    bisect.insort(self._words, word)
+            postings.add(key)
+
+    def _remove(self, list_name: str, task_id: str):
+        """
+        Removes a task's words from the index.
+        """
+        key = (list_name, task_id)
+        words = self._documents.pop(key, None)
+        if words is None:
+            return
+        self._lists.get(list_name, set()).discard(task_id)
+
+        for word in words:
+            postings = self._postings[word]
+            postings.discard(key)
+            if not postings:
+                del self._postings[word]
+                del self._words[bisect.bisect_left(self._words, word)]
+
+    def _remove_list(self, list_name: str):
+        """
+        Removes every task of a list.
+        """
+        for task_id in list(self._lists.pop(list_name, ())):
+            self._remove(list_name, task_id)
+
+    def _iter_prefix(self, prefix: str):
+        """
+        Yields the keys of every task with a word starting with the prefix.
+        A task with several such words may be yielded more than once.
+        """
+        words = self._words
+        for index in range(bisect.bisect_left(words, prefix), len(words)):
+            if not words[index].startswith(prefix):
+                return
+            yield from self._postings[words[index]]
+
+    def search(self, query: str, limit: int = 50) -> list:
+        """
+        Returns the (list_name, task_id, task_data) of up to limit tasks with
+        a word starting with every word of the query. The longest word drives
+        the search, as it usually matches the fewest tasks, and the search
+        stops as soon as enough tasks are found.
+        """
+        terms = sorted(tokenize(query), key=len, reverse=True)
+        if not terms:
+            return []
+
+        lists = self.user_data.get()['lists']
+        self._ensure_built()
+        with self._lock:
+            found = []
+            seen = set()
+            for key in self._iter_prefix(terms[0]):
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                words = self._documents[key]
+                if all(
+                    any(word.startswith(term) for word in words)
+                    for term in terms[1:]
+                ):
+                    found.append(key)
+                    if len(found) >= limit:
+                        break
+
+        results = []
+        for list_name, task_id in found:
+            task_data = (
+                lists[list_name]['tasks'].get(task_id)
+                if list_name in lists else None
+            )
+            if task_data is not None:
+                results.append((list_name, task_id, task_data))
+        return results
+
+    def close(self):
+        """
+        Stops following the data and waits for a running build to finish.
+        """
+        self.user_data.remove_listener(self._on_change)
+        if self._thread and self._thread.is_alive():
+            self._thread.join()
@@ -0,0 +1,178 @@
+"""
+This module provides the "Session" class, which owns everything that lives
+for as long as a user is logged in: their data, the reminder scheduler, the
+derived indexes and every worker thread started on their behalf. Closing the
+session tears all of it down in a fixed order, so nothing started for one
+user keeps running after logout or after the window is closed. Deleting a
+list needs no teardown here, as the reminders and indexes drop its tasks when
+"Data" reports the deletion.
+
+In debug mode closing a session fails with an AssertionError naming every
+thread it started which is still running.
+
+Imports:
+- threading: For the worker threads and finding leaked ones.
+- constants: Contains the session settings.
+- Data: For the user's data.
+- DueIndex: For the agenda's index of due tasks.
+- SearchIndex: For the index behind task search.
+- Reminders: For arming the reminders of tasks due soon.
+- Scheduler: For running the reminders.
+
+Classes:
+- Session: Owns and tears down the state of a logged in user.
+
+Methods:
+- __init__(self, username: str): Opens the user's data and indexes.
+- start_reminders(self, fn): Arms the reminders and returns missed ones.
+- spawn(self, target, *args, stop): Starts a worker thread.
+- track(self, thread, stop): Adopts a thread started elsewhere.
+- add_cleanup(self, fn): Registers a function run at teardown.
+- leaked_threads(self): Returns threads started since it opened still running.
+- close(self): Tears down everything the session owns.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import threading
+import constants
+
+from data import Data
+from agenda import DueIndex
+from search import SearchIndex
+from reminders import Reminders
+from timer import Scheduler
+
+
+class Session:
+    """
+    Owns the data, scheduler, indexes, worker threads and cleanups of a
+    logged in user, and tears them all down when it is closed.
+    """
+
+    def __init__(self, username: str):
+        """
+        Opens the user's data and the indexes which follow it.
+        """
+        self.username = username
+        self.debug = constants.Session['Debug']
+        self.join_timeout = constants.Session['JoinTimeout']
+
+        self.user_data = Data(username)
+        self.scheduler = Scheduler()
+        self.due_index = DueIndex(self.user_data)
+        self.search_index = SearchIndex(self.user_data)
+        self.reminders = None
+
+        self._threads = []
+        self._cleanups = []
+        self._closed = False
+        self._lock = threading.Lock()
+        self._baseline = set(threading.enumerate())
+
+    def start_reminders(self, fn) -> list:
+        """
+        Arms the reminders of tasks due soon, calling fn(name) as each becomes
+        due, and returns the reminders missed while the app was closed.
+        """
+        self.reminders = Reminders(self.user_data, self.scheduler, fn)
+        return self.reminders.start()
+
+    def spawn(self, target, *args, stop=None) -> threading.Thread:
+        """
+        Starts a daemon thread running target(*args) which the session waits
+        for at teardown, calling stop() first if given. Returns None once
+        the session is closed.
+        """
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        if not self.track(thread, stop):
+            return None
+        thread.start()
+        return thread
+
+    def track(self, thread: threading.Thread, stop=None) -> bool:
+        """
+        Adopts a thread, started or not, so the session waits for it at
+        teardown, calling stop() first to ask it to finish if given.
+        Returns False if the session is already closed.
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            self._threads[:] = [
+                (other, other_stop) for other, other_stop in self._threads
+                if other.is_alive() or not other.ident
+            ]
+            self._threads.append((thread, stop))
+            return True
+
+    def add_cleanup(self, fn):
+        """
+        Registers fn to run at teardown. Cleanups run in the reverse order
+        they were added, and straight away once the session is closed.
+        """
+        with self._lock:
+            if not self._closed:
+                self._cleanups.append(fn)
+                return
+        fn()
+
+    def _teardown(self):
+        """
+        Runs the cleanups and asks the worker threads to stop, then waits
+        for them to finish.
+        """
+        with self._lock:
+            cleanups, self._cleanups = self._cleanups, []
+            threads, self._threads = self._threads, []
+
+        for fn in reversed(cleanups):
+            fn()
+        for thread, stop in threads:
+            if stop:
+                stop()
+        for thread, _ in threads:
+            if thread.ident and thread is not threading.current_thread():
+                thread.join(self.join_timeout)
+
+    def leaked_threads(self) -> list:
+        """
+        Returns every thread started since the session opened, by the
+        session or anything else, which is still running.
+        """
+        current = threading.current_thread()
+        return [
+            thread for thread in threading.enumerate()
+            if thread not in self._baseline and thread is not current
+        ]
+
+    def close(self):
+        """
+        Tears down everything the session owns: reminders first, while the
+        data is still open to record when the user left, then the cleanups
+        and worker threads, the scheduler and indexes, and finally the data,
+        which writes any changes still queued. Closing twice does nothing.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        if self.reminders:
+            self.reminders.close()
+        self._teardown()
+
+        self.scheduler.close()
+        self.search_index.close()
+        self.due_index.close()
+        self.user_data.close()
+
+        if self.debug:
+            leaked = self.leaked_threads()
+            assert not leaked, (
+                f'Session of {self.username} leaked threads: '
+                + ', '.join(thread.name for thread in leaked)
+            )
@@ -0,0 +1,277 @@
+"""
+This module provides the "ShardedStorage" class, a storage engine for "Data"
+which keeps each list's tasks in its own shard file next to a small manifest
+holding the list records, including their summaries. Both are written in the
+shape of the user data, so any codec can encode them. Task bodies are only read
+when a list is opened, and a commit only rewrites the shards it touched.
+
+Imports:
+- os: For file and directory operations.
+- threading: For guarding the shard bookkeeping.
+- contextlib: For reading shards without a file lock.
+- codec: For encoding the manifest and shards.
+- utility: For generating shard ids.
+- PickleStorage: For reading legacy data files during migration.
+
+Classes:
+- LazyList: A list record which reads its tasks from a shard on first access.
+- ShardedStorage: Persists user data as a manifest plus one shard per list.
+
+Methods:
+- __init__(self, folder: str, codec_name: str = 'pickle', legacy_path: str = None,
+           file_lock=None):
+    Initializes the storage and migrates a legacy data file.
+- stamp(self): Returns a stamp that changes whenever the manifest changes.
+- read(self): Loads the manifest, leaving every list's tasks unread.
+- write(self, obj): Rewrites the manifest and every shard.
+- prepare(self, data, operations): Encodes the manifest and touched shards.
+- persist(self, prepared): Writes the encoded files and removes stale shards.
+- close(self): Releases any resources held by the storage.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import os
+import threading
+import codec
+import utility as util
+
+from contextlib import nullcontext
+from storage import PickleStorage, file_stamp, write_atomic
+
+
+class LazyList(dict):
+    """
+    A list record whose 'tasks' entry is read from its shard the first
+    time it is accessed. Until then the rest of the record, including
+    its summary, is available from the manifest.
+    """
+
+    def __init__(self, record: dict, loader):
+        """
+        Initializes the list record with its shard loader. The on_load
+        callback, if set, runs once the tasks have been read.
+        """
+        super().__init__(record)
+        self.on_load = None
+        self._loader = loader
+
+    def __missing__(self, key):
+        """
+        Reads the tasks from the shard when they are first accessed.
+        """
+        if key != 'tasks':
+            raise KeyError(key)
+        tasks = self._loader()
+        self['tasks'] = tasks
+        if self.on_load:
+            self.on_load(self)
+        return tasks
+
+    def __reduce__(self):
+        """
+        Pickles as a plain dictionary with the tasks loaded.
+        """
+        self['tasks']
+        return (dict, (dict(self),))
+
+
+class ShardedStorage:
+    """
+    Stores user data as a manifest plus one shard file per list. The
+    manifest holds every list record with its summary and its shard id,
+    so the list overview never has to read a single task.
+    """
+
+    # Constants
+    MANIFEST_NAME = 'manifest'
+    SHARD_SUFFIX = '.shard'
+
+    def __init__(
+        self,
+        folder: str,
+        codec_name: str = 'pickle',
+        legacy_path: str = None,
+        file_lock=None
+    ):
+        """
+        Initializes the storage in a folder. An existing single file data
+        file is split into shards once and then renamed out of the way.
+        The file lock, if given, is held shared while a shard is read.
+        """
+        self.folder = folder
+        self.codec_name = codec_name
+        self.file_lock = file_lock
+        self.manifest_path = os.path.join(folder, self.MANIFEST_NAME)
+        self._lock = threading.RLock()
+        self._shards = {}
+
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        if (
+            not os.path.exists(self.manifest_path)
+            and legacy_path and os.path.exists(legacy_path)
+        ):
+            legacy_data = PickleStorage(legacy_path).read()
+            if legacy_data is not None:
+                self.write(legacy_data)
+            os.replace(legacy_path, legacy_path + '.migrated')
+
+    def _get_shard_path(self, shard_id: str) -> str:
+        """
+        Constructs the file path of a shard.
+        """
+        return os.path.join(self.folder, shard_id + self.SHARD_SUFFIX)
+
+    def _read_shard(self, shard_id: str) -> dict:
+        """
+        Reads the tasks of a list from its shard. Shards hold a single list
+        in the shape of the user data, so every codec can encode them.
+        A missing or unreadable shard raises rather than reading as an
+        empty list, which the next save would write over the real tasks.
+        """
+        shared = self.file_lock.shared() if self.file_lock else nullcontext()
+        with shared:
+            with open(self._get_shard_path(shard_id), "rb") as file:
+                shard = codec.decode(file.read())
+        return next(iter(shard['lists'].values()))['tasks']
+
+    def stamp(self):
+        """
+        Returns a stamp that changes whenever the manifest changes.
+        Every commit rewrites the manifest, so this covers the shards too.
+        """
+        return file_stamp(self.manifest_path)
+
+    def read(self):
+        """
+        Loads the manifest and returns the user data with every list's
+        tasks left unread until they are accessed.
+        """
+        try:
+            with open(self.manifest_path, "rb") as file:
+                manifest = codec.decode(file.read())
+        except FileNotFoundError:
+            return None
+
+        lists = manifest.pop('lists')
+        data = dict(manifest, lists={})
+        with self._lock:
+            self._shards = {}
+            for list_key, record in lists.items():
+                shard_id = record.pop('shard')
+                record.pop('tasks', None)
+
+                self._shards[list_key] = shard_id
+                data['lists'][list_key] = LazyList(
+                    record,
+                    lambda shard_id=shard_id: self._read_shard(shard_id)
+                )
+        return data
+
+    def write(self, obj):
+        """
+        Rewrites the manifest and every shard.
+        """
+        with self._lock:
+            self._shards = {}
+        self.persist(self.prepare(obj, [('replace', None)]))
+
+    def prepare(self, data, operations: list) -> tuple:
+        """
+        Encodes the manifest and the shards of every list the operations
+        touched. Lists whose tasks were never loaded keep their shard.
+        """
+        touched = set()
+        rewrite_all = False
+        for kind, list_name, *_ in operations:
+            if kind == 'replace':
+                rewrite_all = True
+            else:
+                touched.add(list_name)
+
+        # Loading a list may run its on_load callback, which can commit
+        # and come back into prepare, so tasks are loaded before locking
+        with self._lock:
+            known = set(self._shards)
+        for list_key, list_data in list(data['lists'].items()):
+            if rewrite_all or list_key not in known or list_key in touched:
+                list_data['tasks']
+
+        with self._lock:
+            shards = {}
+            for list_key, list_data in data['lists'].items():
+                is_new = list_key not in self._shards
+                if is_new:
+                    self._shards[list_key] = util.generate_unique_id()
+
+                if rewrite_all or is_new or list_key in touched:
+                    tasks = list_data['tasks']
+                    shards[self._shards[list_key]] = codec.encode(
+                        {'lists': {list_key: dict(list_data, tasks=tasks)}},
+                        self.codec_name
+                    )
+
+            removed = [
+                self._shards.pop(list_key) for list_key in list(self._shards)
+                if list_key not in data['lists']
+            ]
+
+            manifest = {
+                key: value for key, value in data.items() if key != 'lists'
+            }
+            manifest['lists'] = {
+                list_key: dict(
+                    {
+                        key: value for key, value in list_data.items()
+                        if key != 'tasks'
+                    },
+                    tasks={},
+                    shard=self._shards[list_key]
+                )
+                for list_key, list_data in data['lists'].items()
+            }
+            return (
+                shards,
+                codec.encode(manifest, self.codec_name),
+                removed,
+                rewrite_all and set(self._shards.values())
+            )
+
+    def persist(self, prepared: tuple):
+        """
+        Writes the touched shards before the manifest which references
+        them, then removes the shards of deleted lists.
+        """
+        shards, manifest, removed, keep = prepared
+
+        for shard_id, payload in shards.items():
+            write_atomic(self._get_shard_path(shard_id), payload)
+        write_atomic(self.manifest_path, manifest)
+
+        if keep:
+            removed = [
+                name[:-len(self.SHARD_SUFFIX)] for name in os.listdir(self.folder)
+                if name.endswith(self.SHARD_SUFFIX)
+                and name[:-len(self.SHARD_SUFFIX)] not in keep
+            ]
+        for shard_id in removed:
+            try:
+                os.remove(self._get_shard_path(shard_id))
+            except FileNotFoundError:
+                pass
+
+    def commit(self, data, operations: list):
+        """
+        Prepares and persists a batch of operations.
+        """
+        self.persist(self.prepare(data, operations))
+
+    def close(self):
+        """
+        Releases any resources held by the storage.
+        """
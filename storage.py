@@ -0,0 +1,151 @@
+"""
+This module provides the "PickleStorage" class, the default storage engine
+used by "Data". It keeps a user's data in a single file which is rewritten
+in full on every commit, encoded by one of the codecs in the "codec" module.
+
+Every engine commits in two steps. "prepare" captures what needs to be written
+and must be called while the data is not being mutated, while "persist" does
+the disk I/O and can safely run on a background thread afterwards.
+
+Imports:
+- os: For file and directory operations.
+- threading: For naming temporary files per thread.
+- codec: For encoding and decoding the data file.
+
+Functions:
+- file_stamp(path: str): Returns the (mtime, size, inode) stamp of a file.
+- fsync_directory(path: str): Flushes a directory entry to disk.
+- write_atomic(path: str, payload: bytes): Replaces a file without ever
+                                           leaving it half written.
+
+Classes:
+- PickleStorage: Persists user data as one file.
+
+Methods:
+- __init__(self, path: str, codec_name: str = 'pickle'): Initializes the
+                                                         storage for a data file.
+- stamp(self): Returns a stamp that changes whenever the file changes.
+- read(self): Loads the user data, or None if no file exists.
+- write(self, obj): Rewrites the whole data file.
+- prepare(self, data, operations): Captures a batch of operations to persist.
+- persist(self, prepared): Writes a prepared batch to disk.
+- commit(self, data, operations): Prepares and persists a batch of operations.
+- close(self): Releases any resources held by the storage.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import os
+import threading
+import codec
+
+
+def file_stamp(path: str):
+    """
+    Returns the (mtime, size, inode) stamp of a file, or None if the
+    file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def fsync_directory(path: str):
+    """
+    Flushes a directory entry to disk so a rename inside it survives a crash.
+    Platforms that cannot open directories are skipped.
+    """
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(path or '.', os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path: str, payload: bytes):
+    """
+    Writes the payload to a temporary file and renames it over the target,
+    so readers and crashes only ever see the old or the new contents. The
+    temporary file is unique to the process and thread, so concurrent
+    writers never write into each other's temporary file.
+    """
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(temp_path, "wb") as file:
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    fsync_directory(os.path.dirname(path))
+
+
+class PickleStorage:
+    """
+    Stores user data as a single file. Every commit rewrites the
+    whole file, regardless of how small the change is.
+    """
+
+    def __init__(self, path: str, codec_name: str = 'pickle'):
+        """
+        Initializes the storage for a data file, written with the named codec.
+        """
+        self.path = path
+        self.codec_name = codec_name
+
+    def stamp(self):
+        """
+        Returns a stamp that changes whenever the data file changes.
+        """
+        return file_stamp(self.path)
+
+    def read(self):
+        """
+        Loads and deserializes the user data, or returns None
+        if the file does not exist. Files written by any codec are read.
+        """
+        try:
+            with open(self.path, "rb") as file:
+                return codec.decode(file.read())
+        except FileNotFoundError:
+            return None
+
+    def write(self, obj):
+        """
+        Serializes and rewrites the whole data file.
+        """
+        self.persist(self.prepare(obj, []))
+
+    def prepare(self, data, operations: list):
+        """
+        Captures a batch of operations to persist. The data already has
+        the operations applied, so this engine serializes all of it.
+        """
+        return codec.encode(data, self.codec_name)
+
+    def persist(self, prepared):
+        """
+        Writes a prepared batch to disk.
+        """
+        write_atomic(self.path, prepared)
+
+    def commit(self, data, operations: list):
+        """
+        Prepares and persists a batch of operations.
+        """
+        self.persist(self.prepare(data, operations))
+
+    def close(self):
+        """
+        Releases any resources held by the storage.
+        """
@@ -0,0 +1,53 @@
+"""
+Shared setup for the tests. The repository root is put on the import path,
+and the modules kept in files without an extension (constants, timer and
+data) are loaded by path so the tests import them like any other module.
+"""
+
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+for module_name in ('constants', 'timer', 'data'):
+    if module_name not in sys.modules:
+        loader = importlib.machinery.SourceFileLoader(
+            module_name, os.path.join(ROOT, module_name)
+        )
+        spec = importlib.util.spec_from_loader(module_name, loader)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        loader.exec_module(module)
+
+import constants
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Runs a test in an empty folder, where Data keeps its Userdata folder,
+    with background backups turned off.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(constants.Backup, 'Enabled', False)
+    return tmp_path
+
+
+def make_task(name: str, due: float = None, completed: bool = False,
+              **fields) -> dict:
+    """
+    Returns a task as the task editor saves it.
+    """
+    task_data = dict(
+        {'description': '', 'priority': '1'},
+        name=name, completed=completed, **fields
+    )
+    if due is not None:
+        task_data['due'] = due
+    return task_data
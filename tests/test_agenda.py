@@ -0,0 +1,107 @@
+"""
+Tests for the agenda's index of the unfinished tasks due next across every
+list, and for it reading only the lists holding them.
+"""
+
+import time
+
+import pytest
+
+from conftest import make_task
+from data import Data
+from agenda import DueIndex
+
+
+@pytest.fixture
+def user_data(workdir):
+    now = time.time()
+    user_data = Data('alice', engine='sharded', write_behind=False)
+    user_data.set_list('work', {'name': 'Work', 'tasks': {
+        'a': make_task('Overdue', due=now - 60),
+        'b': make_task('Tomorrow', due=now + 86400),
+        'c': make_task('Done', due=now - 120, completed=True),
+    }})
+    user_data.set_list('home', {'name': 'Home', 'tasks': {
+        'd': make_task('Tonight', due=now + 3600),
+    }})
+    user_data.set_list('later', {'name': 'Later', 'tasks': {
+        'e': make_task('Next year', due=now + 365 * 86400),
+    }})
+    user_data.close()
+
+    # Reopened so every list is read from its shard when it is first used
+    user_data = Data('alice', engine='sharded', write_behind=False)
+    yield user_data
+    user_data.close()
+
+
+@pytest.fixture
+def index(user_data):
+    index = DueIndex(user_data)
+    yield index
+    index.close()
+
+
+def names(index: DueIndex, count: int) -> list:
+    """
+    Returns the names of the next count tasks of the agenda.
+    """
+    return [task_data['name'] for *_, task_data in index.upcoming(count)]
+
+
+def loaded(user_data: Data) -> set:
+    """
+    Returns the names of the lists whose tasks have been read.
+    """
+    return {
+        list_name for list_name, list_data in user_data.get()['lists'].items()
+        if 'tasks' in list_data
+    }
+
+
+def test_lists_unfinished_tasks_in_due_order(index):
+    assert names(index, 10) == ['Overdue', 'Tonight', 'Tomorrow', 'Next year']
+    assert names(index, 2) == ['Overdue', 'Tonight']
+    assert names(index, 0) == []
+
+
+def test_counts_overdue_tasks_without_reading_them(index, user_data):
+    assert index.count_overdue() == 1
+    assert loaded(user_data) == set()
+
+
+def test_reads_only_the_lists_holding_the_next_tasks(index, user_data):
+    assert names(index, 1) == ['Overdue']
+    assert loaded(user_data) == {'work'}
+
+    assert names(index, 3) == ['Overdue', 'Tonight', 'Tomorrow']
+    assert loaded(user_data) == {'work', 'home'}
+
+
+def test_follows_changes(index, user_data):
+    now = time.time()
+    names(index, 1)
+    user_data.set_task('work', 'b', make_task('Tomorrow', completed=True))
+    user_data.set_task('later', 'f', make_task('Now', due=now - 3600))
+    user_data.delete_task('work', 'a')
+
+    assert names(index, 2) == ['Now', 'Tonight']
+    assert index.count_overdue() == 1
+
+    user_data.delete_list('home')
+    user_data.set_list('garden', {'name': 'Garden', 'tasks': {
+        'g': make_task('Mow', due=now + 60),
+    }})
+    assert names(index, 10) == ['Now', 'Mow', 'Next year']
+
+
+def test_follows_another_instances_changes(index, user_data):
+    names(index, 10)
+    other = Data('alice', engine='sharded', write_behind=False)
+    try:
+        other.set_task('home', 'h', make_task('First', due=time.time() - 600))
+    finally:
+        other.close()
+
+    assert names(index, 1) == ['First']
+    assert index.count_overdue() == 2
@@ -0,0 +1,103 @@
+"""
+Tests for the cross-process file lock and for "Data" instances sharing a
+user, which reload and reapply their changes when another one wrote.
+"""
+
+import threading
+import time
+
+from conftest import make_task
+from data import Data
+from locking import FileLock
+
+
+def hold(lock: FileLock, exclusive: bool, acquired: threading.Event,
+         release: threading.Event):
+    """
+    Holds a lock on another thread until asked to release it.
+    """
+    with lock.exclusive() if exclusive else lock.shared():
+        acquired.set()
+        release.wait()
+
+
+def wait_time(lock: FileLock, exclusive: bool, other: FileLock,
+              other_exclusive: bool) -> float:
+    """
+    Returns how long taking a lock waits while another holder has the file
+    locked for 0.2 seconds.
+    """
+    acquired, release = threading.Event(), threading.Event()
+    holder = threading.Thread(
+        target=hold, args=(other, other_exclusive, acquired, release)
+    )
+    holder.start()
+    acquired.wait()
+    threading.Timer(0.2, release.set).start()
+
+    start = time.monotonic()
+    with lock.exclusive() if exclusive else lock.shared():
+        waited = time.monotonic() - start
+    release.set()
+    holder.join()
+    return waited
+
+
+def test_exclusive_lock_waits_for_readers(tmp_path):
+    path = str(tmp_path / 'user.lock')
+
+    assert wait_time(FileLock(path), True, FileLock(path), False) >= 0.15
+    assert wait_time(FileLock(path), False, FileLock(path), True) >= 0.15
+
+
+def test_readers_share_the_lock(tmp_path):
+    path = str(tmp_path / 'user.lock')
+
+    assert wait_time(FileLock(path), False, FileLock(path), False) < 0.15
+
+
+def test_version_counts_writes(tmp_path):
+    lock = FileLock(str(tmp_path / 'user.lock'))
+    assert lock.read_version() == 0
+
+    with lock.exclusive():
+        lock.bump_version()
+        assert lock.bump_version() == 2
+    assert FileLock(str(tmp_path / 'user.lock')).read_version() == 2
+
+
+def test_instance_sees_another_instances_write(workdir):
+    first = Data('alice', write_behind=False)
+    second = Data('alice', write_behind=False)
+    try:
+        first.get()
+        second.get()
+        first.set_list('work', {'name': 'Work', 'tasks': {}})
+
+        assert 'work' in second.get()['lists']
+        assert second.stats['reloads'] == 1
+    finally:
+        first.close()
+        second.close()
+
+
+def test_stale_instance_reapplies_its_changes(workdir):
+    first = Data('alice', write_behind=False)
+    second = Data('alice', write_behind=True)
+    try:
+        second.write_delay = 0.5
+        first.set_list('work', {'name': 'Work', 'tasks': {}})
+        second.set_task('work', 'b', make_task('From second'))
+        # Written while the second instance's change waits to be written
+        first.set_task('work', 'a', make_task('From first'))
+        second.flush()
+
+        assert second.stats['conflicts'] == 1
+        reopened = Data('alice', write_behind=False)
+        try:
+            assert set(reopened.get()['lists']['work']['tasks']) == {'a', 'b'}
+        finally:
+            reopened.close()
+    finally:
+        first.close()
+        second.close()
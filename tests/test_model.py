@@ -0,0 +1,105 @@
+"""
+Tests for the mutation operations and the name index and summary every list
+keeps up to date.
+"""
+
+import pytest
+import model
+
+from conftest import make_task
+
+
+def make_data(tasks: dict = None) -> dict:
+    """
+    Returns user data holding one list with the given tasks.
+    """
+    data = model.template()
+    model.apply_operation(
+        data, ('set_list', 'work', {'name': 'Work', 'tasks': dict(tasks or {})})
+    )
+    return data
+
+
+def test_set_list_builds_index_and_summary():
+    data = make_data({
+        'a': make_task('Write Report', due=20.0),
+        'b': make_task('Call Bob', due=10.0, completed=True),
+    })
+    list_data = data['lists']['work']
+
+    assert list_data['name_index'] == {'write report': 'a', 'call bob': 'b'}
+    assert list_data['summary'] == {
+        'total': 2, 'unfinished': 1, 'pending': [20.0], 'recurring': []
+    }
+
+
+def test_summary_follows_task_changes():
+    data = make_data()
+    operations = [
+        ('set_task', 'work', 'a', make_task('A', due=30.0)),
+        ('set_task', 'work', 'b', make_task('B', due=10.0)),
+        ('set_task', 'work', 'c', make_task('C', due=20.0, next_due=40.0,
+                                            recurrence={'frequency': 'daily',
+                                                        'interval': 1})),
+        ('set_task', 'work', 'b', make_task('B', due=10.0, completed=True)),
+        ('delete_task', 'work', 'a'),
+    ]
+    for operation in operations:
+        model.apply_operation(data, operation)
+
+    list_data = data['lists']['work']
+    assert list_data['summary'] == model.summarise_tasks(list_data['tasks'])
+    assert list_data['summary']['pending'] == [20.0]
+    assert list_data['summary']['recurring'] == [40.0]
+    assert not model.ensure_summary(list_data)
+
+
+def test_renaming_a_task_moves_its_index_entry():
+    data = make_data({'a': make_task('Old name')})
+    model.apply_operation(data, ('set_task', 'work', 'a', make_task('New Name')))
+
+    assert data['lists']['work']['name_index'] == {'new name': 'a'}
+    assert not model.ensure_name_index(data['lists']['work'])
+
+
+def test_operations_on_a_missing_list_are_ignored():
+    data = make_data()
+    model.apply_operation(data, ('delete_list', 'work'))
+    model.apply_operation(data, ('set_task', 'work', 'a', make_task('A')))
+    model.apply_operation(data, ('delete_task', 'work', 'a'))
+    model.apply_operation(data, ('delete_list', 'work'))
+
+    assert data['lists'] == {}
+
+
+def test_set_meta_sets_a_top_level_value():
+    data = make_data()
+    model.apply_operation(data, ('set_meta', 'last_active', 5.0))
+
+    assert data['last_active'] == 5.0
+
+
+def test_unknown_operation_raises():
+    with pytest.raises(ValueError):
+        model.apply_operation(make_data(), ('rename_list', 'work'))
+
+
+def test_describe_summary_counts_overdue_tasks():
+    summary = model.summarise_tasks({
+        'a': make_task('A', due=10.0),
+        'b': make_task('B', due=20.0),
+        'c': make_task('C', due=30.0),
+        'd': make_task('D', due=5.0, completed=True),
+    })
+
+    assert model.describe_summary(summary, now=20.0) == {
+        'total': 4, 'unfinished': 3, 'overdue': 2, 'next_due': 30.0
+    }
+    assert model.describe_summary(summary, now=40.0)['next_due'] is None
+
+
+def test_ensure_name_index_rebuilds_a_stale_index():
+    list_data = {'tasks': {'a': make_task('A')}, 'name_index': {'b': 'b'}}
+
+    assert model.ensure_name_index(list_data)
+    assert list_data['name_index'] == {'a': 'a'}
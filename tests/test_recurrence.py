@@ -0,0 +1,129 @@
+"""
+Tests for recurrence rules and how recurring tasks roll forward.
+"""
+
+import pytest
+import recurrence
+
+from datetime import datetime
+
+from conftest import make_task
+
+
+def at(*args) -> float:
+    """
+    Returns the timestamp of a local date and time.
+    """
+    return datetime(*args).timestamp()
+
+
+def test_make_rule_rejects_invalid_rules():
+    with pytest.raises(ValueError):
+        recurrence.make_rule('hourly', at(2024, 1, 1))
+    with pytest.raises(ValueError):
+        recurrence.make_rule('daily', at(2024, 1, 1), interval=0)
+    with pytest.raises(ValueError):
+        recurrence.make_rule('weekly', at(2024, 1, 1), weekdays=[7])
+
+
+def test_daily_keeps_the_time_of_day():
+    rule = recurrence.make_rule('daily', at(2024, 3, 30, 9, 30), interval=2)
+
+    assert recurrence.next_occurrence(rule, at(2024, 3, 30, 9, 30)) == (
+        at(2024, 4, 1, 9, 30)
+    )
+
+
+def test_weekly_on_weekdays():
+    # 1 January 2024 is a Monday
+    rule = recurrence.make_rule('weekly', at(2024, 1, 1, 8), weekdays=[3, 0])
+
+    assert rule['weekdays'] == [0, 3]
+    assert recurrence.next_occurrence(rule, at(2024, 1, 1, 8)) == at(2024, 1, 4, 8)
+    assert recurrence.next_occurrence(rule, at(2024, 1, 4, 8)) == at(2024, 1, 8, 8)
+
+
+def test_weekly_on_weekdays_every_other_week():
+    rule = recurrence.make_rule(
+        'weekly', at(2024, 1, 1, 8), interval=2, weekdays=[0, 3]
+    )
+
+    assert recurrence.next_occurrence(rule, at(2024, 1, 4, 8)) == at(2024, 1, 15, 8)
+
+
+def test_monthly_clamps_to_short_months_and_keeps_its_day():
+    rule = recurrence.make_rule('monthly', at(2024, 1, 31, 12))
+
+    february = recurrence.next_occurrence(rule, at(2024, 1, 31, 12))
+    assert february == at(2024, 2, 29, 12)
+    assert recurrence.next_occurrence(rule, february) == at(2024, 3, 31, 12)
+
+
+def test_schedule_sets_the_next_occurrence():
+    rule = recurrence.make_rule('daily', at(2024, 1, 1, 9))
+    task_data = recurrence.schedule(
+        make_task('Stretch', recurrence=rule), at(2024, 1, 1, 9)
+    )
+
+    assert task_data['next_due'] == at(2024, 1, 2, 9)
+    assert recurrence.occurrences(task_data) == (
+        at(2024, 1, 1, 9), at(2024, 1, 2, 9)
+    )
+    assert recurrence.occurrences(make_task('Once', due=1.0)) == (1.0,)
+
+
+def test_roll_after_completion_moves_past_now():
+    rule = recurrence.make_rule('daily', at(2024, 1, 1, 9))
+    task_data = recurrence.schedule(
+        make_task('Stretch', recurrence=rule), at(2024, 1, 1, 9)
+    )
+
+    rolled = recurrence.roll(task_data, at(2024, 1, 3, 12), completed=True)
+
+    assert rolled['due'] == at(2024, 1, 4, 9)
+    assert rolled['next_due'] == at(2024, 1, 5, 9)
+    assert rolled['completions'] == 1
+    assert not rolled['completed']
+
+
+def test_roll_without_completion_moves_to_latest_due_occurrence():
+    rule = recurrence.make_rule('daily', at(2024, 1, 1, 9))
+    task_data = recurrence.schedule(
+        make_task('Stretch', recurrence=rule), at(2024, 1, 1, 9)
+    )
+
+    rolled = recurrence.roll(task_data, at(2024, 1, 3, 12), completed=False)
+
+    assert rolled['due'] == at(2024, 1, 3, 9)
+    assert rolled['next_due'] == at(2024, 1, 4, 9)
+    assert 'completions' not in rolled
+
+
+def test_describe():
+    rule = recurrence.make_rule(
+        'weekly', at(2024, 1, 1), interval=2, weekdays=[0, 3]
+    )
+
+    assert recurrence.describe(rule) == 'Every 2 weeks on Mon, Thu'
+    assert recurrence.describe({'frequency': 'daily', 'interval': 1}) == (
+        'Every day'
+    )
+
+
+def test_preset_of_keeps_rules_without_a_preset():
+    weekly = recurrence.make_rule('weekly', at(2024, 1, 1))
+    weekdays = recurrence.make_rule(
+        'weekly', at(2024, 1, 1), weekdays=[0, 1, 2, 3, 4]
+    )
+    custom = recurrence.make_rule('weekly', at(2024, 1, 1), weekdays=[2, 0])
+
+    assert recurrence.preset_of(None) == ('Never', None)
+    assert recurrence.preset_of(weekly) == ('Weekly', ('weekly', None))
+    assert recurrence.preset_of(weekdays)[0] == 'Weekdays'
+    assert recurrence.preset_of(custom) == (
+        recurrence.CUSTOM, ('weekly', [0, 2])
+    )
+
+    # Saving the task unchanged builds the same rule again
+    frequency, days = recurrence.preset_of(custom)[1]
+    assert recurrence.make_rule(frequency, at(2024, 1, 8), 1, days) == custom
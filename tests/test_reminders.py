@@ -0,0 +1,143 @@
+"""
+Tests for the reminders armed from a user's data: firing due tasks, following
+edits, collecting the reminders missed while the app was closed and rolling
+recurring tasks forward.
+"""
+
+import threading
+import time
+
+import pytest
+import recurrence
+
+from conftest import make_task
+from data import Data
+from reminders import Reminders
+from timer import Scheduler
+
+
+class Fired:
+    """
+    Collects the names of the tasks reminded, waiting for them to arrive.
+    """
+
+    def __init__(self):
+        self.names = []
+        self._condition = threading.Condition()
+
+    def __call__(self, name: str):
+        with self._condition:
+            self.names.append(name)
+            self._condition.notify_all()
+
+    def wait(self, count: int, timeout: float = 2) -> list:
+        with self._condition:
+            self._condition.wait_for(lambda: len(self.names) >= count, timeout)
+            return list(self.names)
+
+
+@pytest.fixture
+def user_data(workdir):
+    user_data = Data('alice', write_behind=True)
+    user_data.set_list('work', {'name': 'Work', 'tasks': {}})
+    yield user_data
+    user_data.close()
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler()
+    yield scheduler
+    scheduler.close()
+
+
+def test_fires_tasks_as_they_become_due(user_data, scheduler):
+    now = time.time()
+    user_data.set_task('work', 'a', make_task('Soon', due=now + 0.1))
+    user_data.set_task('work', 'b', make_task('Done', due=now + 0.1,
+                                              completed=True))
+    fired = Fired()
+    reminders = Reminders(user_data, scheduler, fired)
+    try:
+        assert reminders.start() == []
+        assert fired.wait(1) == ['Soon']
+        time.sleep(0.1)
+        assert fired.names == ['Soon']
+    finally:
+        reminders.close()
+
+
+def test_follows_edits_and_deletions(user_data, scheduler):
+    now = time.time()
+    user_data.set_task('work', 'a', make_task('Moved', due=now + 60))
+    user_data.set_task('work', 'b', make_task('Deleted', due=now + 0.1))
+    fired = Fired()
+    reminders = Reminders(user_data, scheduler, fired)
+    try:
+        reminders.start()
+        user_data.set_task('work', 'a', make_task('Moved', due=now + 0.2))
+        user_data.delete_task('work', 'b')
+        user_data.set_task('work', 'c', make_task('Added', due=now + 0.1))
+
+        assert fired.wait(2) == ['Added', 'Moved']
+    finally:
+        reminders.close()
+
+
+def test_collects_reminders_missed_while_closed(user_data, scheduler):
+    now = time.time()
+    user_data.set_meta('last_active', now - 3600)
+    user_data.set_task('work', 'a', make_task('Before', due=now - 7200))
+    user_data.set_task('work', 'b', make_task('Second', due=now - 600))
+    user_data.set_task('work', 'c', make_task('First', due=now - 1800))
+    reminders = Reminders(user_data, scheduler, Fired())
+    try:
+        missed = reminders.start()
+    finally:
+        reminders.close()
+
+    assert missed == [
+        (now - 1800, 'work', 'First'), (now - 600, 'work', 'Second')
+    ]
+    assert user_data.get()['last_active'] >= now
+
+
+def test_rolls_recurring_tasks_missed_while_closed(user_data, scheduler):
+    now = time.time()
+    due = now - 2.5 * 86400
+    rule = recurrence.make_rule('daily', due)
+    user_data.set_meta('last_active', now - 3 * 86400)
+    user_data.set_task('work', 'a', recurrence.schedule(
+        make_task('Stretch', recurrence=rule), due
+    ))
+    reminders = Reminders(user_data, scheduler, Fired())
+    try:
+        missed = reminders.start()
+    finally:
+        reminders.close()
+
+    task_data = user_data.get()['lists']['work']['tasks']['a']
+    # Only the stored current and next occurrences are reported
+    assert [name for _, _, name in missed] == ['Stretch'] * 2
+    assert now - 86400 < task_data['due'] <= now
+    assert task_data['next_due'] > now
+
+
+def test_rolls_a_recurring_task_when_its_next_occurrence_fires(
+        user_data, scheduler):
+    now = time.time()
+    rule = {'frequency': 'daily', 'interval': 1}
+    task_data = recurrence.schedule(make_task('Stretch', recurrence=rule),
+                                    now - 86400 + 0.2)
+    user_data.set_task('work', 'a', task_data)
+    fired = Fired()
+    reminders = Reminders(user_data, scheduler, fired)
+    try:
+        reminders.start()
+        assert fired.wait(1) == ['Stretch']
+        user_data.flush()
+    finally:
+        reminders.close()
+
+    rolled = user_data.get()['lists']['work']['tasks']['a']
+    assert rolled['due'] == task_data['next_due']
@@ -0,0 +1,106 @@
+"""
+Tests for the search index over every task of a user: prefix matches, how
+it follows changes to the data and how long a search takes once it is built.
+"""
+
+import time
+
+import pytest
+
+from conftest import make_task
+from data import Data
+from search import SearchIndex
+
+
+@pytest.fixture
+def user_data(workdir):
+    user_data = Data('alice', write_behind=False)
+    user_data.set_list('work', {'name': 'Work', 'tasks': {
+        'a': make_task('Write report', description='Quarterly numbers'),
+        'b': make_task('Call Bob', description='About the report'),
+    }})
+    user_data.set_list('home', {'name': 'Home', 'tasks': {
+        'c': make_task('Repair the fence'),
+    }})
+    yield user_data
+    user_data.close()
+
+
+@pytest.fixture
+def index(user_data):
+    index = SearchIndex(user_data)
+    yield index
+    index.close()
+
+
+def found(index: SearchIndex, query: str) -> set:
+    """
+    Returns the (list_name, task_id) of the tasks matching a query.
+    """
+    return {
+        (list_name, task_id)
+        for list_name, task_id, _ in index.search(query)
+    }
+
+
+def test_matches_every_word_as_a_prefix(index):
+    assert found(index, 'rep') == {
+        ('work', 'a'), ('work', 'b'), ('home', 'c')
+    }
+    assert found(index, 'REPORT quart') == {('work', 'a')}
+    assert found(index, 'report fence') == set()
+    assert found(index, '  ') == set()
+
+
+def test_returns_the_current_tasks(index, user_data):
+    (_, _, task_data), = index.search('fence')
+
+    assert task_data == user_data.get()['lists']['home']['tasks']['c']
+
+
+def test_stops_at_the_limit(index):
+    assert len(index.search('rep', limit=2)) == 2
+
+
+def test_follows_changes(index, user_data):
+    index.search('rep')
+    user_data.set_task('work', 'a', make_task('Write summary'))
+    user_data.delete_task('work', 'b')
+    user_data.set_task('home', 'd', make_task('Paint the fence'))
+    user_data.delete_list('home')
+    user_data.set_list('garden', {'name': 'Garden', 'tasks': {
+        'e': make_task('Mow the lawn', description='Before the report'),
+    }})
+
+    assert found(index, 'rep') == {('garden', 'e')}
+    assert found(index, 'summ') == {('work', 'a')}
+    assert found(index, 'fence') == set()
+
+
+def test_follows_another_instances_changes(index, user_data):
+    index.search('rep')
+    other = Data('alice', write_behind=False)
+    try:
+        other.set_task('work', 'd', make_task('Reply to Carol'))
+    finally:
+        other.close()
+
+    assert ('work', 'd') in found(index, 'rep')
+
+
+def test_searches_without_scanning_the_tasks(user_data):
+    user_data.set_list('large', {'name': 'Large', 'tasks': {
+        f'{number}': make_task(f'Task {number}', description='Filler text')
+        for number in range(50000)
+    }})
+    index = SearchIndex(user_data)
+    try:
+        index.search('task')
+        start = time.perf_counter()
+        for _ in range(100):
+            assert found(index, '12345 task') == {('large', '12345')}
+        elapsed = time.perf_counter() - start
+    finally:
+        index.close()
+
+    assert elapsed < 0.2
@@ -0,0 +1,81 @@
+"""
+Tests for the session of a logged in user: tearing down its reminders,
+worker threads and cleanups, and reporting threads left running.
+"""
+
+import threading
+import time
+
+import pytest
+import constants
+
+from conftest import make_task
+from data import Data
+from session import Session
+
+
+@pytest.fixture
+def session(workdir):
+    session = Session('alice')
+    yield session
+    session.close()
+
+
+def test_close_stops_threads_and_runs_cleanups(session):
+    stopped = threading.Event()
+    order = []
+    session.spawn(stopped.wait, stop=stopped.set)
+    session.add_cleanup(lambda: order.append('first'))
+    session.add_cleanup(lambda: order.append('second'))
+    session.user_data.set_list('work', {'name': 'Work', 'tasks': {}})
+
+    session.close()
+
+    assert order == ['second', 'first']
+    assert session.leaked_threads() == []
+    reopened = Data('alice', write_behind=False)
+    try:
+        assert 'work' in reopened.get()['lists']
+    finally:
+        reopened.close()
+
+
+def test_closed_session_refuses_new_work(session):
+    session.close()
+    ran = []
+
+    assert session.spawn(ran.append, 'thread') is None
+    session.add_cleanup(lambda: ran.append('cleanup'))
+    session.close()
+
+    assert ran == ['cleanup']
+
+
+def test_reminders_end_with_their_list_and_the_session(session):
+    session.user_data.set_list('work', {'name': 'Work', 'tasks': {}})
+    session.user_data.set_list('home', {'name': 'Home', 'tasks': {}})
+    now = time.time()
+    session.user_data.set_task('work', 'a', make_task('Soon', due=now + 60))
+    session.user_data.set_task('home', 'b', make_task('Later', due=now + 120))
+    session.start_reminders(lambda name: None)
+    armed = len(session.scheduler)
+
+    session.user_data.delete_list('work')
+    assert len(session.scheduler) == armed - 1
+
+    session.close()
+    assert len(session.scheduler) == 0
+
+
+def test_debug_mode_reports_leaked_threads(workdir, monkeypatch):
+    monkeypatch.setitem(constants.Session, 'Debug', True)
+    release = threading.Event()
+    session = Session('alice')
+    leaked = threading.Thread(target=release.wait, name='leaked')
+    leaked.start()
+    try:
+        with pytest.raises(AssertionError, match='leaked'):
+            session.close()
+    finally:
+        release.set()
+        leaked.join()
@@ -0,0 +1,370 @@
+"""
+Tests for the storage layer: the codecs, the storage engines behind "Data",
+schema migrations and import and export of lists and tasks.
+"""
+
+import os
+import pickle
+import threading
+import time
+
+import pytest
+import codec
+import model
+import recurrence
+import schema
+import transfer
+import utility as util
+
+from datetime import datetime
+
+from conftest import make_task
+from data import Data
+from journal import JournalStorage
+from storage import PickleStorage
+
+
+ENGINES = ['pickle', 'journal', 'sqlite', 'sharded']
+
+
+def sample_data() -> dict:
+    """
+    Returns user data with a plain, a completed and a recurring task.
+    """
+    due = datetime(2024, 5, 1, 9, 0).timestamp()
+    rule = recurrence.make_rule('weekly', due, weekdays=[0, 2])
+    tasks = {
+        'a': recurrence.schedule(
+            make_task('Write report', date_created=datetime(2024, 4, 1)), due
+        ),
+        'b': recurrence.schedule(make_task('Call Bob', completed=True), due),
+        'c': recurrence.schedule(make_task('Gym', recurrence=rule), due),
+    }
+    data = dict(model.template(), version=schema.SCHEMA_VERSION, last_active=1.5)
+    model.apply_operation(data, ('set_list', 'work', {
+        'name': 'Work',
+        'tasks': tasks,
+        'date_created': datetime(2024, 1, 1),
+        'version': schema.SCHEMA_VERSION
+    }))
+    return data
+
+
+@pytest.mark.parametrize('name', ['pickle', 'json', 'binary'])
+def test_codec_round_trip(name):
+    data = sample_data()
+
+    assert codec.decode(codec.encode(data, name)) == data
+
+
+def test_codec_reads_headerless_pickle():
+    data = sample_data()
+
+    assert codec.decode(pickle.dumps(data)) == data
+
+
+def test_codec_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        codec.get_codec('yaml')
+
+
+def test_journal_replays_commits(tmp_path):
+    storage = JournalStorage(str(tmp_path / 'user.pkl'), compact_size=1 << 20)
+    data = sample_data()
+    storage.write(data)
+
+    operations = [
+        ('set_task', 'work', 'd', make_task('Dentist', due=1.0)),
+        ('delete_task', 'work', 'b'),
+    ]
+    for operation in operations:
+        model.apply_operation(data, operation)
+    storage.commit(data, operations)
+
+    assert JournalStorage(str(tmp_path / 'user.pkl'), 1 << 20).read() == data
+
+
+def test_journal_drops_a_torn_record(tmp_path):
+    storage = JournalStorage(str(tmp_path / 'user.pkl'), compact_size=1 << 20)
+    data = sample_data()
+    storage.write(data)
+    operation = ('set_meta', 'last_active', 2.5)
+    model.apply_operation(data, operation)
+    storage.commit(data, [operation])
+
+    with open(storage.journal_path, 'ab') as file:
+        file.write(storage._encode(('set_meta', 'last_active', 9.0))[:-3])
+    size = os.path.getsize(storage.journal_path)
+
+    assert storage.read() == data
+    assert os.path.getsize(storage.journal_path) < size
+
+
+def test_journal_compaction_folds_into_the_snapshot(tmp_path):
+    storage = JournalStorage(str(tmp_path / 'user.pkl'), compact_size=1)
+    data = sample_data()
+    storage.write(data)
+
+    operation = ('set_task', 'work', 'd', make_task('Dentist', due=1.0))
+    model.apply_operation(data, operation)
+    storage.commit(data, [operation])
+    storage.close()
+
+    assert not os.path.exists(storage.journal_path)
+    assert not os.path.exists(storage.rotated_path)
+    assert PickleStorage(storage.path).read() == data
+    assert storage.read() == data
+
+
+def test_journal_compaction_keeps_a_snapshot_written_meanwhile(tmp_path):
+    path = str(tmp_path / 'user.pkl')
+    storage = JournalStorage(path, compact_size=1)
+    data = sample_data()
+    storage.write(data)
+
+    restored = dict(model.template(), version=schema.SCHEMA_VERSION)
+    replay = storage._replay
+
+    def replay_after_restore(journal_path):
+        # Another instance restores a backup while the journal is folded
+        if journal_path == storage.rotated_path:
+            JournalStorage(path, compact_size=1 << 20).write(restored)
+        return replay(journal_path)
+
+    storage._replay = replay_after_restore
+    operation = ('set_meta', 'last_active', 2.5)
+    model.apply_operation(data, operation)
+    storage.commit(data, [operation])
+    storage.close()
+
+    assert storage.read() == restored
+
+
+def test_schema_upgrades_legacy_lists():
+    list_data = {'name': 'Work', 'tasks': {
+        'a': {'name': 'A', 'completed': False, 'priority': None,
+              'due_date': {'date': '01/05/2024', 'time': '09:00 AM'}},
+    }}
+
+    assert schema.upgrade_list(list_data)
+    task_data = list_data['tasks']['a']
+    assert list_data['version'] == schema.SCHEMA_VERSION
+    assert task_data['description'] == ''
+    assert task_data['priority'] == '1'
+    assert task_data['due'] == util.due_timestamp(task_data['due_date'])
+    assert not schema.upgrade_list(list_data)
+
+
+def test_schema_refuses_newer_data():
+    with pytest.raises(ValueError):
+        schema.upgrade_data({'lists': {}, 'version': schema.SCHEMA_VERSION + 1})
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('write_behind', [False, True])
+def test_data_persists_changes(workdir, engine, write_behind):
+    user_data = Data('alice', engine=engine, write_behind=write_behind)
+    user_data.get()
+    user_data.set_list('work', {'name': 'Work', 'tasks': {}})
+    user_data.set_task('work', 'a', make_task('Write report', due=20.0))
+    user_data.set_task('work', 'b', make_task('Call Bob', due=10.0))
+    user_data.delete_task('work', 'a')
+    user_data.close()
+
+    reopened = Data('alice', engine=engine, write_behind=write_behind)
+    try:
+        assert reopened.find_task('work', 'CALL BOB')[0] == 'b'
+        assert reopened.find_task('work', 'write report') is None
+        assert reopened.get_list_summary('work')['total'] == 1
+    finally:
+        reopened.close()
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_tasks_by_priority(workdir, engine):
+    user_data = Data('alice', engine=engine, write_behind=False)
+    try:
+        user_data.get()
+        user_data.set_list('work', {'name': 'Work', 'tasks': {}})
+        user_data.set_task('work', 'a', make_task('Low', priority='3'))
+        user_data.set_task('work', 'b', make_task('High', priority='1'))
+        user_data.set_task('work', 'c', make_task('Middle', priority='2'))
+
+        assert [
+            task_id for task_id, _ in user_data.get_tasks_by_priority('work')
+        ] == ['b', 'c', 'a']
+    finally:
+        user_data.close()
+
+
+def test_idle_flush_keeps_the_debounce(workdir):
+    user_data = Data('alice', write_behind=True)
+    user_data.write_delay = 0.5
+    try:
+        user_data.get()
+        user_data.flush()
+        writes = user_data.stats['writes']
+
+        user_data.set_meta('last_active', 1.0)
+        user_data.set_meta('last_active', 2.0)
+        time.sleep(0.1)
+        assert user_data.stats['writes'] == writes
+
+        user_data.flush()
+        assert user_data.stats['writes'] == writes + 1
+        assert user_data.stats['coalesced'] == 1
+    finally:
+        user_data.close()
+
+
+def test_close_stops_the_writer_after_a_failed_write(workdir, monkeypatch):
+    user_data = Data('alice', write_behind=True)
+    user_data.get()
+
+    def fail(prepared):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(user_data.storage, 'persist', fail)
+    user_data.set_meta('last_active', 1.0)
+
+    with pytest.raises(OSError):
+        user_data.close()
+    assert not any(
+        thread.is_alive() and thread.name != 'MainThread'
+        for thread in threading.enumerate()
+    )
+
+
+def test_missing_shard_raises(workdir):
+    user_data = Data('alice', engine='sharded', write_behind=False)
+    user_data.get()
+    user_data.set_list('work', {'name': 'Work', 'tasks': {}})
+    user_data.close()
+
+    folder = os.path.join(Data.DATA_FOLDER, 'alice_data')
+    for name in os.listdir(folder):
+        if name.endswith('.shard'):
+            os.remove(os.path.join(folder, name))
+
+    reopened = Data('alice', engine='sharded', write_behind=False)
+    try:
+        with pytest.raises(FileNotFoundError):
+            reopened.get()['lists']['work']['tasks']
+    finally:
+        reopened.close()
+
+
+def test_backups_keep_the_newest_snapshot(workdir):
+    user_data = Data('alice', write_behind=False)
+    try:
+        user_data.save(sample_data())
+        user_data.backups.keep = 0
+        user_data.backups.backup()
+        name = user_data.backups.backup()
+
+        assert user_data.backups.snapshots() == [name]
+        assert user_data.backups.load(name) == sample_data()
+    finally:
+        user_data.close()
+
+
+def test_restore_the_oldest_snapshot_at_the_limit(workdir):
+    user_data = Data('alice', write_behind=False)
+    try:
+        user_data.backups.keep = 2
+        user_data.save(sample_data())
+        oldest = user_data.backups.backup()
+        user_data.set_meta('last_active', 2.0)
+        user_data.backups.backup()
+        user_data.set_meta('last_active', 3.0)
+
+        user_data.backups.restore(oldest, user_data)
+
+        assert user_data.get() == sample_data()
+        assert oldest not in user_data.backups.snapshots()
+    finally:
+        user_data.close()
+
+
+def test_backups_of_two_instances_keep_their_objects(workdir):
+    first = Data('alice', write_behind=False)
+    second = Data('alice', write_behind=False)
+    try:
+        first.save(sample_data())
+        first.backups.keep = second.backups.keep = 1
+
+        def take_backups(user_data):
+            for _ in range(10):
+                user_data.backups.backup()
+
+        threads = [
+            threading.Thread(target=take_backups, args=(user_data,))
+            for user_data in (first, second)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        (name,) = first.backups.snapshots()
+        assert second.backups.load(name) == sample_data()
+    finally:
+        first.close()
+        second.close()
+
+
+@pytest.mark.parametrize('file_format', ['jsonl', 'csv'])
+def test_transfer_round_trip(workdir, file_format):
+    source = Data('alice', write_behind=False)
+    target = Data('bob', write_behind=False)
+    try:
+        source.save(sample_data())
+        path = str(workdir / f'export.{file_format}')
+        assert transfer.export_file(source, path, file_format) == 4
+
+        result = transfer.import_rows(
+            target, transfer.read_rows(path, file_format)
+        )
+        assert result['skipped'] == 0
+        assert (result['lists'], result['tasks']) == (1, 3)
+
+        exported = source.get()['lists']['work']['tasks']
+        imported = target.get()['lists']['work']['tasks']
+        by_name = {task['name']: task for task in imported.values()}
+        for task_data in exported.values():
+            copy = by_name[task_data['name']]
+            for key in ('completed', 'due', 'recurrence', 'next_due'):
+                assert copy.get(key) == task_data.get(key)
+    finally:
+        source.close()
+        target.close()
+
+
+def test_transfer_skips_invalid_rules(workdir):
+    user_data = Data('alice', write_behind=False)
+    try:
+        result = transfer.import_rows(user_data, [{
+            'type': 'task', 'list': 'Work', 'name': 'Gym',
+            'due_date': '01/05/2024', 'due_time': '09:00 AM',
+            'recurrence': '{"frequency": "hourly"}'
+        }])
+        assert result['skipped'] == 1
+        assert result['tasks'] == 0
+    finally:
+        user_data.close()
+
+
+def test_transfer_keeps_a_bounded_sample_of_errors(workdir):
+    user_data = Data('alice', write_behind=False)
+    try:
+        rows = (
+            {'type': 'task', 'list': 'Work', 'name': ''}
+            for _ in range(transfer.MAX_ERRORS * 3)
+        )
+        result = transfer.import_rows(user_data, rows)
+
+        assert result['skipped'] == transfer.MAX_ERRORS * 3
+        assert len(result['errors']) == transfer.MAX_ERRORS
+        assert result['errors'][0][0] == 1
+    finally:
+        user_data.close()
@@ -0,0 +1,120 @@
+"""
+Tests for the scheduler serving every reminder from a single thread.
+"""
+
+import gc
+import threading
+import time
+import weakref
+
+import pytest
+
+from timer import Scheduler
+
+
+class Ran:
+    """
+    Collects the names of the reminders run, waiting for them to arrive.
+    """
+
+    def __init__(self):
+        self.names = []
+        self._condition = threading.Condition()
+
+    def __call__(self, name: str):
+        with self._condition:
+            self.names.append(name)
+            self._condition.notify_all()
+
+    def wait(self, count: int, timeout: float = 2) -> list:
+        with self._condition:
+            self._condition.wait_for(lambda: len(self.names) >= count, timeout)
+            return list(self.names)
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler()
+    yield scheduler
+    scheduler.close()
+
+
+def test_runs_reminders_in_due_order(scheduler):
+    ran = Ran()
+    now = time.time()
+    scheduler.schedule('b', now + 0.15, 'second', ran)
+    scheduler.schedule('c', now + 0.3, 'third', ran)
+    scheduler.schedule('a', now + 0.05, 'first', ran)
+
+    assert ran.wait(3) == ['first', 'second', 'third']
+    assert len(scheduler) == 0
+
+
+def test_moving_and_cancelling(scheduler):
+    ran = Ran()
+    now = time.time()
+    scheduler.schedule('a', now + 0.05, 'cancelled', ran)
+    scheduler.schedule('b', now + 5, 'moved', ran)
+    scheduler.cancel('a')
+    scheduler.schedule('b', now + 0.1, 'moved', ran)
+
+    assert 'a' not in scheduler and 'b' in scheduler
+    assert ran.wait(1) == ['moved']
+    time.sleep(0.1)
+    assert ran.names == ['moved']
+
+
+def test_a_failing_reminder_does_not_stop_the_others(scheduler):
+    ran = Ran()
+
+    def fail(name):
+        raise RuntimeError(name)
+
+    now = time.time()
+    scheduler.schedule('a', now, 'failing', fail)
+    scheduler.schedule('b', now + 0.05, 'after', ran)
+
+    assert ran.wait(1) == ['after']
+
+
+def test_reminders_may_schedule_reminders(scheduler):
+    ran = Ran()
+
+    def again(name):
+        ran(name)
+        if len(ran.names) < 3:
+            scheduler.schedule(len(ran.names), time.time(), name, again)
+
+    scheduler.schedule(0, time.time(), 'again', again)
+
+    assert ran.wait(3) == ['again'] * 3
+
+
+def test_moved_reminders_are_released(scheduler):
+    class Callback:
+        def __call__(self, name):
+            pass
+
+    later = time.time() + 3600
+    released = []
+    # Each move is earlier, so the cancelled entries never reach the top
+    for step in range(1000):
+        callback = Callback()
+        released.append(weakref.ref(callback))
+        scheduler.schedule(step % 10, later - step, 'later', callback)
+    del callback
+    gc.collect()
+
+    assert len(scheduler) == 10
+    # Only the live reminders and a bounded number of cancelled ones remain
+    assert sum(ref() is not None for ref in released) <= 30
+
+
+def test_close_drops_every_reminder(scheduler):
+    ran = Ran()
+    scheduler.schedule('a', time.time() + 0.05, 'dropped', ran)
+    scheduler.close()
+
+    time.sleep(0.1)
+    assert len(scheduler) == 0
+    assert ran.names == []
@@ -0,0 +1,405 @@
+"""
+This module provides streaming import and export of a user's lists and tasks
+as JSONL or CSV. Rows are read and written one at a time, validated with the
+same rules as the task editor and committed in batches.
+
+Run as a script:
+    python transfer.py export <username> <path> [--format jsonl|csv]
+    python transfer.py import <username> <path> [--format jsonl|csv] [--batch N]
+
+JSONL files hold one record per line, either a list
+({"type": "list", "list": ..., "name": ...}) or a task ({"type": "task", ...}).
+CSV files hold one task per row, and a row without a task name declares a list.
+A recurring task carries its rule as JSON text and the ISO 8601 date of its
+next occurrence, so it imports as the same recurring task.
+
+Imports:
+- argparse: For the command line interface.
+- csv: For reading and writing CSV files.
+- json: For reading and writing JSONL files.
+- constants: Contains the error messages used to report skipped rows.
+- model: For the key task names are indexed under.
+- recurrence: For validating the rules of recurring tasks.
+- schema: For stamping imported lists with the schema version.
+- utility: For validating rows and generating task ids.
+- datetime: For parsing and formatting dates.
+
+Attributes:
+- FIELDS (list): Columns of a task row.
+- MAX_ERRORS (int): How many skip reasons an import keeps.
+- PRIORITY_LEVELS (list): Allowed task priorities.
+
+Functions:
+- export_rows(user_data): Yields a record for every list and task.
+- export_file(user_data, path: str, file_format: str): Writes every record.
+- read_rows(path: str, file_format: str): Yields the records of a file.
+- parse_rule(value, due: float): Returns the validated rule of a task row.
+- validate_task(row: dict): Returns the error key for an invalid task row.
+- import_rows(user_data, rows, batch_size: int, progress): Imports records.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import argparse
+import csv
+import json
+import constants
+import model
+import recurrence
+import schema
+import utility as util
+
+from datetime import datetime
+
+
+FIELDS = [
+    'type', 'list', 'name', 'description', 'priority',
+    'completed', 'due_date', 'due_time', 'recurrence', 'next_due',
+    'date_created'
+]
+
+PRIORITY_LEVELS = [str(level+1) for level in range(5)]
+
+MAX_ERRORS = 100
+
+
+def _format_datetime(value) -> str:
+    """
+    Formats a stored datetime as ISO 8601, or an empty string.
+    """
+    return value.isoformat() if isinstance(value, datetime) else ''
+
+
+def _parse_datetime(value: str) -> datetime:
+    """
+    Parses an ISO 8601 datetime, falling back to now.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.now()
+
+
+def _format_timestamp(value) -> str:
+    """
+    Formats a stored timestamp as an ISO 8601 datetime, or an empty string.
+    """
+    if value is None:
+        return ''
+    return datetime.fromtimestamp(value).isoformat()
+
+
+def _parse_bool(value) -> bool:
+    """
+    Parses a boolean written by JSON or as CSV text.
+    """
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes')
+
+
+def export_rows(user_data):
+    """
+    Yields a record for every list followed by its tasks. Lists are
+    visited one at a time so lazily loaded lists are read as needed.
+    """
+    data = user_data.get()
+    for list_name in list(data['lists']):
+        list_data = data['lists'][list_name]
+        yield {
+            'type': 'list',
+            'list': list_data['name'],
+            'date_created': _format_datetime(list_data.get('date_created'))
+        }
+
+        for task_data in list_data['tasks'].values():
+            due_date = task_data.get('due_date') or {}
+            yield {
+                'type': 'task',
+                'list': list_data['name'],
+                'name': task_data['name'],
+                'description': task_data.get('description', ''),
+                'priority': str(task_data.get('priority', '1')),
+                'completed': bool(task_data.get('completed')),
+                'due_date': due_date.get('date', ''),
+                'due_time': due_date.get('time', ''),
+                'recurrence': (
+                    json.dumps(task_data['recurrence'])
+                    if task_data.get('recurrence') else ''
+                ),
+                'next_due': _format_timestamp(task_data.get('next_due')),
+                'date_created': _format_datetime(task_data.get('date_created'))
+            }
+
+
+def export_file(user_data, path: str, file_format: str) -> int:
+    """
+    Streams every list and task to a JSONL or CSV file.
+    Returns the number of records written.
+    """
+    count = 0
+    with open(path, "w", newline='', encoding='utf-8') as file:
+        writer = None
+        if file_format == 'csv':
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+
+        for row in export_rows(user_data):
+            if writer:
+                writer.writerow(row)
+            else:
+                file.write(json.dumps(row, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def read_rows(path: str, file_format: str):
+    """
+    Yields the records of a JSONL or CSV file one at a time.
+    """
+    with open(path, "r", newline='', encoding='utf-8') as file:
+        if file_format == 'csv':
+            for row in csv.DictReader(file):
+                if not row.get('type'):
+                    row['type'] = 'task' if row.get('name') else 'list'
+                yield row
+            return
+
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def parse_rule(value, due: float):
+    """
+    Returns the recurrence rule of a task row, given as a dictionary or as
+    JSON text, rebuilt through the same checks as the task editor. Returns
+    None for a task which does not repeat and raises ValueError for an
+    invalid rule.
+    """
+    if not value:
+        return None
+    rule = json.loads(value) if isinstance(value, str) else value
+    if not isinstance(rule, dict):
+        raise ValueError('Rule must be an object')
+
+    checked = recurrence.make_rule(
+        rule.get('frequency'), due, int(rule.get('interval', 1)),
+        rule.get('weekdays')
+    )
+    if 'day' in checked:
+        day = int(rule.get('day', checked['day']))
+        if not 1 <= day <= 31:
+            raise ValueError('Day must be between 1 and 31')
+        checked['day'] = day
+    return checked
+
+
+def _parse_next_due(row: dict, due: float):
+    """
+    Returns the next due timestamp of a task row, or None if it has none.
+    Raises ValueError unless it falls after the current occurrence.
+    """
+    if not row.get('next_due'):
+        return None
+    next_due = datetime.fromisoformat(row['next_due']).timestamp()
+    if next_due <= due:
+        raise ValueError('Next occurrence must follow the due date')
+    return next_due
+
+
+def validate_task(row: dict):
+    """
+    Returns the error key and message arguments for an invalid task row,
+    using the same checks as saving a task in the editor, or None.
+    """
+    name = row.get('name') or ''
+    description = row.get('description') or ''
+
+    if len(name) == 0:
+        return "App_InvalidTaskInput", {}
+    if not util.check_name_length(name):
+        return "App_InvalidNameLength", {'msg': "Task name"}
+    if not util.check_desc_length(description):
+        return "App_InvalidDescriptionLength", {'msg': "Task description"}
+    if not util.is_valid(name):
+        return "App_InvalidInput", {'msg': "Name"}
+    if str(row.get('priority') or '1') not in PRIORITY_LEVELS:
+        return "App_InvalidInput", {'msg': "Priority"}
+
+    try:
+        due = util.due_timestamp({
+            'date': row['due_date'],
+            'time': row['due_time']
+        })
+    except (KeyError, TypeError, ValueError):
+        return "App_InvalidInput", {'msg': "Due date"}
+
+    try:
+        parse_rule(row.get('recurrence'), due)
+    except (KeyError, TypeError, ValueError):
+        return "App_InvalidRecurrence", {}
+    try:
+        _parse_next_due(row, due)
+    except (TypeError, ValueError):
+        return "App_InvalidInput", {'msg': "Next due date"}
+    return None
+
+
+def _open_list(user_data, list_name: str, names: dict, operations: list):
+    """
+    Returns the key of the list a row belongs to, queueing its creation if
+    it does not exist yet. The indexed task names of each list touched are
+    copied so rows earlier in the same batch are caught as duplicates too.
+    """
+    list_key = list_name.lower()
+    if list_key in names:
+        return list_key
+
+    lists = user_data.get()['lists']
+    if list_key in lists:
+        # Loading the tasks first checks the index of a lazily loaded list
+        lists[list_key]['tasks']
+        names[list_key] = set(lists[list_key]['name_index'])
+    else:
+        names[list_key] = set()
+        operations.append(('set_list', list_key, {
+            'name': list_name,
+            'tasks': {},
+            'date_created': datetime.now(),
+            'version': schema.SCHEMA_VERSION
+        }))
+    return list_key
+
+
+def import_rows(user_data, rows, batch_size: int = 5000, progress=None) -> dict:
+    """
+    Imports list and task records into the user's data, committing every
+    batch_size records as one write. Tasks whose name already exists in
+    their list, ignoring case, are skipped like in the task editor.
+    Returns the counts of imported and skipped rows and the reasons of the
+    first MAX_ERRORS skipped rows, so memory stays bounded however many
+    rows are bad.
+    """
+    names = {}
+    operations = []
+    result = {'lists': 0, 'tasks': 0, 'skipped': 0, 'errors': []}
+
+    def skip(line: int, status_error: str, **kwargs):
+        result['skipped'] += 1
+        if len(result['errors']) >= MAX_ERRORS:
+            return
+        result['errors'].append((line, constants.DisplayErrors[status_error]
+                                 .format(msg=kwargs.get('msg'),
+                                         type=kwargs.get('type'))))
+
+    def commit():
+        if operations:
+            user_data.commit(operations)
+            operations.clear()
+        if progress:
+            progress(result)
+
+    for line, row in enumerate(rows, start=1):
+        list_name = (row.get('list') or '').strip()
+        if not util.check_name_length(list_name):
+            skip(line, "App_InvalidNameLength", msg="List")
+            continue
+
+        created = len(operations)
+        list_key = _open_list(user_data, list_name, names, operations)
+        result['lists'] += len(operations) - created
+
+        if row.get('type') == 'task':
+            error = validate_task(row)
+            if error:
+                skip(line, error[0], **error[1])
+                continue
+
+            if model.index_key(row['name']) in names[list_key]:
+                skip(line, "App_InvalidName", type="task", msg=row['name'])
+                continue
+
+            names[list_key].add(model.index_key(row['name']))
+            due = util.due_timestamp({
+                'date': row['due_date'],
+                'time': row['due_time']
+            })
+            task_data = {
+                'completed': _parse_bool(row.get('completed')),
+                'name': row['name'],
+                'description': row.get('description') or '',
+                'priority': str(row.get('priority') or '1'),
+                'date_created': _parse_datetime(row.get('date_created'))
+            }
+            rule = parse_rule(row.get('recurrence'), due)
+            if rule:
+                task_data['recurrence'] = rule
+            task_data = recurrence.schedule(task_data, due)
+            if rule and row.get('next_due'):
+                task_data['next_due'] = _parse_next_due(row, due)
+
+            operations.append(
+                ('set_task', list_key, util.generate_unique_id(), task_data)
+            )
+            result['tasks'] += 1
+
+        if len(operations) >= batch_size:
+            commit()
+
+    commit()
+    return result
+
+
+def _guess_format(path: str, file_format: str = None) -> str:
+    """
+    Returns the requested format, or guesses it from the file extension.
+    """
+    if file_format:
+        return file_format
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+if __name__ == "__main__":
+    from data import Data
+
+    parser = argparse.ArgumentParser(
+        description='Import or export a user\'s lists and tasks.')
+    parser.add_argument('command', choices=['import', 'export'])
+    parser.add_argument('username')
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=['jsonl', 'csv'])
+    parser.add_argument('--batch', type=int, default=5000)
+    args = parser.parse_args()
+
+    file_format = _guess_format(args.path, args.format)
+    user_data = Data(args.username, write_behind=False)
+
+    try:
+        if args.command == 'export':
+            count = export_file(user_data, args.path, file_format)
+            print(f'Exported {count} records to {args.path}')
+        else:
+            def report(result):
+                print(f'\r{result["tasks"]} tasks imported, '
+                      f'{result["skipped"]} skipped', end='', flush=True)
+
+            result = import_rows(
+                user_data,
+                read_rows(args.path, file_format),
+                batch_size=args.batch,
+                progress=report
+            )
+            print()
+            for line, error in result['errors']:
+                print(f'Line {line}: {error}')
+            if result['skipped'] > len(result['errors']):
+                print(f'... and {result["skipped"] - len(result["errors"])} '
+                      'more skipped rows')
+            print(f'Imported {result["lists"]} lists and '
+                  f'{result["tasks"]} tasks')
+    finally:
+        user_data.close()
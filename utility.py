@@ -1,19 +1,37 @@
 """
-This module provides utility functions for generating unique IDs and 
-splitting strings into multiple lines based on a maximum number of characters.
+This module provides utility functions for generating unique IDs,
+splitting strings into multiple lines based on a maximum number of characters,
+parsing task due dates and validating names and descriptions.
+
+Tasks store their due date as a timestamp, parsed once when the task is saved.
+The strings shown for it are derived from the timestamp and cached.
 
 Imports:
 - uuid: For generating unique identifiers.
+- functools: For caching due date display strings.
+- re: For validating input.
+- constants: Contains the name and description length limits.
+- datetime: For parsing due dates.
 
 Functions:
 - generate_unique_id(): Generates and returns a unique ID as a string.
 - split_string(string: str, max_characters: int): Splits a string into lines 
   that do not exceed the specified number of characters.
+- parse_due_date(due_date: dict): Parses a task's due date and time strings.
+- due_timestamp(due_date: dict): Returns the timestamp of a due date.
+- due_datetime(due: float): Returns the local datetime of a timestamp.
+- format_due_date(due: float): Returns the date and time strings of a timestamp.
+- format_due_label(due: float): Returns the short label shown on a task.
+- is_valid(input: str): Validates input does not contain any symbols.
+- check_name_length(name: str): Checks a name fits the length limits.
+- check_desc_length(desc: str): Checks a description fits the length limit.
 
 Returns:
 - str: A unique identifier.
 - str: A string with line breaks inserted to ensure no line exceeds the 
   specified number of characters.
+- datetime: The due date of a task.
+- bool: Whether the input is valid.
 
 Author: Blake Stevenson
 Date: 2024-09-06
@@ -22,6 +40,16 @@ License: MIT
 """
 
 import uuid
+import re as Regex
+import constants
+
+from datetime import datetime
+from functools import lru_cache
+
+
+# Constants
+DUE_DATE_FORMAT = "%d/%m/%Y %I:%M %p"
+VALID_INPUT = Regex.compile(r"^[^<>/{}[\]~`]*$")
 
 
 def generate_unique_id() -> str:
@@ -49,3 +77,68 @@ def split_string(string: str, max_characters: int) -> str:
         lines.append(current_line.strip())
 
     return '\n'.join(lines)
+
+
+def parse_due_date(due_date: dict) -> datetime:
+    """
+    Parses a task's due date, stored as separate date and time strings.
+    """
+    return datetime.strptime(
+        f"{due_date['date']} {due_date['time']}", DUE_DATE_FORMAT)
+
+
+def due_timestamp(due_date: dict) -> float:
+    """
+    Returns the timestamp of a due date given as date and time strings.
+    This is the only place due dates are parsed, when a task is saved.
+    """
+    return parse_due_date(due_date).timestamp()
+
+
+@lru_cache(maxsize=1024)
+def due_datetime(due: float) -> datetime:
+    """
+    Returns the local datetime of a due timestamp.
+    """
+    return datetime.fromtimestamp(due)
+
+
+@lru_cache(maxsize=1024)
+def format_due_date(due: float) -> dict:
+    """
+    Returns the date and time strings of a due timestamp, in the same
+    format the task editor uses. The returned dict must not be modified.
+    """
+    due = due_datetime(due)
+    return {'date': due.strftime("%d/%m/%Y"), 'time': due.strftime("%I:%M %p")}
+
+
+@lru_cache(maxsize=1024)
+def format_due_label(due: float) -> str:
+    """
+    Returns the short due date label shown on a task, such as "Jan 01".
+    """
+    return due_datetime(due).strftime("%b %d")
+
+
+def is_valid(input: str):
+    """
+    Uses regex library to validate input does not contain any of the
+    symbols < > / { } [ ] ~ `.
+    """
+    return VALID_INPUT.match(input)
+
+
+def check_name_length(name: str):
+    """
+    Returns boolean depending on if name fits within requirements.
+    """
+    return (len(name) > constants.App["NameMinimumLength"] 
+        and len(name) < constants.App["NameMaximumLength"])
+
+
+def check_desc_length(desc: str):
+    """
+    Returns boolean depending on if desc fits within requirements.
+    """
+    return len(desc) < constants.App["DescriptionMaximumLength"]
@@ -0,0 +1,470 @@
+"""
+This module provides the "VirtualList" class, a scrollable list which only
+creates widgets for the rows in view plus a small overscan. Rows have a fixed
+height per kind, so the position of every row is known without creating it,
+and the widgets of rows scrolled out of view are reused for the rows scrolled
+into view. Showing a list therefore costs the same however long it is.
+
+Rows out of view are kept in a pool for the next items shown, up to a limit
+per kind, so a list which is kept and given new items creates almost no
+widgets after it is first shown.
+
+New items are laid out on the Tk thread as they stream in. The first
+screenful is shown straight away and the rest are added in chunks of limited
+time between events, so the window stays responsive however many there are.
+
+Most items are of one base kind, and only the indexes of the few items of
+other kinds, such as section headers, are kept. The position of any item is
+worked out from its index and the number of those items before it, found
+with a binary search, so no position is ever stored.
+
+A single item can also be inserted, removed or replaced, keeping the scroll
+position. No widget is created or destroyed for the items out of view, only
+the rows in view are moved and no position is recalculated, so a change
+costs the same however long the list is.
+
+Imports:
+- bisect: For counting the items of other kinds before an index.
+- time: For limiting the time spent on each chunk of items.
+- tkinter: For the canvas the rows are drawn on.
+- customtkinter: For the frame and scrollbar.
+
+Classes:
+- VirtualList: A scrollable list creating widgets only for visible rows.
+
+Attributes:
+- items (list): The (kind, payload) items shown.
+- stats (dict): How many row widgets were created and how many reused.
+
+Methods:
+- __init__(self, master, create_row, update_row, heights: dict,
+    base_kind: str, ...): Initializes an empty list with the row factories
+    and row heights.
+- set_items(self, items: list, keep_position: bool, done): Shows a new list
+    of (kind, payload) items, streaming in those past the first screenful.
+- insert(self, index: int, item: tuple): Inserts an item before an index.
+- remove(self, index: int): Removes the item at an index.
+- replace(self, index: int, item: tuple): Replaces the item at an index.
+- refresh(self): Updates the widgets of the rows in view.
+- destroy(self): Stops streaming in items, removes the wheel bindings and
+    destroys the list.
+
+Author: Blake Stevenson
+Date: 2024-09-06
+Version: 1.0
+License: MIT
+"""
+
+import bisect
+import time
+import tkinter
+import customtkinter
+
+
+class VirtualList(customtkinter.CTkFrame):
+    """
+    Shows a list of (kind, payload) items. create_row(kind, parent) creates
+    a row widget for a kind of item and update_row(kind, row, payload)
+    shows an item in a row, so a row can show any item of its kind.
+    update_row may be replaced whenever new items are set.
+    """
+
+    # Constants
+    OVERSCAN = 2
+    POOL_SIZE = 20
+    CHUNK_TIME = 0.008
+    CHUNK_DELAY = 1
+    SCROLL_STEP = 20
+    WHEEL_STEPS = 3
+    WHEEL_SEQUENCES = ('<MouseWheel>', '<Button-4>', '<Button-5>')
+
+    def __init__(self, master, create_row, update_row, heights: dict,
+                 base_kind: str, width: int = 300, height: int = 350,
+                 fg_color: str = "#383736", **kwargs):
+        """
+        Initializes an empty list. heights maps each kind of item to the
+        height of its row, including any spacing around it. Rows are
+        centred vertically within their height. base_kind is the kind of
+        most items, the items of every other kind being few.
+        """
+        super().__init__(
+            master, width=width, height=height, fg_color=fg_color, **kwargs
+        )
+        self.create_row = create_row
+        self.update_row = update_row
+        self.heights = heights
+        self.base_kind = base_kind
+
+        self.items = []
+        self._positions = {kind: [] for kind in heights if kind != base_kind}
+        self._measured = 0
+        self._total_height = 0
+        self._visible = {}
+        self._free = {}
+        self._windows = {}
+        self._stream_job = None
+        self._done = None
+        self.stats = {'created': 0, 'reused': 0}
+
+        self.canvas = tkinter.Canvas(
+            self, width=width, height=height, highlightthickness=0,
+            background=fg_color,
+            yscrollincrement=self._apply_widget_scaling(self.SCROLL_STEP)
+        )
+        self.scrollbar = customtkinter.CTkScrollbar(
+            self, command=self.canvas.yview, button_color="#2d2c2c"
+        )
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.pack(side=customtkinter.LEFT, fill=customtkinter.BOTH, expand=True)
+        self.scrollbar.pack(side=customtkinter.RIGHT, fill=customtkinter.Y)
+
+        self.canvas.bind('<Configure>', self._on_resize)
+        # The wheel is bound to a tag of this list's own widgets rather than
+        # app-wide, so nothing is left bound once the list is destroyed
+        self._wheel_tag = f'VirtualListWheel{id(self)}'
+        for sequence in self.WHEEL_SEQUENCES:
+            self.bind_class(self._wheel_tag, sequence, self._on_wheel)
+        self._tag_wheel(self.canvas)
+
+    def set_items(self, items: list, keep_position: bool = False, done=None):
+        """
+        Shows a new list of (kind, payload) items, reusing the row widgets
+        already created. The first screenful is shown straight away and the
+        rest stream in on the Tk thread, after which done() is called if
+        given. It is also called if the items are replaced before then.
+        The scroll position is kept if asked, which lays out every item at
+        once as the position may be anywhere in them.
+        """
+        self._stop_stream()
+        self.items = items
+        for positions in self._positions.values():
+            positions.clear()
+        self._measured = 0
+        self._total_height = 0
+        self._done = done
+
+        # Every row is rebound, as the items in view may all have changed
+        for index in list(self._visible):
+            self._release(index)
+
+        if keep_position:
+            self._measure()
+        else:
+            self.canvas.yview_moveto(0)
+            # The canvas may not have been drawn yet, so has no height
+            height = max(
+                self.canvas.winfo_height(), self.canvas.winfo_reqheight()
+            )
+            self._measure(height=height / self._apply_widget_scaling(1))
+        self.refresh()
+
+        if self._measured < len(self.items):
+            self._stream_job = self.after_idle(self._stream)
+        else:
+            self._stop_stream()
+
+    def _measure(self, height: float = None, deadline: float = None):
+        """
+        Lays out the items not yet laid out, noting the indexes of those
+        not of the base kind, stopping early once they fill the height,
+        plus the overscan, or the deadline has passed.
+        """
+        total = self._total_height
+        overscan = self.OVERSCAN
+        index = self._measured
+        while index < len(self.items):
+            if height is not None and total > height:
+                if not overscan:
+                    break
+                overscan -= 1
+            if deadline is not None and not index % 256 and (
+                time.perf_counter() > deadline
+            ):
+                break
+            kind = self.items[index][0]
+            if kind != self.base_kind:
+                self._positions[kind].append(index)
+            total += self.heights[kind]
+            index += 1
+        self._measured = index
+        self._total_height = total
+
+        self.canvas.configure(
+            scrollregion=(0, 0, 0, self._apply_widget_scaling(total))
+        )
+
+    def _stream(self):
+        """
+        Lays out the next chunk of items and shows any which came into view,
+        then schedules the next chunk until every item is in.
+        """
+        self._stream_job = None
+        if not self.winfo_exists():
+            return
+
+        self._measure(deadline=time.perf_counter() + self.CHUNK_TIME)
+        self.refresh()
+        if self._measured < len(self.items):
+            self._stream_job = self.after(self.CHUNK_DELAY, self._stream)
+        else:
+            self._stop_stream()
+
+    def _finish_stream(self):
+        """
+        Lays out every item still streaming in straight away.
+        """
+        if self._stream_job is not None:
+            self._measure()
+            self.refresh()
+            self._stop_stream()
+
+    def _stop_stream(self):
+        """
+        Cancels streaming in items and calls the done function if given.
+        """
+        if self._stream_job is not None:
+            self.after_cancel(self._stream_job)
+            self._stream_job = None
+
+        done, self._done = self._done, None
+        if done:
+            done()
+
+    def insert(self, index: int, item: tuple):
+        """
+        Inserts a (kind, payload) item before an index, moving the rows in
+        view below it down.
+        """
+        self._finish_stream()
+        kind = item[0]
+        self.items.insert(index, item)
+        self._shift_positions(index, 1)
+        if kind != self.base_kind:
+            bisect.insort(self._positions[kind], index)
+        self._measured += 1
+        self._shift_visible(index, 1)
+        self._relayout(index, self.heights[kind])
+
+    def remove(self, index: int):
+        """
+        Removes the item at an index, moving the rows in view below it up.
+        """
+        self._finish_stream()
+        if index in self._visible:
+            self._release(index)
+        kind = self.items.pop(index)[0]
+        if kind != self.base_kind:
+            positions = self._positions[kind]
+            del positions[bisect.bisect_left(positions, index)]
+        self._shift_positions(index, -1)
+        self._measured -= 1
+        self._shift_visible(index, -1)
+        self._relayout(index, -self.heights[kind])
+
+    def replace(self, index: int, item: tuple):
+        """
+        Replaces the item at an index. A row in view showing an item of the
+        same kind shows the new item in place.
+        """
+        self._finish_stream()
+        kind, payload = item
+        old_kind, _ = self.items[index]
+        if kind != old_kind:
+            self.remove(index)
+            self.insert(index, item)
+            return
+
+        self.items[index] = item
+        if index in self._visible:
+            self.update_row(kind, self._visible[index][1], payload)
+
+    def _shift_positions(self, index: int, step: int):
+        """
+        Moves the noted indexes of the items not of the base kind from an
+        index onwards by a number of items.
+        """
+        for positions in self._positions.values():
+            start = bisect.bisect_left(positions, index)
+            positions[start:] = [
+                position + step for position in positions[start:]
+            ]
+
+    def _shift_visible(self, index: int, step: int):
+        """
+        Moves the rows in view from an index onwards by a number of items.
+        """
+        moved = sorted(
+            (other for other in self._visible if other >= index),
+            reverse=step > 0
+        )
+        for other in moved:
+            self._visible[other + step] = self._visible.pop(other)
+
+    def _offset(self, index: int) -> float:
+        """
+        Returns the position of the top of an item: the height of the base
+        kind for every item before it, corrected for the items of other
+        kinds among them.
+        """
+        base = self.heights[self.base_kind]
+        offset = index * base
+        for kind, positions in self._positions.items():
+            offset += (
+                (self.heights[kind] - base)
+                * bisect.bisect_left(positions, index)
+            )
+        return offset
+
+    def _index_at(self, offset: float) -> int:
+        """
+        Returns the index of the item laid out at a position, stepping over
+        the items not of the base kind in order.
+        """
+        base = self.heights[self.base_kind]
+        others = sorted(
+            (position, kind) for kind, positions in self._positions.items()
+            for position in positions
+        )
+        index = top = 0
+        for position, kind in others:
+            start = top + (position - index) * base
+            if offset < start:
+                break
+            top = start + self.heights[kind]
+            if offset < top:
+                return position
+            index = position + 1
+        return index + int(max(offset - top, 0) // base)
+
+    def _relayout(self, index: int, change: float):
+        """
+        Grows the height of the list by the change, moves the rows in view
+        from an index onwards and shows any rows which came into view.
+        """
+        self._total_height += change
+        for position, (kind, row) in self._visible.items():
+            if position >= index:
+                self._place(position, kind, row)
+
+        self.canvas.configure(
+            scrollregion=(0, 0, 0, self._apply_widget_scaling(self._total_height))
+        )
+        self.refresh()
+
+    def refresh(self):
+        """
+        Shows the rows in view, releasing the rows which left it and
+        binding rows to the items which entered it.
+        """
+        if not self._measured:
+            return
+
+        scaling = self._apply_widget_scaling(1)
+        top = self.canvas.canvasy(0) / scaling
+        bottom = top + self.canvas.winfo_height() / scaling
+        first = max(self._index_at(top) - self.OVERSCAN, 0)
+        last = min(self._index_at(bottom) + 1 + self.OVERSCAN, self._measured)
+
+        for index in list(self._visible):
+            if not first <= index < last:
+                self._release(index)
+
+        width = self.canvas.winfo_width()
+        for index in range(first, last):
+            if index in self._visible:
+                continue
+            kind, payload = self.items[index]
+            row = self._acquire(kind)
+            self.update_row(kind, row, payload)
+            self._place(index, kind, row)
+            self.canvas.itemconfigure(
+                self._windows[row], state='normal', width=width
+            )
+            self._visible[index] = (kind, row)
+
+    def _place(self, index: int, kind: str, row):
+        """
+        Moves a row to the position of an item, centred in its height.
+        """
+        spacing = (
+            self._apply_widget_scaling(self.heights[kind])
+            - row.winfo_reqheight()
+        ) / 2
+        self.canvas.coords(
+            self._windows[row], 0,
+            self._apply_widget_scaling(self._offset(index)) + spacing
+        )
+
+    def _acquire(self, kind: str):
+        """
+        Returns a free row widget of a kind, creating one if there is none.
+        """
+        free = self._free.setdefault(kind, [])
+        if free:
+            self.stats['reused'] += 1
+            return free.pop()
+
+        self.stats['created'] += 1
+        row = self.create_row(kind, self.canvas)
+        self._tag_wheel(row)
+        self._windows[row] = self.canvas.create_window(
+            0, 0, window=row, anchor='nw', state='hidden'
+        )
+        return row
+
+    def _release(self, index: int):
+        """
+        Hides the row showing an item and keeps it for reuse, or destroys
+        it if the pool of its kind is full.
+        """
+        kind, row = self._visible.pop(index)
+        free = self._free.setdefault(kind, [])
+        if len(free) >= self.POOL_SIZE:
+            self.canvas.delete(self._windows.pop(row))
+            row.destroy()
+            return
+        self.canvas.itemconfigure(self._windows[row], state='hidden')
+        free.append(row)
+
+    def _on_scroll(self, first: str, last: str):
+        """
+        Moves the scrollbar and shows the rows scrolled into view.
+        """
+        self.scrollbar.set(first, last)
+        self.refresh()
+
+    def _on_resize(self, event):
+        """
+        Resizes the rows in view to the new width of the list.
+        """
+        for kind, row in self._visible.values():
+            self.canvas.itemconfigure(self._windows[row], width=event.width)
+        self.refresh()
+
+    def _tag_wheel(self, widget):
+        """
+        Adds the wheel tag to a widget and everything inside it, so the
+        mouse wheel scrolls the list wherever it is used over it.
+        """
+        widget.bindtags((self._wheel_tag,) + widget.bindtags())
+        for child in widget.winfo_children():
+            self._tag_wheel(child)
+
+    def _on_wheel(self, event):
+        """
+        Scrolls the list when the mouse wheel is used over it.
+        """
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-self.WHEEL_STEPS, 'units')
+        elif event.num == 5 or event.delta < 0:
+            self.canvas.yview_scroll(self.WHEEL_STEPS, 'units')
+
+    def destroy(self):
+        """
+        Stops streaming in items, removes the wheel bindings and
+        destroys the list.
+        """
+        self._stop_stream()
+        for sequence in self.WHEEL_SEQUENCES:
+            self.unbind_class(self._wheel_tag, sequence)
+        super().destroy()